@@ -3,9 +3,25 @@ import os
 from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash
 from db import db
 from routes import register_blueprints
-from models import User, Recipe, Country, CountryState, RecipeStep, RecipeIngredient, Favorite
+from models import User, Recipe, Country, CountryState, RecipeStep, RecipeIngredient, Favorite, Comment
 from utils.auth import get_current_user, login_required
 from utils.pagination import get_pagination_params, paginate_query
+from utils.db_routing import init_db_routing
+from utils.metrics import init_metrics
+from utils.query_monitor import init_query_monitor
+from utils.slow_query import init_slow_query_log
+from utils.server_timing import init_server_timing
+from utils.profiler import init_profiler
+from utils.memory import init_memory_monitor
+from utils.export import init_export
+from utils.change_feed import init_change_feed
+from utils.json_provider import init_json
+from utils.msgpack_format import init_msgpack
+from utils.compression import init_compression
+from utils.assets import init_assets
+from utils.cache import init_cache
+from utils.template_cache import init_template_cache
+from utils.serializers import Serializer
 
 app = Flask(__name__)
 
@@ -13,12 +29,87 @@ app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost/snacklore')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev')
+app.config['ADMIN_USERNAMES'] = [u.strip() for u in os.environ.get('ADMIN_USERNAMES', '').split(',') if u.strip()]
+
+# GET/HEAD requests run their reads in autocommit mode (no BEGIN/ROLLBACK)
+app.config['DB_READONLY_AUTOCOMMIT'] = os.environ.get('DB_READONLY_AUTOCOMMIT', '1') == '1'
+
+# Optional read replica; safe read-only requests are routed to it
+if os.environ.get('DATABASE_REPLICA_URL'):
+    app.config['SQLALCHEMY_BINDS'] = {'replica': os.environ['DATABASE_REPLICA_URL']}
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+app.config['REPLICA_MAX_LAG_SECONDS'] = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 2))
+
+# Metrics; METRICS_DIR enables aggregation across pre-forked workers
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+# Server-Timing header (db, orm, serialize, render, total) on every response
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '1') == '1'
+
+# Profiling: admins can send X-Profile; PROFILE_SAMPLE_RATE samples a fraction of all requests
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+if os.environ.get('PROFILE_DIR'):
+    app.config['PROFILE_DIR'] = os.environ['PROFILE_DIR']
+
+# Memory: MEMORY_PROFILING enables tracemalloc (per-request peaks, /api/admin/memory diffs)
+app.config['MEMORY_PROFILING'] = os.environ.get('MEMORY_PROFILING', '0') == '1'
+
+# Per-request SQL budget and N+1 detection ('log' or 'raise')
+app.config['QUERY_BUDGET'] = int(os.environ['QUERY_BUDGET']) if os.environ.get('QUERY_BUDGET') else None
+app.config['QUERY_BUDGET_MODE'] = os.environ.get('QUERY_BUDGET_MODE', 'log')
+app.config['QUERY_REPEAT_THRESHOLD'] = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
+app.config['QUERY_COUNT_HEADER'] = os.environ.get('QUERY_COUNT_HEADER') == '1'
+
+# Slow-query log; statements slower than SLOW_QUERY_MS are logged with a sampled EXPLAIN plan
+app.config['SLOW_QUERY_MS'] = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+app.config['SLOW_QUERY_EXPLAIN_RATE'] = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+if os.environ.get('SLOW_QUERY_LOG'):
+    app.config['SLOW_QUERY_LOG'] = os.environ['SLOW_QUERY_LOG']
+
+# JSON encoding: 'auto' uses orjson when installed, 'json' forces the standard library
+app.config['JSON_ENCODER'] = os.environ.get('JSON_ENCODER', 'auto')
+init_json(app)
+
+# MessagePack responses (Accept: application/msgpack) and request bodies on /api/
+app.config['MSGPACK'] = os.environ.get('MSGPACK', '1') == '1'
+init_msgpack(app)
+
+# gzip/brotli compression of HTML and JSON responses of at least COMPRESS_MIN_SIZE bytes
+app.config['COMPRESS'] = os.environ.get('COMPRESS', '1') == '1'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))
+app.config['COMPRESS_BROTLI_QUALITY'] = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+init_compression(app)
+
+# Fingerprinted static assets from build_static.py, served under /assets/
+if os.environ.get('ASSETS_DIR'):
+    app.config['ASSETS_DIR'] = os.environ['ASSETS_DIR']
+init_assets(app)
+
+# Per-worker cache for {% cache %} template fragments (recipe cards, comment threads)
+app.config['FRAGMENT_CACHE'] = os.environ.get('FRAGMENT_CACHE', '1') == '1'
+app.config['CACHE_DEFAULT_TTL'] = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+init_cache(app)
+
+# Jinja bytecode cache; compile_templates.py fills it at image build time
+app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('TEMPLATE_CACHE_DIR')
+init_template_cache(app)
 
 # Initialize database
 db.init_app(app)
+init_db_routing(app)
 
 # Register blueprints
 register_blueprints(app)
+init_profiler(app)
+init_metrics(app)
+init_memory_monitor(app)
+init_query_monitor(app)
+init_slow_query_log(app)
+init_server_timing(app)
+init_export(app)
+init_change_feed(app)
 
 # Context processor to inject current_user into all templates
 @app.context_processor
@@ -43,18 +134,28 @@ def index():
     # Get countries (limit to top 20 by name for now)
     countries = Country.query.order_by(Country.name.asc()).limit(20).all()
     
+    # Card scores in one query; they are part of each card's cache key
+    scores = Serializer().recipe_scores({r.id for r in featured_recipes + popular_recipes + recent_recipes})
+    
     return render_template('home.html', 
                          featured_recipes=featured_recipes,
                          popular_recipes=popular_recipes,
                          recent_recipes=recent_recipes,
-                         countries=countries)
+                         countries=countries,
+                         scores=scores)
 
 
 @app.route('/recipe/<int:recipe_id>')
 def recipe_detail(recipe_id):
     """Recipe detail page route."""
     recipe = Recipe.query.get_or_404(recipe_id)
-    return render_template('recipe_detail.html', recipe=recipe)
+    # The thread's size and newest edit key its cached fragment; comments are only loaded on a miss
+    comment_count, comments_updated = db.session.query(
+        db.func.count(Comment.id), db.func.max(Comment.updated_at)
+    ).filter(Comment.recipe_id == recipe_id).one()
+    comments = Comment.query.filter_by(recipe_id=recipe_id, parent_id=None).order_by(Comment.created_at.asc())
+    return render_template('recipe_detail.html', recipe=recipe, comments=comments,
+                           comment_count=comment_count, comments_updated=comments_updated)
 
 
 @app.route('/search')
@@ -98,6 +199,7 @@ def search_page():
     
     return render_template('search.html', 
                          recipes=items,
+                         scores=Serializer().recipe_scores({r.id for r in items}),
                          pagination={'page': page, 'pages': pages, 'has_prev': page > 1, 'has_next': page < pages, 'prev_num': page - 1, 'next_num': page + 1},
                          query=query_str,
                          countries=countries)
@@ -116,7 +218,8 @@ def user_profile_page(username):
         favorites = Favorite.query.filter_by(user_id=user.id).all()
         recipes = [f.recipe for f in favorites]
         
-    return render_template('user_profile.html', user=user, recipes=recipes, active_tab=tab)
+    scores = Serializer().recipe_scores({r.id for r in recipes if r is not None})
+    return render_template('user_profile.html', user=user, recipes=recipes, active_tab=tab, scores=scores)
 
 
 @app.route('/register', methods=['GET', 'POST'])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark results written by bench/run.py.
+
+Prints per-endpoint latency, throughput and query-count changes from BASE to
+NEW. With --fail-on-regression the exit status is 1 when any endpoint's p95
+got slower by more than --threshold percent or runs more queries per request.
+"""
+
+import argparse
+import json
+import sys
+
+
+def change(base, new):
+    if base is None or new is None:
+        return None
+    if base == 0:
+        return 0.0 if new == 0 else float('inf')
+    return (new - base) / base * 100
+
+
+def fmt_pair(base, new):
+    if base is None or new is None:
+        return f'{"-":>19}'
+    pct = change(base, new)
+    return f'{base:>7.1f} {new:>7.1f} {pct:>+4.0f}%'
+
+
+def compare(base, new, threshold):
+    """Print the comparison table and return the list of regressions."""
+    regressions = []
+    labels = sorted(set(base['endpoints']) | set(new['endpoints']))
+    print(f'base: {base["meta"].get("git_commit")} ({base["meta"]["timestamp"]}, c={base["meta"]["concurrency"]})')
+    print(f'new:  {new["meta"].get("git_commit")} ({new["meta"]["timestamp"]}, c={new["meta"]["concurrency"]})')
+    print()
+    print(f'{"endpoint":<38} {"p50 ms":>19} {"p95 ms":>19} {"p99 ms":>19} {"rps":>19} {"queries":>19}')
+    for label in labels + ['TOTAL']:
+        if label == 'TOTAL':
+            b, n = base['summary'], new['summary']
+        else:
+            b, n = base['endpoints'].get(label, {}), new['endpoints'].get(label, {})
+        print(f'{label:<38} ' + ' '.join(fmt_pair(b.get(key), n.get(key)) for key in
+                                         ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_mean')))
+        if label == 'TOTAL' or not b or not n:
+            continue
+        p95_change = change(b.get('p95_ms'), n.get('p95_ms'))
+        if p95_change is not None and p95_change > threshold:
+            regressions.append(f'{label}: p95 {b["p95_ms"]:.1f} -> {n["p95_ms"]:.1f} ms ({p95_change:+.0f}%)')
+        if n.get('queries_mean', 0) > b.get('queries_mean', 0):
+            regressions.append(f'{label}: queries per request {b.get("queries_mean")} -> {n.get("queries_mean")}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('base', help='Baseline results JSON')
+    parser.add_argument('new', help='New results JSON')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Allowed p95 slowdown in percent')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f'\nRegressions ({len(regressions)}):')
+        for regression in regressions:
+            print(f'  - {regression}')
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print('\nNo regressions.')
+
+
+if __name__ == "__main__":
+    main()
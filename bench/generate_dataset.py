@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic dataset at production-like scale for benchmarking.
+
+Creates users, recipes with steps and ingredients, nested comments, recipe and
+comment votes and favorites on top of the countries and states of the
+benchmark database. Popularity is Zipfian: a few recipes receive most
+comments, votes and favorites, and a few users write most comments.
+
+Rows are streamed into Postgres with COPY and explicit ids, so no ids are
+round-tripped. Secondary indexes are dropped for the load and rebuilt at the
+end, and the change log triggers are disabled during it (synthetic rows are
+not changes a feed client has to replay), all in one transaction. Scale
+factor 1 is roughly 2 million rows.
+All generated users share the password "password".
+"""
+
+import argparse
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from werkzeug.security import generate_password_hash
+
+import seed as bench_seed
+
+# Row counts at scale factor 1
+BASE_COUNTS = {
+    'users': 10_000,
+    'recipes': 50_000,
+    'comments': 250_000,
+    'recipe_votes': 500_000,
+    'comment_votes': 200_000,
+    'favorites': 100_000,
+}
+
+GENERATED_PASSWORD = 'password'
+HISTORY_DAYS = 3 * 365
+REPLY_RATE = 0.35
+
+ADJECTIVES = ['Spicy', 'Smoky', 'Crispy', 'Grandma\'s', 'Classic', 'Sweet', 'Tangy', 'Slow-cooked',
+              'Street-style', 'Festive', 'Rustic', 'Golden', 'Herbed', 'Fiery', 'Creamy', 'Stuffed']
+DISHES = ['Dumplings', 'Flatbread', 'Stew', 'Fritters', 'Noodles', 'Rice', 'Skewers', 'Pastries',
+          'Soup', 'Curry', 'Buns', 'Pancakes', 'Salad', 'Tamales', 'Empanadas', 'Porridge', 'Cakes']
+INGREDIENTS = ['flour', 'salt', 'sugar', 'butter', 'egg', 'onion', 'garlic', 'chili', 'rice', 'milk',
+               'tomato', 'potato', 'cumin', 'coriander', 'ginger', 'lime', 'yogurt', 'lentils', 'corn',
+               'pork', 'chicken', 'beef', 'cheese', 'cabbage', 'carrot', 'peppers', 'beans', 'honey']
+UNITS = ['g', 'kg', 'ml', 'l', 'tsp', 'tbsp', 'cup', 'pinch', None]
+WORDS = ['fold', 'simmer', 'knead', 'rest', 'season', 'fry', 'bake', 'steam', 'stir', 'chop', 'grill',
+         'until', 'golden', 'tender', 'fragrant', 'the', 'dough', 'sauce', 'gently', 'minutes', 'heat']
+COMMENT_PHRASES = ['Made this tonight, delicious!', 'My family loved it.', 'Too salty for me.',
+                   'Can I use a substitute?', 'This reminds me of home.', 'Added extra chili.',
+                   'Took longer than stated.', 'Perfect recipe, thank you!', 'What size pan?']
+
+LOAD_ORDER = ['users', 'recipes', 'recipe_steps', 'recipe_ingredients', 'comments',
+              'recipe_votes', 'comment_votes', 'favorites']
+
+
+class ZipfSampler:
+    """Samples ids with Zipfian popularity (rank r has weight 1 / r**s)."""
+
+    def __init__(self, ids, s, rng):
+        self.ids = list(ids)
+        if not self.ids:
+            raise ValueError('ZipfSampler needs at least one id')
+        rng.shuffle(self.ids)
+        self.cum_weights = list(accumulate(1.0 / rank ** s for rank in range(1, len(self.ids) + 1)))
+        self.total = self.cum_weights[-1]
+        self.rng = rng
+
+    def sample(self):
+        return self.ids[bisect(self.cum_weights, self.rng.random() * self.total)]
+
+
+class CopyStream:
+    """File-like object that feeds generated rows to COPY ... FROM STDIN."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ''
+        self.count = 0
+
+    def read(self, size=65536):
+        if size is None or size < 0:
+            size = sys.maxsize
+        parts = [self.buffer]
+        length = len(self.buffer)
+        for row in self.rows:
+            line = '\t'.join(_copy_value(value) for value in row) + '\n'
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+            if length >= size:
+                break
+        data = ''.join(parts)
+        self.buffer = data[size:]
+        return data[:size]
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(value)
+
+
+class DatasetGenerator:
+    """Generates rows for each table; ids continue after the existing ones."""
+
+    def __init__(self, counts, state_ids, start_ids, zipf_s, seed):
+        self.counts = counts
+        self.state_ids = state_ids
+        self.next_id = dict(start_ids)
+        self.zipf_s = zipf_s
+        self.rng = random.Random(seed)
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)  # naive UTC, like the models
+        self.start = self.now - timedelta(days=HISTORY_DAYS)
+        self.password_hash = generate_password_hash(GENERATED_PASSWORD)
+        self.user_ids = []
+        self.recipe_ids = []
+        self.recipe_created = {}
+        self.step_ids = []
+        self.comment_ids = []
+
+    def _ids(self, table, count):
+        first = self.next_id[table]
+        self.next_id[table] = first + count
+        return range(first, first + count)
+
+    def _timeline(self, index, count):
+        """Creation time that grows with the id, like real inserts."""
+        offset = HISTORY_DAYS * 86400 * (index + self.rng.random()) / count
+        return self.start + timedelta(seconds=int(offset))
+
+    def users(self):
+        count = self.counts['users']
+        for index, user_id in enumerate(self._ids('users', count)):
+            self.user_ids.append(user_id)
+            created = self._timeline(index, count)
+            yield (user_id, f'gen_{user_id}', f'gen_{user_id}@example.test', self.password_hash,
+                   None, None, created, created)
+
+    def recipes(self):
+        count = self.counts['recipes']
+        if not self.user_ids or not count:
+            return
+        # Prolific authors: a few users write most recipes
+        authors = ZipfSampler(self.user_ids, self.zipf_s, self.rng)
+        for index, recipe_id in enumerate(self._ids('recipes', count)):
+            self.recipe_ids.append(recipe_id)
+            created = self._timeline(index, count)
+            self.recipe_created[recipe_id] = created
+            title = f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(DISHES)}'
+            slug = f"{title.lower().replace(' ', '-').replace(chr(39), '')}-{recipe_id}"
+            description = ' '.join(self.rng.choices(WORDS, k=self.rng.randint(10, 40))).capitalize() + '.'
+            yield (recipe_id, title, slug, description, None, authors.sample(),
+                   self.rng.choice(self.state_ids), None, created, created)
+
+    def recipe_steps(self):
+        for recipe_id in self.recipe_ids:
+            steps = self.rng.randint(1, 8)
+            for step_id, number in zip(self._ids('recipe_steps', steps), range(1, steps + 1)):
+                self.step_ids.append(step_id)
+                instruction = ' '.join(self.rng.choices(WORDS, k=self.rng.randint(6, 25))).capitalize() + '.'
+                yield (step_id, recipe_id, number, instruction, None,
+                       self.rng.choice([None, 5, 10, 15, 30, 60]), self.recipe_created[recipe_id])
+
+    def recipe_ingredients(self):
+        for step_id in self.step_ids:
+            ingredients = self.rng.randint(0, 5)
+            for ingredient_id, order in zip(self._ids('recipe_ingredients', ingredients), range(ingredients)):
+                yield (ingredient_id, step_id, self.rng.choice(INGREDIENTS),
+                       round(self.rng.uniform(0.25, 500), 2), self.rng.choice(UNITS), None, order)
+        # Steps are no longer needed and can be millions of ids
+        self.step_ids = []
+
+    def comments(self):
+        if not self.recipe_ids or not self.counts['comments']:
+            return
+        recipes = ZipfSampler(self.recipe_ids, self.zipf_s, self.rng)
+        # Heavy commenters: comment authorship is skewed too
+        commenters = ZipfSampler(self.user_ids, self.zipf_s, self.rng)
+        threads = {}
+        for comment_id in self._ids('comments', self.counts['comments']):
+            recipe_id = recipes.sample()
+            thread = threads.setdefault(recipe_id, [])
+            parent_id = self.rng.choice(thread) if thread and self.rng.random() < REPLY_RATE else None
+            if len(thread) < 50:
+                thread.append(comment_id)
+            self.comment_ids.append(comment_id)
+            created = self.recipe_created[recipe_id] + timedelta(seconds=int(self.rng.expovariate(1 / 864000)))
+            created = min(created, self.now)
+            yield (comment_id, recipe_id, commenters.sample(), parent_id,
+                   self.rng.choice(COMMENT_PHRASES), False, created, created)
+
+    def _votes(self, table, targets, count):
+        """Unique (user, target) votes; targets are sampled by popularity."""
+        if not targets or not count:
+            # e.g. comment votes with --comments 0
+            return
+        sampler = ZipfSampler(targets, self.zipf_s, self.rng)
+        seen = set()
+        max_target = max(targets) + 1
+        ids = iter(self._ids(table, count))
+        attempts = 0
+        while len(seen) < count and attempts < count * 5:
+            attempts += 1
+            user_id = self.rng.choice(self.user_ids)
+            target_id = sampler.sample()
+            key = user_id * max_target + target_id
+            if key in seen:
+                continue
+            seen.add(key)
+            created = self.start + timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))
+            vote = 'upvote' if self.rng.random() < 0.8 else 'downvote'
+            yield (next(ids), user_id, target_id, vote, created, created)
+
+    def recipe_votes(self):
+        return self._votes('recipe_votes', self.recipe_ids, self.counts['recipe_votes'])
+
+    def comment_votes(self):
+        return self._votes('comment_votes', self.comment_ids, self.counts['comment_votes'])
+
+    def favorites(self):
+        count = self.counts['favorites']
+        if not self.user_ids or not count:
+            return
+        targets = {kind: ZipfSampler(ids, self.zipf_s, self.rng)
+                   for kind, ids in [('recipe', self.recipe_ids), ('user', self.user_ids), ('state', self.state_ids)]
+                   if ids}
+        kinds, weights = zip(*[(kind, weight) for kind, weight in [('recipe', 80), ('user', 12), ('state', 8)]
+                               if kind in targets])
+        seen = set()
+        ids = iter(self._ids('favorites', count))
+        attempts = 0
+        while len(seen) < count and attempts < count * 5:
+            attempts += 1
+            kind = self.rng.choices(kinds, weights)[0]
+            key = (self.rng.choice(self.user_ids), kind, targets[kind].sample())
+            if key in seen:
+                continue
+            seen.add(key)
+            created = self.start + timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))
+            yield (next(ids),) + key + (created,)
+
+
+COLUMNS = {
+    'users': 'id, username, email, password_hash, bio, country, created_at, updated_at',
+    'recipes': 'id, title, slug, description, instructions, author_id, state_id, image_url, created_at, updated_at',
+    'recipe_steps': 'id, recipe_id, step_number, instruction, image_url, duration_minutes, created_at',
+    'recipe_ingredients': 'id, step_id, name, quantity, unit, notes, "order"',
+    'comments': 'id, recipe_id, user_id, parent_id, content, is_edited, created_at, updated_at',
+    'recipe_votes': 'id, user_id, recipe_id, vote_type, created_at, updated_at',
+    'comment_votes': 'id, user_id, comment_id, vote_type, created_at, updated_at',
+    'favorites': 'id, user_id, favorite_type, favorite_id, created_at',
+}
+
+
+def drop_secondary_indexes(cursor):
+    """Drop non-constraint indexes of the loaded tables; returns their definitions."""
+    cursor.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = ANY(%s)
+          AND t.relnamespace = 'public'::regnamespace
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """, (LOAD_ORDER,))
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {name}')
+    return [definition for _, definition in indexes]
+
+
+def load(conn, generator, keep_indexes=False):
+    """COPY every table in dependency order within one transaction."""
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    indexes = [] if keep_indexes else drop_secondary_indexes(cursor)
+    if indexes:
+        print(f"Dropped {len(indexes)} secondary indexes for the load")
+    # Only user triggers (the change log's); foreign key checks stay on
+    for table in LOAD_ORDER:
+        cursor.execute(f'ALTER TABLE {table} DISABLE TRIGGER USER')
+
+    for table in LOAD_ORDER:
+        table_started = time.perf_counter()
+        stream = CopyStream(getattr(generator, table)())
+        cursor.copy_expert(f'COPY {table} ({COLUMNS[table]}) FROM STDIN', stream, size=262144)
+        elapsed = time.perf_counter() - table_started
+        print(f"✓ {table:<20} {stream.count:>10,} rows in {elapsed:6.1f}s ({stream.count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    if indexes:
+        index_started = time.perf_counter()
+        for definition in indexes:
+            cursor.execute(definition)
+        print(f"✓ Rebuilt {len(indexes)} indexes in {time.perf_counter() - index_started:.1f}s")
+
+    for table in LOAD_ORDER:
+        cursor.execute(f'ALTER TABLE {table} ENABLE TRIGGER USER')
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                       f"COALESCE((SELECT MAX(id) FROM {table}), 1))")
+    conn.commit()
+
+    # ANALYZE so the planner sees the new table sizes right away
+    conn.autocommit = True
+    cursor.execute('ANALYZE ' + ', '.join(LOAD_ORDER))
+    print(f"✓ Loaded and analyzed in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic benchmark dataset.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Scale factor (1 = about 2M rows)')
+    for table, count in BASE_COUNTS.items():
+        parser.add_argument(f'--{table.replace("_", "-")}', type=int, dest=table,
+                            help=f'Number of {table.replace("_", " ")} ({count:,} x scale)')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent of popularity skew')
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--base', action='store_true', help='Seed schema, countries, states and system recipes first')
+    parser.add_argument('--keep-indexes', action='store_true', help='Load with all indexes in place')
+    args = parser.parse_args()
+
+    counts = {table: getattr(args, table) if getattr(args, table) is not None else int(count * args.scale)
+              for table, count in BASE_COUNTS.items()}
+    negative = [table for table, count in counts.items() if count < 0]
+    if negative:
+        parser.error(f"Counts cannot be negative: {', '.join(negative)}")
+    if counts['users'] < 1 or counts['recipes'] < 1:
+        parser.error('At least one user and one recipe are required')
+    if counts['comment_votes'] and not counts['comments']:
+        print("Note: no comments are generated, so no comment votes are either")
+
+    if args.base:
+        bench_seed.seed()
+
+    conn = bench_seed.seed_data.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM country_states ORDER BY id")
+        state_ids = [row[0] for row in cursor.fetchall()]
+        if not state_ids:
+            print("Error: no states found; run with --base or bench/seed.py first")
+            sys.exit(1)
+
+        start_ids = {}
+        for table in LOAD_ORDER:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+            start_ids[table] = cursor.fetchone()[0]
+        conn.commit()
+
+        print(f"Generating dataset into {bench_seed.seed_data.DB_NAME}: " +
+              ', '.join(f'{table}={count:,}' for table, count in counts.items()))
+        generator = DatasetGenerator(counts, state_ids, start_ids, args.zipf, args.random_seed)
+        load(conn, generator, keep_indexes=args.keep_indexes)
+    except Exception as e:
+        conn.rollback()
+        print(f"\n✗ Error generating dataset: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
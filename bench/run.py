@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark with a mixed browse/search/detail/vote/comment/create workload.
+
+By default the benchmark database is seeded (bench/seed.py), the app is started
+with bench/server.py and driven by --concurrency virtual users for --duration
+seconds after a --warmup period. Pass --url to benchmark an already running
+server instead (it needs QUERY_COUNT_HEADER=1 for query counts).
+
+Per-endpoint p50/p95/p99 latency, throughput and queries per request are
+printed and written as JSON to bench/results/; compare two runs with
+bench/compare.py.
+"""
+
+import argparse
+import http.client
+import json
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / 'bench' / 'results'
+
+# Scenario weights; each scenario is a short sequence of requests
+MIXES = {
+    'default': {'browse': 30, 'search': 20, 'detail': 35, 'vote': 8, 'comment': 5, 'create': 2},
+    'read': {'browse': 40, 'search': 20, 'detail': 40},
+    'write': {'detail': 40, 'vote': 30, 'comment': 20, 'create': 10},
+}
+
+BENCH_PASSWORD = 'bench-password'
+
+# Recipes discovered for detail/vote/comment traffic (100 per page); enough
+# for realistic skew without paging through a generated dataset at startup
+CATALOG_PAGES = 20
+
+
+class Client:
+    """A keep-alive HTTP connection that carries one session cookie."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        """Send a request; returns (status, body bytes, seconds, query count or None)."""
+        headers = {'Accept': 'application/json' if path.startswith('/api/') else 'text/html'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=data, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            raise
+        elapsed = time.perf_counter() - start
+
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        queries = response.getheader('X-Query-Count')
+        return response.status, payload, elapsed, int(queries) if queries else None
+
+    def json(self, method, path, body=None):
+        status, payload, _, _ = self.request(method, path, body)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} returned {status}: {payload[:200]!r}")
+        return json.loads(payload)
+
+    def close(self):
+        self.conn.close()
+
+
+class Catalog:
+    """Recipe ids, state ids and search terms discovered from the API."""
+
+    def __init__(self, client):
+        self.state_ids = [state['id'] for state in client.json('GET', '/api/states')]
+        self.recipe_ids = []
+        titles = []
+        page, pages, total = 1, 1, 0
+        while page <= min(pages, CATALOG_PAGES):
+            data = client.json('GET', f'/api/recipes?per_page=100&page={page}')
+            self.recipe_ids += [recipe['id'] for recipe in data['items']]
+            titles += [recipe['title'] for recipe in data['items']]
+            pages, total = data['pages'], data['total']
+            page += 1
+        if not self.recipe_ids or not self.state_ids:
+            raise RuntimeError("The benchmark database has no recipes or states; run bench/seed.py")
+
+        words = Counter(w for title in titles for w in re.findall(r'[a-z]{4,}', title.lower()))
+        self.search_terms = [w for w, _ in words.most_common(50)] or ['rice']
+        self.total = total
+        self.list_pages = max(1, total // 20)
+
+        # Popularity follows a power law: a few recipes get most of the traffic
+        order = list(self.recipe_ids)
+        random.Random(0).shuffle(order)
+        self.hot_order = order
+        self.hot_weights = []
+        total = 0.0
+        for rank in range(len(order)):
+            total += 1.0 / (rank + 1)
+            self.hot_weights.append(total)
+
+    def recipe_id(self, rng):
+        return rng.choices(self.hot_order, cum_weights=self.hot_weights)[0]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+        self.statuses = Counter()
+
+
+class VirtualUser(threading.Thread):
+    """Runs randomly chosen scenarios as one logged-in user."""
+
+    def __init__(self, index, base_url, catalog, mix, seed):
+        super().__init__(daemon=True)
+        self.index = index
+        self.client = Client(base_url)
+        self.catalog = catalog
+        self.rng = random.Random(seed + index)
+        self.scenarios = list(mix)
+        self.weights = [mix[name] for name in self.scenarios]
+        # Set when the run starts; nothing is recorded before then
+        self.measure_start = self.measure_end = float('inf')
+        self.stats = {}
+
+    def login(self, run_id):
+        username = f'bench_{run_id}_{self.index}'
+        self.client.json('POST', '/api/register', {
+            'username': username,
+            'email': f'{username}@bench.snacklore.test',
+            'password': BENCH_PASSWORD,
+        })
+        self.client.json('POST', '/api/login', {'username': username, 'password': BENCH_PASSWORD})
+
+    def call(self, label, method, path, body=None):
+        start = time.time()
+        stats = self.stats.setdefault(label, EndpointStats()) if start >= self.measure_start else None
+        try:
+            status, _, elapsed, queries = self.client.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            if stats is not None:
+                stats.statuses['error'] += 1
+            return
+        if stats is not None and start < self.measure_end:
+            stats.latencies.append(elapsed)
+            stats.statuses[str(status)] += 1
+            if queries is not None:
+                stats.queries.append(queries)
+
+    def browse(self):
+        self.call('GET /', 'GET', '/')
+        query = {'page': self.rng.randint(1, self.catalog.list_pages),
+                 'sort': self.rng.choice(['newest', 'popular', 'alphabetical'])}
+        self.call('GET /api/recipes', 'GET', f'/api/recipes?{urlencode(query)}')
+
+    def search(self):
+        term = self.rng.choice(self.catalog.search_terms)
+        if self.rng.random() < 0.5:
+            self.call('GET /search', 'GET', f'/search?{urlencode({"q": term})}')
+        else:
+            self.call('GET /api/search', 'GET', f'/api/search?{urlencode({"q": term})}')
+
+    def detail(self):
+        recipe_id = self.catalog.recipe_id(self.rng)
+        if self.rng.random() < 0.5:
+            self.call('GET /recipe/<id>', 'GET', f'/recipe/{recipe_id}')
+        else:
+            self.call('GET /api/recipes/<id>', 'GET', f'/api/recipes/{recipe_id}')
+        self.call('GET /api/recipes/<id>/comments', 'GET', f'/api/recipes/{recipe_id}/comments')
+
+    def vote(self):
+        recipe_id = self.catalog.recipe_id(self.rng)
+        action = self.rng.choice(['upvote', 'upvote', 'downvote'])
+        self.call(f'POST /api/recipes/<id>/{action}', 'POST', f'/api/recipes/{recipe_id}/{action}')
+
+    def comment(self):
+        recipe_id = self.catalog.recipe_id(self.rng)
+        self.call('POST /api/recipes/<id>/comments', 'POST', f'/api/recipes/{recipe_id}/comments',
+                  {'content': f'Benchmark comment {uuid.uuid4().hex[:8]}'})
+
+    def create(self):
+        self.call('POST /api/recipes', 'POST', '/api/recipes', {
+            'title': f'Benchmark recipe {uuid.uuid4().hex[:8]}',
+            'state_id': self.rng.choice(self.catalog.state_ids),
+            'description': 'Created by the load benchmark.',
+            'steps': [
+                {'step_number': n, 'instruction': f'Step {n}.',
+                 'ingredients': [{'name': 'salt', 'quantity': 1, 'unit': 'tsp'}]}
+                for n in range(1, 4)
+            ],
+        })
+
+    def run(self):
+        try:
+            while time.time() < self.measure_end:
+                getattr(self, self.rng.choices(self.scenarios, self.weights)[0])()
+        finally:
+            self.client.close()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, queries, statuses, duration):
+    latencies = sorted(latencies)
+    errors = sum(n for status, n in statuses.items() if status == 'error' or int(status) >= 500)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / duration, 2),
+        'statuses': dict(statuses),
+    }
+    if latencies:
+        summary.update({
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3),
+        })
+    if queries:
+        summary['queries_mean'] = round(sum(queries) / len(queries), 2)
+        summary['queries_max'] = max(queries)
+    return summary
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def start_server(port):
+    """Start bench/server.py and wait until it answers."""
+    process = subprocess.Popen([sys.executable, str(ROOT / 'bench' / 'server.py'), '--port', str(port)])
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Benchmark server exited during startup")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/states')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Benchmark server did not start within 30 seconds")
+
+
+def run_benchmark(base_url, concurrency, duration, warmup, mix_name, seed):
+    setup_client = Client(base_url)
+    catalog = Catalog(setup_client)
+    setup_client.close()
+
+    run_id = uuid.uuid4().hex[:8]
+    users = [VirtualUser(i, base_url, catalog, MIXES[mix_name], seed) for i in range(concurrency)]
+    for user in users:
+        user.login(run_id)
+
+    measure_start = time.time() + warmup
+    for user in users:
+        user.measure_start = measure_start
+        user.measure_end = measure_start + duration
+        user.start()
+    for user in users:
+        user.join()
+
+    endpoints = {}
+    for user in users:
+        for label, stats in user.stats.items():
+            merged = endpoints.setdefault(label, EndpointStats())
+            merged.latencies += stats.latencies
+            merged.queries += stats.queries
+            merged.statuses.update(stats.statuses)
+
+    commit, dirty = git_revision()
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': commit,
+            'git_dirty': dirty,
+            'url': base_url,
+            'concurrency': concurrency,
+            'duration': duration,
+            'warmup': warmup,
+            'mix': mix_name,
+            'seed': seed,
+            'recipes': catalog.total,
+            'python': platform.python_version(),
+        },
+        'summary': summarize(
+            [t for s in endpoints.values() for t in s.latencies],
+            [q for s in endpoints.values() for q in s.queries],
+            sum((s.statuses for s in endpoints.values()), Counter()),
+            duration,
+        ),
+        'endpoints': {label: summarize(s.latencies, s.queries, s.statuses, duration)
+                      for label, s in sorted(endpoints.items())},
+    }
+
+
+def print_report(results):
+    def fmt(value):
+        return '-' if value is None else f'{value:.1f}'
+
+    print(f'{"endpoint":<38} {"reqs":>7} {"rps":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"errors":>6}')
+    rows = list(results['endpoints'].items()) + [('TOTAL', results['summary'])]
+    for label, s in rows:
+        print(f'{label:<38} {s["requests"]:>7} {s["throughput_rps"]:>8.1f} {fmt(s.get("p50_ms")):>8} '
+              f'{fmt(s.get("p95_ms")):>8} {fmt(s.get("p99_ms")):>8} {fmt(s.get("queries_mean")):>8} {s["errors"]:>6}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the HTTP load benchmark.')
+    parser.add_argument('--url', help='Benchmark a running server instead of starting one')
+    parser.add_argument('--port', type=int, default=5050, help='Port for the benchmark server')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before measuring')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='default')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the workload')
+    parser.add_argument('--no-seed-db', action='store_true', help='Skip seeding the benchmark database')
+    parser.add_argument('--output', help='Results file (default bench/results/<time>-<commit>.json)')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        if not args.no_seed_db:
+            from seed import seed
+            seed()
+        server = start_server(args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        results = run_benchmark(base_url, args.concurrency, args.duration, args.warmup, args.mix, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_report(results)
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f'{datetime.now():%Y%m%d-%H%M%S}-{(results["meta"]["git_commit"] or "unknown")[:8]}.json')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f'\nResults written to {output}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Prepare the benchmark database: schema, countries, states and system recipes.
+
+Base data comes from the boot seed scripts, so benchmarks run against the same
+data as a fresh deployment. Connection settings are the POSTGRES_* variables
+used by those scripts; POSTGRES_DB defaults to snacklore_bench.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault('POSTGRES_DB', 'snacklore_bench')
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'boot'))
+
+import psycopg2  # noqa: E402
+import seed_data  # noqa: E402
+import seed_recipes  # noqa: E402
+
+SCHEMA_FILE = ROOT / 'boot' / 'init_db.sql'
+
+
+def database_url():
+    """Return the SQLAlchemy URL of the benchmark database."""
+    password = f":{seed_data.DB_PASSWORD}" if seed_data.DB_PASSWORD else ''
+    return f"postgresql://{seed_data.DB_USER}{password}@{seed_data.DB_HOST}/{seed_data.DB_NAME}"
+
+
+def create_database():
+    """Create the benchmark database if it does not exist."""
+    conn = psycopg2.connect(
+        dbname='postgres',
+        user=seed_data.DB_USER,
+        host=seed_data.DB_HOST,
+        password=seed_data.DB_PASSWORD or None
+    )
+    conn.autocommit = True
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (seed_data.DB_NAME,))
+        if not cursor.fetchone():
+            cursor.execute(f'CREATE DATABASE "{seed_data.DB_NAME}"')
+            print(f"✓ Created database {seed_data.DB_NAME}")
+    finally:
+        conn.close()
+
+
+def apply_schema(conn):
+    """Create tables and indexes from boot/init_db.sql."""
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA_FILE.read_text(encoding='utf-8'))
+    conn.commit()
+    print("✓ Applied schema")
+
+
+def seed():
+    """Create, migrate and seed the benchmark database."""
+    create_database()
+    conn = seed_data.get_db_connection()
+    try:
+        apply_schema(conn)
+        countries_data = seed_data.load_countries_data()
+        seed_data.sync_countries(conn, countries_data)
+        seed_recipes.seed_recipes(conn, seed_recipes.load_recipes_data())
+    finally:
+        conn.close()
+
+
+def main():
+    """Main function to seed the benchmark database."""
+    print("=" * 60)
+    print(f"Seeding benchmark database {seed_data.DB_NAME}")
+    print("=" * 60)
+    seed()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the model serializers and the fast path in utils/serializers.py.
+
+Loads a small synthetic dataset (bench/generate_dataset.py) into a throwaway
+SQLite database and reports microseconds per object for:
+
+- serialize: converting already loaded data (ORM objects with their
+  relationships in the identity map vs. row tuples through a FieldPlan)
+- list: a full page as the API builds it, including loading and vote counts,
+  with the number of SQL statements
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DB_FILE = os.path.join(tempfile.gettempdir(), 'snacklore_serializer_bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import app  # noqa: E402
+from db import db  # noqa: E402
+from models import User, Recipe, Comment, Country, CountryState  # noqa: E402
+from utils.query_monitor import count_queries  # noqa: E402
+from utils.serializers import (  # noqa: E402
+    RECIPE_PLAN, COMMENT_PLAN, STATE_PLAN, COUNTRY_PLAN, USER_PUBLIC_PLAN, Serializer,
+)
+import generate_dataset  # noqa: E402
+
+
+def load_dataset(recipes):
+    """Create the SQLite schema and fill it with generated rows."""
+    db.drop_all()
+    db.create_all()
+    countries = [{'id': i, 'name': f'Country {i}', 'continent': 'Europe', 'lat': 10.5, 'lng': -3.25}
+                 for i in range(1, 51)]
+    states = [{'id': i, 'country_id': (i - 1) // 4 + 1, 'name': f'State {i}'} for i in range(1, 201)]
+    db.session.execute(Country.__table__.insert(), countries)
+    db.session.execute(CountryState.__table__.insert(), states)
+
+    counts = {table: max(1, count * recipes // generate_dataset.BASE_COUNTS['recipes'])
+              for table, count in generate_dataset.BASE_COUNTS.items()}
+    generator = generate_dataset.DatasetGenerator(counts, [s['id'] for s in states],
+                                                  {table: 1 for table in generate_dataset.LOAD_ORDER}, 1.1, 42)
+    for table in generate_dataset.LOAD_ORDER:
+        columns = [c.strip().strip('"') for c in generate_dataset.COLUMNS[table].split(',')]
+        rows = [dict(zip(columns, row)) for row in getattr(generator, table)()]
+        if rows:
+            db.session.execute(db.metadata.tables[table].insert(), rows)
+    db.session.commit()
+
+
+def measure(fn, repeat):
+    """Best time of repeat runs, returned with the last result."""
+    best = None
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(name, baseline, fast, objects, queries=None):
+    base_us, fast_us = baseline / objects * 1e6, fast / objects * 1e6
+    line = f'{name:<30} {objects:>6} {base_us:>12.1f} {fast_us:>12.1f} {base_us / fast_us:>8.1f}x'
+    if queries:
+        line += f'  {queries[0]:>5} -> {queries[1]}'
+    print(line)
+
+
+def bench_serialize(repeat):
+    """Pure conversion of data that is already loaded."""
+    recipes = Recipe.query.limit(500).all()
+    comments = Comment.query.limit(500).all()
+    states = CountryState.query.all()
+    users = User.query.limit(500).all()
+    # Load relationships into the identity map so to_dict runs no SQL
+    for recipe in recipes:
+        recipe.author, recipe.state.country
+    for comment in comments:
+        comment.user
+    for state in states:
+        state.country
+
+    serializer = Serializer()
+    recipe_rows = RECIPE_PLAN.select(Recipe.query.limit(500)).all()
+    comment_rows = COMMENT_PLAN.select(Comment.query.limit(500)).all()
+    state_rows = STATE_PLAN.select(CountryState.query).all()
+    user_rows = USER_PUBLIC_PLAN.select(User.query.limit(500)).all()
+    nested = {}
+    for plan, rows in ((RECIPE_PLAN, recipe_rows), (COMMENT_PLAN, comment_rows), (STATE_PLAN, state_rows)):
+        nested.update(serializer._resolve(plan, rows))
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    cases = [
+        ('Recipe.to_dict', recipes, lambda: [r.to_dict(include_steps=False) for r in recipes],
+         lambda: [RECIPE_PLAN.build(row, nested) for row in recipe_rows]),
+        ('Comment.to_dict', comments, lambda: [c.to_dict(include_replies=False) for c in comments],
+         lambda: [COMMENT_PLAN.build(row, nested) for row in comment_rows]),
+        ('CountryState.to_dict', states, lambda: [s.to_dict() for s in states],
+         lambda: [STATE_PLAN.build(row, nested) for row in state_rows]),
+        ('User.to_public_dict', users, lambda: [u.to_public_dict() for u in users],
+         lambda: [USER_PUBLIC_PLAN.build(row, nested) for row in user_rows]),
+    ]
+    for name, objects, baseline, fast in cases:
+        report(name, best(baseline), best(fast), len(objects))
+
+
+def bench_lists(repeat, per_page):
+    """A page as the API builds it: load, serialize and count votes."""
+    user_id = User.query.first().id
+    recipe_query = Recipe.query.order_by(Recipe.created_at.desc()).limit(per_page)
+    busiest = Comment.query.with_entities(Comment.recipe_id).group_by(Comment.recipe_id).order_by(
+        db.func.count().desc()).first()[0]
+    comment_query = Comment.query.filter_by(recipe_id=busiest, parent_id=None).order_by(Comment.created_at).limit(per_page)
+
+    cases = [
+        ('GET /api/recipes', lambda: [r.to_dict(include_steps=False, include_votes=True, user_id=user_id)
+                                      for r in recipe_query.all()],
+         lambda: Serializer(user_id).recipes(RECIPE_PLAN.select(recipe_query).all())),
+        ('GET /api/states', lambda: [s.to_dict() for s in CountryState.query.order_by(CountryState.name).all()],
+         lambda: Serializer().states(STATE_PLAN.select(CountryState.query.order_by(CountryState.name)).all())),
+        ('GET /api/recipes/<id>/comments', lambda: [c.to_dict(include_replies=True, include_votes=True, user_id=user_id)
+                                                    for c in comment_query.all()],
+         lambda: Serializer(user_id).comments(COMMENT_PLAN.select(comment_query).all())),
+        ('GET /api/home countries', lambda: [c.to_dict() for c in Country.query.order_by(Country.name).limit(20).all()],
+         lambda: Serializer().countries(COUNTRY_PLAN.select(Country.query.order_by(Country.name).limit(20)).all())),
+    ]
+    for name, baseline, fast in cases:
+        db.session.remove()
+        with count_queries() as base_queries:
+            baseline_time, base_result = measure(baseline, repeat)
+        db.session.remove()
+        with count_queries() as fast_queries:
+            fast_time, fast_result = measure(fast, repeat)
+        if base_result != fast_result:
+            print(f'{name}: fast path output differs from to_dict')
+        report(name, baseline_time, fast_time, max(1, len(base_result)),
+               (base_queries.count // repeat, fast_queries.count // repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark model serializers against the fast path.')
+    parser.add_argument('--recipes', type=int, default=2000, help='Recipes in the generated dataset')
+    parser.add_argument('--per-page', type=int, default=50, help='Page size for list benchmarks')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case (best is reported)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f'Loading dataset ({args.recipes} recipes) into {DB_FILE}...')
+        load_dataset(args.recipes)
+        print()
+        print(f'{"serialize (loaded data)":<30} {"objects":>6} {"to_dict us":>12} {"plan us":>12} {"speedup":>9}')
+        bench_serialize(args.repeat)
+        print()
+        print(f'{"list (load + serialize)":<30} {"objects":>6} {"to_dict us":>12} {"fast us":>12} {"speedup":>9}  queries')
+        bench_lists(args.repeat, args.per_page)
+    os.remove(DB_FILE)
+
+
+if __name__ == "__main__":
+    main()
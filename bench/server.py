@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Serve the app against the benchmark database with a threaded WSGI server.
+
+X-Query-Count headers are enabled so the load generator can report
+queries per request.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'bench'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    args = parser.parse_args()
+
+    from seed import database_url
+    os.environ.setdefault('DATABASE_URL', database_url())
+    os.environ.setdefault('QUERY_COUNT_HEADER', '1')
+
+    from werkzeug.serving import make_server
+    from app import app
+
+    # Per-request access logging would dominate the measurements
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -74,6 +74,7 @@ CREATE INDEX IF NOT EXISTS idx_recipes_author_id ON recipes(author_id);
 CREATE INDEX IF NOT EXISTS idx_recipes_state_id ON recipes(state_id);
 CREATE INDEX IF NOT EXISTS idx_recipes_created_at ON recipes(created_at);
 CREATE INDEX IF NOT EXISTS idx_recipes_slug ON recipes(slug);
+CREATE INDEX IF NOT EXISTS idx_recipes_state_created_at ON recipes(state_id, created_at);
 
 -- Full-text search index on title
 CREATE INDEX IF NOT EXISTS idx_recipes_title_fts ON recipes USING gin(to_tsvector('english', title));
@@ -139,6 +140,7 @@ CREATE INDEX IF NOT EXISTS idx_comments_recipe_id ON comments(recipe_id);
 CREATE INDEX IF NOT EXISTS idx_comments_user_id ON comments(user_id);
 CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments(parent_id);
 CREATE INDEX IF NOT EXISTS idx_comments_created_at ON comments(created_at);
+CREATE INDEX IF NOT EXISTS idx_comments_recipe_created_at ON comments(recipe_id, created_at);
 
 -- ============================================================================
 -- 8. FAVORITES TABLE
@@ -200,6 +202,117 @@ CREATE INDEX IF NOT EXISTS idx_comment_votes_user_id ON comment_votes(user_id);
 CREATE INDEX IF NOT EXISTS idx_comment_votes_comment_id ON comment_votes(comment_id);
 CREATE INDEX IF NOT EXISTS idx_comment_votes_type ON comment_votes(vote_type);
 
+-- ============================================================================
+-- 11. CHANGE_LOG TABLE
+-- ============================================================================
+-- Written by the triggers of section 12 for every change to recipes, comments
+-- and votes; GET /api/changes pages through it by (txid, id)
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGSERIAL PRIMARY KEY,
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    operation VARCHAR(10) NOT NULL CHECK (operation IN ('create', 'update', 'delete')),
+    changed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    txid BIGINT NOT NULL DEFAULT 0
+);
+
+-- Databases created before entries carried their transaction id
+ALTER TABLE change_log ADD COLUMN IF NOT EXISTS txid BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_change_log_txid_id ON change_log(txid, id);
+
+-- ============================================================================
+-- 12. CHANGE_LOG TRIGGERS
+-- ============================================================================
+-- Statement-level triggers log every insert, update and delete of recipes,
+-- comments and votes, whichever path wrote them (ORM, COPY, bulk statements,
+-- cascades), stamped with the writing transaction's id. Changes to a recipe's
+-- steps are logged as an update of the recipe. db.create_all() runs this
+-- section as it is (utils/change_feed.py), so it must stay idempotent and
+-- end at the END OF TABLE CREATION banner.
+CREATE OR REPLACE FUNCTION log_entity_change() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    parent TEXT := CASE WHEN TG_NARGS > 1 THEN 'r.' || quote_ident(TG_ARGV[1]) ELSE 'NULL' END;
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        EXECUTE 'INSERT INTO change_log (entity_type, entity_id, parent_id, operation, changed_at, txid) '
+                'SELECT $1, r.id, ' || parent || ', ''update'', $2, $3 FROM new_rows r JOIN old_rows o ON o.id = r.id '
+                'WHERE r IS DISTINCT FROM o ORDER BY r.id'
+            USING TG_ARGV[0], statement_timestamp() AT TIME ZONE 'UTC', pg_current_xact_id()::text::bigint;
+    ELSE
+        EXECUTE 'INSERT INTO change_log (entity_type, entity_id, parent_id, operation, changed_at, txid) '
+                'SELECT $1, r.id, ' || parent || ', $4, $2, $3 FROM '
+                || CASE TG_OP WHEN 'INSERT' THEN 'new_rows' ELSE 'old_rows' END || ' r ORDER BY r.id'
+            USING TG_ARGV[0], statement_timestamp() AT TIME ZONE 'UTC', pg_current_xact_id()::text::bigint,
+                  CASE TG_OP WHEN 'INSERT' THEN 'create' ELSE 'delete' END;
+    END IF;
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION log_recipe_part_change() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    recipe_id TEXT := quote_ident(TG_ARGV[0]);
+    recipe_ids TEXT := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT ' || recipe_id || ' FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT ' || recipe_id || ' FROM old_rows'
+        ELSE 'SELECT ' || recipe_id || ' FROM new_rows UNION SELECT ' || recipe_id || ' FROM old_rows' END;
+BEGIN
+    -- Recipes deleted or already logged in this transaction need no update entry
+    EXECUTE 'INSERT INTO change_log (entity_type, entity_id, parent_id, operation, changed_at, txid) '
+            'SELECT ''recipe'', r.id, NULL, ''update'', $1, $2 FROM recipes r '
+            'WHERE r.id IN (' || recipe_ids || ') AND NOT EXISTS (SELECT 1 FROM change_log c '
+            'WHERE c.txid = $2 AND c.entity_type = ''recipe'' AND c.entity_id = r.id) ORDER BY r.id'
+        USING statement_timestamp() AT TIME ZONE 'UTC', pg_current_xact_id()::text::bigint;
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE TRIGGER change_log_insert
+    AFTER INSERT ON recipes REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('recipe');
+CREATE OR REPLACE TRIGGER change_log_update
+    AFTER UPDATE ON recipes REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('recipe');
+CREATE OR REPLACE TRIGGER change_log_delete
+    AFTER DELETE ON recipes REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('recipe');
+CREATE OR REPLACE TRIGGER change_log_insert
+    AFTER INSERT ON comments REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('comment', 'recipe_id');
+CREATE OR REPLACE TRIGGER change_log_update
+    AFTER UPDATE ON comments REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('comment', 'recipe_id');
+CREATE OR REPLACE TRIGGER change_log_delete
+    AFTER DELETE ON comments REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('comment', 'recipe_id');
+CREATE OR REPLACE TRIGGER change_log_insert
+    AFTER INSERT ON recipe_votes REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('recipe_vote', 'recipe_id');
+CREATE OR REPLACE TRIGGER change_log_update
+    AFTER UPDATE ON recipe_votes REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('recipe_vote', 'recipe_id');
+CREATE OR REPLACE TRIGGER change_log_delete
+    AFTER DELETE ON recipe_votes REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('recipe_vote', 'recipe_id');
+CREATE OR REPLACE TRIGGER change_log_insert
+    AFTER INSERT ON comment_votes REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('comment_vote', 'comment_id');
+CREATE OR REPLACE TRIGGER change_log_update
+    AFTER UPDATE ON comment_votes REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('comment_vote', 'comment_id');
+CREATE OR REPLACE TRIGGER change_log_delete
+    AFTER DELETE ON comment_votes REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_entity_change('comment_vote', 'comment_id');
+CREATE OR REPLACE TRIGGER change_log_insert
+    AFTER INSERT ON recipe_steps REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_recipe_part_change('recipe_id');
+CREATE OR REPLACE TRIGGER change_log_update
+    AFTER UPDATE ON recipe_steps REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_recipe_part_change('recipe_id');
+CREATE OR REPLACE TRIGGER change_log_delete
+    AFTER DELETE ON recipe_steps REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_recipe_part_change('recipe_id');
+
 -- ============================================================================
 -- END OF TABLE CREATION
 -- ============================================================================
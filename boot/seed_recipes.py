@@ -4,13 +4,15 @@ Script to seed recipes from static/system_recipes.json into the database.
 This script should be run after countries and states have been seeded.
 """
 
+import io
 import json
 import os
 import sys
 import re
+import time
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
 import psycopg2
-from psycopg2.extras import execute_values
 from werkzeug.security import generate_password_hash
 
 # Database connection parameters
@@ -66,10 +68,8 @@ def load_recipes_data():
         sys.exit(1)
 
 
-def get_or_create_system_user(conn):
-    """Get or create system user for recipes."""
-    cursor = conn.cursor()
-    
+def get_or_create_system_user(cursor):
+    """Get or create system user for recipes (committed with the recipes)."""
     # Check if system user exists
     cursor.execute("SELECT id FROM users WHERE username = %s", (SYSTEM_USERNAME,))
     result = cursor.fetchone()
@@ -86,169 +86,294 @@ def get_or_create_system_user(conn):
         (SYSTEM_USERNAME, SYSTEM_EMAIL, password_hash, "System account for national dish recipes")
     )
     user_id = cursor.fetchone()[0]
-    conn.commit()
     print(f"✓ Created system user (ID: {user_id})")
     return user_id
 
 
-def get_state_id_for_country(conn, country_name):
-    """Get the first state_id for a given country name."""
-    cursor = conn.cursor()
-    
-    # First, get the country_id
-    cursor.execute("SELECT id FROM countries WHERE name = %s", (country_name,))
-    country_result = cursor.fetchone()
-    
-    if not country_result:
-        print(f"Warning: Country '{country_name}' not found in database")
-        return None
-    
-    country_id = country_result[0]
-    
-    # Get the first state for this country
+def load_state_lookup(cursor):
+    """Map each country name to its first state id (None when it has no states)."""
     cursor.execute(
-        "SELECT id FROM country_states WHERE country_id = %s ORDER BY id LIMIT 1",
-        (country_id,)
+        """SELECT c.name, MIN(s.id) FROM countries c
+           LEFT JOIN country_states s ON s.country_id = c.id
+           GROUP BY c.name"""
     )
-    state_result = cursor.fetchone()
-    
-    if not state_result:
-        print(f"Warning: No states found for country '{country_name}'")
+    return dict(cursor.fetchall())
+
+
+def load_existing_slugs(cursor):
+    """Return the set of slugs already taken."""
+    cursor.execute("SELECT slug FROM recipes")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def unique_slug(title, taken):
+    """Generate a slug for title that is not in taken, and reserve it."""
+    slug = generate_slug(title)
+    base_slug = slug
+    counter = 1
+    while slug in taken:
+        slug = f"{base_slug}-{counter}"
+        counter += 1
+    taken.add(slug)
+    return slug
+
+
+def reserve_ids(cursor, table, count):
+    """Take count ids from the table's sequence so rows can be copied with explicit ids."""
+    if not count:
+        return []
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        (table, count)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Load rows into table with a single COPY ... FROM STDIN."""
+    if not rows:
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row) + '\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+# Column limits of boot/init_db.sql; values are checked before they reach COPY,
+# where a single bad value would abort the whole load
+TEXT_LIMITS = {'title': 255, 'image_url': 500, 'name': 255, 'unit': 50}
+MAX_QUANTITY = Decimal('99999999.99')  # DECIMAL(10, 2)
+
+
+def _text(value, field, required=False):
+    """Return value as a stripped string (None when empty), or raise ValueError."""
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"missing {field}")
         return None
-    
-    return state_result[0]
+    if not isinstance(value, str):
+        raise ValueError(f"{field} is not a string: {value!r}")
+    if '\x00' in value:
+        raise ValueError(f"{field} contains a NUL character")
+    value = value.strip()
+    limit = TEXT_LIMITS.get(field)
+    if limit and len(value) > limit:
+        raise ValueError(f"{field} is longer than {limit} characters")
+    if required and not value:
+        raise ValueError(f"missing {field}")
+    return value or None
+
+
+def _integer(value, field):
+    """Return value as an int (None when missing), or raise ValueError."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{field} is not an integer: {value!r}")
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"{field} is not an integer: {value!r}")
+    if number != number.to_integral_value() or abs(number) > 2**31 - 1:
+        raise ValueError(f"{field} is not an integer: {value!r}")
+    return int(number)
+
+
+def _quantity(value):
+    """Return value as a Decimal rounded to cents (None when missing), or raise ValueError."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"quantity is not a number: {value!r}")
+    try:
+        quantity = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"quantity is not a number: {value!r}")
+    if not quantity.is_finite() or abs(quantity) > MAX_QUANTITY:
+        raise ValueError(f"quantity is out of range: {value!r}")
+    return quantity
+
+
+def build_recipe(national_dish, title, state_id, system_user_id, errors):
+    """Validate and coerce one recipe into (recipe row, step rows, ingredient rows), or raise ValueError.
+
+    As when recipes were inserted one by one, a step without a number or
+    instruction and an ingredient without a name are skipped; any other bad
+    value rejects the whole recipe. Steps refer to their ingredients by
+    position within this recipe.
+    """
+    recipe = [
+        title,
+        None,  # slug, assigned once the recipe is accepted
+        _text(national_dish.get('description'), 'description'),
+        _text(national_dish.get('instructions'), 'instructions'),
+        system_user_id,
+        state_id,
+        _text(national_dish.get('image_url'), 'image_url'),
+    ]
+    steps, ingredients = [], []
+    for step_data in national_dish.get('steps', []):
+        if not isinstance(step_data, dict):
+            raise ValueError(f"step is not an object: {step_data!r}")
+        step_number = _integer(step_data.get('step_number'), 'step_number')
+        instruction = _text(step_data.get('instruction'), 'instruction')
+        if not step_number or not instruction:
+            errors.append(f"Step in recipe '{title}' missing required fields")
+            continue
+
+        step_index = len(steps)
+        steps.append([
+            step_number,
+            instruction,
+            _text(step_data.get('image_url'), 'image_url'),
+            _integer(step_data.get('duration_minutes'), 'duration_minutes'),
+        ])
+        for ing_data in step_data.get('ingredients', []):
+            if not isinstance(ing_data, dict):
+                raise ValueError(f"ingredient is not an object: {ing_data!r}")
+            name = _text(ing_data.get('name'), 'name')
+            if not name:
+                continue
+            order = _integer(ing_data.get('order', 0), 'order')
+            ingredients.append([
+                step_index,
+                name,
+                _quantity(ing_data.get('quantity')),
+                _text(ing_data.get('unit'), 'unit'),
+                _text(ing_data.get('notes'), 'notes'),
+                0 if order is None else order,
+            ])
+    return recipe, steps, ingredients
+
+
+def build_rows(recipes_data, state_lookup, taken_slugs, system_user_id, errors):
+    """Validate the JSON and build recipe, step and ingredient rows without ids.
+
+    Steps reference their recipe and ingredients their step by list position;
+    the positions are replaced with real ids once they are reserved. A recipe
+    with a value that does not fit its column is reported and skipped.
+    """
+    recipes, steps, ingredients = [], [], []
+
+    for recipe_data in recipes_data:
+        if not isinstance(recipe_data, dict):
+            errors.append(f"Recipe entry is not an object: {recipe_data!r:.80}")
+            continue
+        country_name = recipe_data.get('country')
+        country_name = country_name.strip() if isinstance(country_name, str) else ''
+        if not country_name:
+            errors.append("Recipe missing country name")
+            continue
+
+        national_dish = recipe_data.get('national_dish', {})
+        if not national_dish or not isinstance(national_dish, dict):
+            errors.append(f"Recipe for {country_name} missing national_dish data")
+            continue
+
+        try:
+            title = _text(national_dish.get('title'), 'title')
+        except ValueError as e:
+            errors.append(f"Recipe for {country_name} skipped: {e}")
+            continue
+        if not title:
+            errors.append(f"Recipe for {country_name} missing title")
+            continue
+
+        # Get state_id for country
+        if country_name not in state_lookup:
+            errors.append(f"Country '{country_name}' not found in database")
+            continue
+        state_id = state_lookup[country_name]
+        if not state_id:
+            errors.append(f"Could not find state for country '{country_name}'")
+            continue
+
+        if not national_dish.get('steps'):
+            errors.append(f"Recipe '{title}' for {country_name} has no steps")
+            continue
+
+        try:
+            recipe, recipe_steps, recipe_ingredients = build_recipe(national_dish, title, state_id,
+                                                                    system_user_id, errors)
+        except ValueError as e:
+            errors.append(f"Recipe '{title}' for {country_name} skipped: {e}")
+            continue
+
+        recipe[1] = unique_slug(title, taken_slugs)
+        recipe_index = len(recipes)
+        step_offset = len(steps)
+        recipes.append(recipe)
+        steps.extend([recipe_index] + step for step in recipe_steps)
+        for ingredient in recipe_ingredients:
+            ingredient[0] += step_offset
+            ingredients.append(ingredient)
+
+    return recipes, steps, ingredients
 
 
 def seed_recipes(conn, recipes_data):
-    """Insert recipes into the database."""
+    """Insert recipes, steps and ingredients with COPY in a single transaction."""
     cursor = conn.cursor()
+    timings = {}
+    started = time.perf_counter()
     
-    # Get or create system user
-    system_user_id = get_or_create_system_user(conn)
-    
-    # Check if recipes already exist
-    cursor.execute("SELECT COUNT(*) FROM recipes WHERE author_id = %s", (system_user_id,))
-    existing_count = cursor.fetchone()[0]
-    
-    if existing_count > 0:
-        print(f"Recipes table already has {existing_count} system recipes. Skipping recipe seeding.")
-        return
-    
-    imported_count = 0
-    skipped_count = 0
-    errors = []
-    
-    for recipe_data in recipes_data:
-        try:
-            country_name = recipe_data.get('country', '').strip()
-            if not country_name:
-                errors.append("Recipe missing country name")
-                skipped_count += 1
-                continue
-            
-            national_dish = recipe_data.get('national_dish', {})
-            if not national_dish:
-                errors.append(f"Recipe for {country_name} missing national_dish data")
-                skipped_count += 1
-                continue
-            
-            title = national_dish.get('title', '').strip()
-            if not title:
-                errors.append(f"Recipe for {country_name} missing title")
-                skipped_count += 1
-                continue
-            
-            # Get state_id for country
-            state_id = get_state_id_for_country(conn, country_name)
-            if not state_id:
-                errors.append(f"Could not find state for country '{country_name}'")
-                skipped_count += 1
-                continue
-            
-            # Generate slug
-            slug = generate_slug(title)
-            base_slug = slug
-            counter = 1
-            while True:
-                cursor.execute("SELECT id FROM recipes WHERE slug = %s", (slug,))
-                if not cursor.fetchone():
-                    break
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            # Insert recipe
-            description = national_dish.get('description')
-            instructions = national_dish.get('instructions')
-            image_url = national_dish.get('image_url')
-            
-            cursor.execute(
-                """INSERT INTO recipes (title, slug, description, instructions, author_id, state_id, image_url)
-                   VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id""",
-                (title, slug, description, instructions, system_user_id, state_id, image_url)
-            )
-            recipe_id = cursor.fetchone()[0]
-            
-            # Insert steps
-            steps = national_dish.get('steps', [])
-            if not steps:
-                errors.append(f"Recipe '{title}' for {country_name} has no steps")
-                conn.rollback()
-                skipped_count += 1
-                continue
-            
-            for step_data in steps:
-                step_number = step_data.get('step_number')
-                instruction = step_data.get('instruction', '').strip()
-                
-                if not step_number or not instruction:
-                    errors.append(f"Step in recipe '{title}' missing required fields")
-                    continue
-                
-                cursor.execute(
-                    """INSERT INTO recipe_steps (recipe_id, step_number, instruction, image_url, duration_minutes)
-                       VALUES (%s, %s, %s, %s, %s) RETURNING id""",
-                    (
-                        recipe_id,
-                        step_number,
-                        instruction,
-                        step_data.get('image_url'),
-                        step_data.get('duration_minutes')
-                    )
-                )
-                step_id = cursor.fetchone()[0]
-                
-                # Insert ingredients for this step
-                ingredients = step_data.get('ingredients', [])
-                for ing_data in ingredients:
-                    name = ing_data.get('name', '').strip()
-                    if not name:
-                        continue
-                    
-                    cursor.execute(
-                        """INSERT INTO recipe_ingredients (step_id, name, quantity, unit, notes, "order")
-                           VALUES (%s, %s, %s, %s, %s, %s)""",
-                        (
-                            step_id,
-                            name,
-                            ing_data.get('quantity'),
-                            ing_data.get('unit'),
-                            ing_data.get('notes'),
-                            ing_data.get('order', 0)
-                        )
-                    )
-            
+    try:
+        # Get or create system user
+        system_user_id = get_or_create_system_user(cursor)
+        
+        # Check if recipes already exist
+        cursor.execute("SELECT COUNT(*) FROM recipes WHERE author_id = %s", (system_user_id,))
+        existing_count = cursor.fetchone()[0]
+        
+        if existing_count > 0:
             conn.commit()
-            imported_count += 1
-            if imported_count % 10 == 0:
-                print(f"  Imported {imported_count} recipes...")
+            print(f"Recipes table already has {existing_count} system recipes. Skipping recipe seeding.")
+            return
+        
+        # Resolve countries, states and slugs in memory
+        errors = []
+        state_lookup = load_state_lookup(cursor)
+        taken_slugs = load_existing_slugs(cursor)
+        recipes, steps, ingredients = build_rows(recipes_data, state_lookup, taken_slugs, system_user_id, errors)
+        timings['resolve'] = time.perf_counter() - started
+        
+        # Replace list positions with reserved ids
+        mark = time.perf_counter()
+        recipe_ids = reserve_ids(cursor, 'recipes', len(recipes))
+        step_ids = reserve_ids(cursor, 'recipe_steps', len(steps))
+        for recipe_id, row in zip(recipe_ids, recipes):
+            row.insert(0, recipe_id)
+        for step_id, row in zip(step_ids, steps):
+            row[0] = recipe_ids[row[0]]
+            row.insert(0, step_id)
+        for row in ingredients:
+            row[0] = step_ids[row[0]]
+        timings['reserve ids'] = time.perf_counter() - mark
+        
+        mark = time.perf_counter()
+        copy_rows(cursor, 'recipes', 'id, title, slug, description, instructions, author_id, state_id, image_url', recipes)
+        copy_rows(cursor, 'recipe_steps', 'id, recipe_id, step_number, instruction, image_url, duration_minutes', steps)
+        copy_rows(cursor, 'recipe_ingredients', 'step_id, name, quantity, unit, notes, "order"', ingredients)
+        timings['copy'] = time.perf_counter() - mark
         
-        except Exception as e:
-            conn.rollback()
-            errors.append(f"Error importing recipe for {recipe_data.get('country', 'Unknown')}: {str(e)}")
-            skipped_count += 1
-            print(f"✗ Error importing recipe for {recipe_data.get('country', 'Unknown')}: {str(e)}")
+        mark = time.perf_counter()
+        conn.commit()
+        timings['commit'] = time.perf_counter() - mark
+    except Exception:
+        conn.rollback()
+        raise
     
-    print(f"✓ Imported {imported_count} recipes")
+    elapsed = time.perf_counter() - started
+    print(f"✓ Imported {len(recipes)} recipes, {len(steps)} steps and {len(ingredients)} ingredients in {elapsed:.2f}s")
+    print("  " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    skipped_count = len(recipes_data) - len(recipes)
     if skipped_count > 0:
         print(f"  Skipped {skipped_count} recipes")
     if errors:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Script to build fingerprinted, precompressed copies of static/ for production.
+
+Usage:
+    python build_static.py
+    python build_static.py --output /app/assets
+
+Every file under static/ is copied to the output directory (assets/ by
+default) with a content hash in its name, e.g. css/squiggly.css becomes
+css/squiggly.3f2a9c1b7d4e.css. Text files also get .gz and, when the brotli
+package is installed, .br siblings, kept only if they are smaller than the
+original. manifest.json maps each source path to its hashed path; the app
+reads it to resolve static_url() and serves /assets/ with
+Cache-Control: immutable (see utils/assets.py).
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).parent
+STATIC_DIR = ROOT / "static"
+ASSETS_DIR = ROOT / "assets"
+MANIFEST_NAME = "manifest.json"
+
+HASH_LENGTH = 12
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".svg", ".html", ".txt", ".map", ".xml"}
+MIN_COMPRESS_SIZE = 256
+SKIPPED_SUFFIXES = {".backup"}
+
+
+def hashed_name(path, data):
+    """Return path with a content hash inserted before its suffix."""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}")
+
+
+def precompress(target, data):
+    """Write .gz and .br siblings of target when they are smaller than data; return the suffixes written."""
+    written = []
+    variants = [(".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda: brotli.compress(data, quality=11)))
+    for suffix, compress in variants:
+        compressed = compress()
+        if len(compressed) < len(data):
+            target.with_name(target.name + suffix).write_bytes(compressed)
+            written.append(suffix)
+    return written
+
+
+def build(source, output):
+    """Copy source into output with hashed names; return the manifest."""
+    if output.exists():
+        shutil.rmtree(output)
+    output.mkdir(parents=True)
+
+    manifest = {}
+    for path in sorted(source.rglob("*")):
+        relative = path.relative_to(source)
+        if not path.is_file() or path.suffix in SKIPPED_SUFFIXES or any(part.startswith(".") for part in relative.parts):
+            continue
+        data = path.read_bytes()
+        hashed = hashed_name(relative, data)
+        target = output / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        extra = []
+        if path.suffix in COMPRESSIBLE_SUFFIXES and len(data) >= MIN_COMPRESS_SIZE:
+            extra = precompress(target, data)
+        manifest[relative.as_posix()] = hashed.as_posix()
+        print(f"  {relative.as_posix()} -> {hashed.as_posix()} {' '.join(extra)}".rstrip())
+
+    (output / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets.")
+    parser.add_argument("--source", type=Path, default=STATIC_DIR, help="Directory to build (default: static/)")
+    parser.add_argument("--output", type=Path, default=ASSETS_DIR, help="Output directory (default: assets/)")
+    args = parser.parse_args()
+
+    print(f"Building assets from {args.source} into {args.output}...")
+    if brotli is None:
+        print("  brotli is not installed; writing .gz files only")
+    manifest = build(args.source, args.output)
+    print(f"✓ Built {len(manifest)} assets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Script to precompile the Jinja templates into the bytecode cache.
+
+Usage:
+    TEMPLATE_CACHE_DIR=/app/.template_cache python compile_templates.py
+
+Runs at image build time (see Dockerfile) so the cache ships with the
+container and the first requests after a cold start skip template
+compilation. Entries whose template source changed later are recompiled
+automatically (see utils/template_cache.py).
+"""
+
+import sys
+
+from app import app
+from utils.template_cache import compile_templates
+
+
+def main():
+    directory = app.config.get('TEMPLATE_CACHE_DIR')
+    if not directory:
+        print("✗ TEMPLATE_CACHE_DIR is not set; nothing to compile into")
+        sys.exit(1)
+    names = compile_templates(app)
+    print(f"✓ Compiled {len(names)} templates into {directory}")
+
+
+if __name__ == "__main__":
+    main()
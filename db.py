@@ -1,6 +1,7 @@
 """Shared database instance."""
 from flask_sqlalchemy import SQLAlchemy
+from utils.db_routing import RoutingSession
+from utils.server_timing import TimedQuery
 
-db = SQLAlchemy()
-
+db = SQLAlchemy(session_options={'class_': RoutingSession}, query_class=TimedQuery)
 
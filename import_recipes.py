@@ -1,178 +1,533 @@
 #!/usr/bin/env python3
 """
-Script to import recipes from JSON format into the Snacklore database.
+Script to import recipes from JSON or NDJSON into the Snacklore database.
 
 Usage:
     python import_recipes.py recipes.json
+    python import_recipes.py recipes.ndjson --workers 4 --batch-size 1000
+
+A file starting with '[' is read as a JSON array, anything else as one JSON
+object per line. Both are read incrementally, so memory use does not grow
+with the file. Each record is a recipe:
+
+    {"title": "...", "username": "...", "country": "...", "state": "...",
+     "description": "...", "instructions": "...", "image_url": "...",
+     "steps": [{"step_number": 1, "instruction": "...", "duration_minutes": 10,
+                "ingredients": [{"name": "...", "quantity": 2, "unit": "cups", "notes": "...", "order": 0}]}]}
+
+or an entry of static/system_recipes.json ({"country": ..., "national_dish": {...}}).
+The older field names "name", "step_text" and "amount" are accepted too.
+Usernames match case-insensitively. Records without a username are
+attributed to --default-user; without a state, to the first state of their
+country. Missing countries and states are created.
+
+Users, countries, states and existing slugs are loaded once into lookup maps.
+Recipes are written in batches of --batch-size, one transaction each, and a
+checkpoint file records how many input records are done, so an interrupted
+import resumes where it stopped. With --workers, NDJSON lines are decoded and
+validated in a process pool. Requires PostgreSQL (DATABASE_URL).
 """
 
+import argparse
 import json
+import os
+import re
 import sys
-from app import app, db, Recipe, Step, Ingredient, User, Country, State
-from app import generate_slug
+import time
+import unicodedata
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from multiprocessing import Pool
+from psycopg2.extras import execute_values
 
-def import_recipes(json_file_path):
-    """Import recipes from a JSON file into the database."""
-    with app.app_context():
-        # Load JSON file
+from app import app
+from db import db
+from models.recipe import Recipe
+
+READ_SIZE = 1 << 20
+# A single record of a JSON array larger than this is treated as a broken file
+MAX_RECORD_SIZE = 64 << 20
+# Longest JSON token that can be cut off at a chunk boundary (-Infinity)
+_TOKEN_MARGIN = 16
+_WHITESPACE = ' \t\r\n'
+_AMOUNT = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(.*)$')
+
+
+def normalize_name(name):
+    """Comparison key for names: case, accents and whitespace are ignored."""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def detect_format(path):
+    """Return 'array' for a JSON array and 'ndjson' otherwise."""
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            char = f.read(1)
+            if not char or char not in _WHITESPACE + '\ufeff':
+                return 'array' if char == '[' else 'ndjson'
+
+
+def iter_ndjson(f):
+    """Yield the non-empty lines of an NDJSON file, undecoded."""
+    for line in f:
+        if line.strip():
+            yield line
+
+
+def iter_json_array(f):
+    """Yield the elements of a JSON array, decoding one at a time.
+
+    A syntax error raises ValueError with its byte offset in the file as soon
+    as it is found, rather than after the rest of the file has been read.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(READ_SIZE)
+    stripped = buffer.lstrip(_WHITESPACE + '\ufeff')
+    # Bytes of the file before buffer[0]
+    offset = len(buffer[:len(buffer) - len(stripped)].encode('utf-8'))
+    buffer = stripped
+    if not buffer.startswith('['):
+        raise ValueError("JSON file must contain an array of recipes")
+    pos = 1
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ',':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                recipes_data = json.load(f)
-        except FileNotFoundError:
-            print(f"Error: File '{json_file_path}' not found.")
-            return False
+            if pos == len(buffer):
+                raise json.JSONDecodeError('Need more data', buffer, pos)
+            item, pos = decoder.raw_decode(buffer, pos)
         except json.JSONDecodeError as e:
-            print(f"Error: Invalid JSON in '{json_file_path}': {e}")
-            return False
-        
-        if not isinstance(recipes_data, list):
-            print("Error: JSON file must contain an array of recipes.")
-            return False
-        
-        imported_count = 0
-        skipped_count = 0
-        errors = []
-        
-        for recipe_data in recipes_data:
-            try:
-                # Validate required fields
-                if 'name' not in recipe_data:
-                    errors.append(f"Recipe missing 'name' field: {recipe_data}")
-                    skipped_count += 1
-                    continue
-                
-                if 'username' not in recipe_data:
-                    errors.append(f"Recipe '{recipe_data.get('name', 'Unknown')}' missing 'username' field")
-                    skipped_count += 1
-                    continue
-                
-                # Get or create user
-                username = recipe_data['username']
-                user = User.query.filter_by(username=username).first()
-                if not user:
-                    errors.append(f"User '{username}' not found. Recipe '{recipe_data['name']}' skipped.")
-                    skipped_count += 1
-                    continue
-                
-                # Get country if specified
-                country = None
-                if recipe_data.get('country'):
-                    country = Country.query.filter(Country.name.ilike(recipe_data['country'])).first()
-                    if not country:
-                        print(f"Warning: Country '{recipe_data['country']}' not found. Creating it...")
-                        country = Country(name=recipe_data['country'])
-                        db.session.add(country)
-                        db.session.flush()
-                
-                # Get state if specified
-                state = None
-                if recipe_data.get('state') and country:
-                    state = State.query.filter_by(
-                        country_id=country.id,
-                        name=recipe_data['state']
-                    ).first()
-                    if not state:
-                        print(f"Warning: State '{recipe_data['state']}' not found in '{country.name}'. Creating it...")
-                        state = State(name=recipe_data['state'], country_id=country.id)
-                        db.session.add(state)
-                        db.session.flush()
-                
-                # Check if recipe already exists
-                existing_recipe = Recipe.query.filter_by(
-                    name=recipe_data['name'],
-                    user_id=user.id
-                ).first()
-                
-                if existing_recipe:
-                    print(f"Recipe '{recipe_data['name']}' by '{username}' already exists. Skipping...")
-                    skipped_count += 1
-                    continue
-                
-                # Create recipe
-                recipe = Recipe(
-                    name=recipe_data['name'],
-                    user_id=user.id,
-                    primary_country_id=country.id if country else None,
-                    primary_state_id=state.id if state else None,
-                    slug=generate_slug(username, recipe_data['name'])
-                )
-                db.session.add(recipe)
-                db.session.flush()
-                
-                # Add steps
-                if 'steps' not in recipe_data or not recipe_data['steps']:
-                    errors.append(f"Recipe '{recipe_data['name']}' has no steps. Skipping...")
-                    db.session.rollback()
-                    skipped_count += 1
-                    continue
-                
-                # Sort steps by step_number
-                steps_data = sorted(recipe_data['steps'], key=lambda x: x.get('step_number', 0))
-                
-                for step_data in steps_data:
-                    if 'step_number' not in step_data or 'step_text' not in step_data:
-                        errors.append(f"Step in recipe '{recipe_data['name']}' missing required fields. Skipping step...")
+            # An error well before the end of the buffer cannot be a record cut off by the chunk boundary
+            truncated = e.pos >= len(buffer) - _TOKEN_MARGIN or e.msg.startswith('Unterminated string')
+            if eof or not truncated:
+                raise ValueError(f"JSON syntax error at byte {offset + len(buffer[:e.pos].encode('utf-8'))}: "
+                                 f"{e.msg}") from None
+            if len(buffer) - pos > MAX_RECORD_SIZE:
+                raise ValueError(f"JSON record at byte {offset + len(buffer[:pos].encode('utf-8'))} "
+                                 f"is larger than {MAX_RECORD_SIZE >> 20} MB")
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            offset += len(buffer[:pos].encode('utf-8'))
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+
+
+def read_chunks(path, skip, chunk_size):
+    """Yield lists of at most chunk_size records, after skipping the first skip."""
+    fmt = detect_format(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        records = iter_json_array(f) if fmt == 'array' else iter_ndjson(f)
+        for _ in islice(records, skip):
+            pass
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+# ---------------------------------------------------------------------------
+# Validation (runs in worker processes with --workers)
+# ---------------------------------------------------------------------------
+
+# Column limits of boot/init_db.sql; a value that does not fit would abort the whole batch
+TEXT_LIMITS = {'title': 255, 'image_url': 500, 'name': 255, 'unit': 50, 'username': 80, 'country': 100, 'state': 100}
+MAX_QUANTITY = Decimal('99999999.99')  # DECIMAL(10, 2)
+
+
+def _text(value, field, required=False):
+    """Return value as a stripped string (None when empty), or raise ValueError."""
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"missing '{field}'")
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"'{field}' is not a string: {value!r}")
+    if '\x00' in value:
+        raise ValueError(f"'{field}' contains a NUL character")
+    value = value.strip()
+    limit = TEXT_LIMITS.get(field)
+    if limit and len(value) > limit:
+        raise ValueError(f"'{field}' is longer than {limit} characters")
+    if required and not value:
+        raise ValueError(f"missing '{field}'")
+    return value or None
+
+
+def _integer(value, field):
+    """Return value as an int (None when missing), or raise ValueError."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"'{field}' is not an integer: {value!r}")
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"'{field}' is not an integer: {value!r}")
+    if not number.is_finite() or number != number.to_integral_value() or abs(number) > 2**31 - 1:
+        raise ValueError(f"'{field}' is not an integer: {value!r}")
+    return int(number)
+
+
+def _quantity(value):
+    """Return value as a Decimal rounded to cents (None when missing), or raise ValueError."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"'quantity' is not a number: {value!r}")
+    try:
+        quantity = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"'quantity' is not a number: {value!r}")
+    if not quantity.is_finite() or abs(quantity) > MAX_QUANTITY:
+        raise ValueError(f"'quantity' is out of range: {value!r}")
+    return quantity.quantize(Decimal('0.01'))
+
+
+def _list(value, field):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"'{field}' is not a list")
+    return value
+
+
+def _ingredient(data, index):
+    if not isinstance(data, dict):
+        raise ValueError(f"ingredient is not an object: {data!r}")
+    name = _text(data.get('name'), 'name', required=True)
+    quantity, unit, notes = data.get('quantity'), data.get('unit'), data.get('notes')
+    if quantity is None and data.get('amount') is not None:
+        # Older files have a free-form amount such as "2 cups"
+        match = _AMOUNT.match(str(data['amount']))
+        if match:
+            quantity, unit = match.group(1), unit or (match.group(2) or None)
+        else:
+            notes = notes or str(data['amount'])
+    order = _integer(data.get('order'), 'order')
+    return (name, _quantity(quantity), _text(unit, 'unit'), _text(notes, 'notes'),
+            index if order is None else order)
+
+
+def _step(data):
+    if not isinstance(data, dict):
+        raise ValueError("step is not an object")
+    step_number = _integer(data.get('step_number'), 'step_number')
+    instruction = _text(data.get('instruction') or data.get('step_text'), 'instruction')
+    if not step_number or step_number < 1 or not instruction:
+        raise ValueError("step missing 'step_number' or 'instruction'")
+    duration = _integer(data.get('duration_minutes'), 'duration_minutes')
+    if duration is not None and duration < 0:
+        raise ValueError(f"'duration_minutes' is negative: {duration}")
+    ingredients = [_ingredient(ing, i) for i, ing in enumerate(_list(data.get('ingredients'), 'ingredients'))]
+    return (step_number, instruction, _text(data.get('image_url'), 'image_url'), duration, ingredients)
+
+
+def prepare(item):
+    """Decode, validate and coerce one record into the shape write_batch() expects.
+
+    Every value is checked against its column's type and length here, so a
+    bad record is rejected on its own instead of aborting its batch.
+    """
+    data = json.loads(item) if isinstance(item, str) else item
+    if not isinstance(data, dict):
+        raise ValueError("record is not an object")
+    if isinstance(data.get('national_dish'), dict):
+        data = {**data['national_dish'], 'country': data.get('country')}
+
+    title = data.get('title') or data.get('name')
+    if isinstance(title, str):
+        title = title.strip()[:TEXT_LIMITS['title']]
+    title = _text(title, 'title', required=True)
+    try:
+        steps = sorted((_step(step) for step in _list(data.get('steps'), 'steps')), key=lambda step: step[0])
+        record = {
+            'title': title,
+            'username': _text(data.get('username'), 'username'),
+            'country': _text(data.get('country'), 'country'),
+            'state': _text(data.get('state'), 'state'),
+            'description': _text(data.get('description'), 'description'),
+            'instructions': _text(data.get('instructions'), 'instructions'),
+            'image_url': _text(data.get('image_url'), 'image_url'),
+            'steps': steps,
+        }
+    except ValueError as e:
+        raise ValueError(f"recipe '{title}': {e}")
+    if not steps:
+        raise ValueError(f"recipe '{title}' has no steps")
+    return record
+
+
+def prepare_chunk(chunk):
+    """prepare() every record; failures become ('error', message) entries."""
+    results = []
+    for item in chunk:
+        try:
+            results.append(('ok', prepare(item)))
+        except (ValueError, TypeError, AttributeError) as e:
+            results.append(('error', str(e)))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class Lookups:
+    """In-memory maps for resolving usernames, countries, states and slugs."""
+
+    def __init__(self, cursor):
+        # Usernames match case-insensitively; the oldest account wins if two differ only by case
+        cursor.execute("SELECT lower(username), id FROM users ORDER BY id")
+        self.users = {}
+        for username, id in cursor.fetchall():
+            self.users.setdefault(username, id)
+        cursor.execute("SELECT name, id FROM countries")
+        self.countries = {normalize_name(name): id for name, id in cursor.fetchall()}
+        cursor.execute("SELECT country_id, name, id FROM country_states ORDER BY id")
+        self.states = {}
+        self.first_state = {}
+        for country_id, name, id in cursor.fetchall():
+            self.states[(country_id, normalize_name(name))] = id
+            self.first_state.setdefault(country_id, id)
+        cursor.execute("SELECT author_id, title, slug FROM recipes")
+        self.slugs = set()
+        self.existing = set()
+        for author_id, title, slug in cursor.fetchall():
+            self.slugs.add(slug)
+            self.existing.add((author_id, title.casefold()))
+
+    def country_id(self, cursor, name):
+        key = normalize_name(name)
+        if key not in self.countries:
+            print(f"Warning: Country '{name}' not found. Creating it...")
+            cursor.execute("INSERT INTO countries (name) VALUES (%s) RETURNING id", (name,))
+            self.countries[key] = cursor.fetchone()[0]
+        return self.countries[key]
+
+    def state_id(self, cursor, country_id, name):
+        if not name:
+            return self.first_state.get(country_id)
+        key = (country_id, normalize_name(name))
+        if key not in self.states:
+            print(f"Warning: State '{name}' not found. Creating it...")
+            cursor.execute("INSERT INTO country_states (country_id, name) VALUES (%s, %s) RETURNING id",
+                           (country_id, name))
+            self.states[key] = cursor.fetchone()[0]
+            self.first_state.setdefault(country_id, self.states[key])
+        return self.states[key]
+
+    def slug(self, title):
+        slug = base_slug = Recipe.generate_slug(title)
+        counter = 1
+        while slug in self.slugs:
+            slug = f"{base_slug}-{counter}"
+            counter += 1
+        self.slugs.add(slug)
+        return slug
+
+
+def reserve_ids(cursor, table, count):
+    """Take count ids from the table's sequence so rows can be inserted with explicit ids."""
+    if not count:
+        return []
+    cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)", (table, count))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def resolve(cursor, lookups, record, default_user):
+    """Return (author_id, state_id) for a record, or raise ValueError."""
+    username = record['username'] or default_user
+    if not username:
+        raise ValueError(f"recipe '{record['title']}' has no username and no --default-user was given")
+    author_id = lookups.users.get(username.lower())
+    if not author_id:
+        raise ValueError(f"user '{username}' not found, recipe '{record['title']}' skipped")
+    if not record['country']:
+        raise ValueError(f"recipe '{record['title']}' has no country")
+    country_id = lookups.country_id(cursor, record['country'])
+    state_id = lookups.state_id(cursor, country_id, record['state'])
+    if not state_id:
+        raise ValueError(f"country '{record['country']}' has no states, recipe '{record['title']}' skipped")
+    return author_id, state_id
+
+
+def write_batch(cursor, batch):
+    """Insert resolved recipes with their steps and ingredients in three statements."""
+    recipe_ids = reserve_ids(cursor, 'recipes', len(batch))
+    step_ids = reserve_ids(cursor, 'recipe_steps', sum(len(record['steps']) for record, _, _, _ in batch))
+    recipes, steps, ingredients = [], [], []
+    step_ids = iter(step_ids)
+    # Explicit timestamps (naive UTC, like the models' defaults), so databases
+    # created by db.create_all() (no column defaults) work too
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for recipe_id, (record, author_id, state_id, slug) in zip(recipe_ids, batch):
+        recipes.append((recipe_id, record['title'], slug, record['description'], record['instructions'],
+                        author_id, state_id, record['image_url'], now, now))
+        for step_number, instruction, image_url, duration, step_ingredients in record['steps']:
+            step_id = next(step_ids)
+            steps.append((step_id, recipe_id, step_number, instruction, image_url, duration, now))
+            ingredients.extend((step_id,) + ingredient + (now,) for ingredient in step_ingredients)
+
+    execute_values(cursor, """
+        INSERT INTO recipes (id, title, slug, description, instructions, author_id, state_id, image_url,
+                             created_at, updated_at)
+        VALUES %s
+    """, recipes, page_size=1000)
+    execute_values(cursor, """
+        INSERT INTO recipe_steps (id, recipe_id, step_number, instruction, image_url, duration_minutes, created_at)
+        VALUES %s
+    """, steps, page_size=1000)
+    if ingredients:
+        execute_values(cursor, """
+            INSERT INTO recipe_ingredients (step_id, name, quantity, unit, notes, "order", created_at)
+            VALUES %s
+        """, ingredients, page_size=1000)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+
+def _source_id(path):
+    stat = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def load_checkpoint(checkpoint_path, path):
+    """Return the number of records already imported from path, or 0."""
+    if not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    source = _source_id(path)
+    if {key: checkpoint.get(key) for key in source} != source:
+        raise SystemExit(f"Error: checkpoint {checkpoint_path} belongs to a different or changed file; "
+                         "use --restart to ignore it")
+    return checkpoint['records']
+
+
+def save_checkpoint(checkpoint_path, path, records):
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({**_source_id(path), 'records': records}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def import_recipes(json_file_path, batch_size=500, workers=1, checkpoint_path=None,
+                   restart=False, default_user=None):
+    """Import recipes from a JSON or NDJSON file into the database."""
+    if not os.path.exists(json_file_path):
+        print(f"Error: File '{json_file_path}' not found.")
+        return False
+    checkpoint_path = checkpoint_path or json_file_path + '.checkpoint'
+    done = 0 if restart else load_checkpoint(checkpoint_path, json_file_path)
+    if done:
+        print(f"Resuming after {done} records (checkpoint {checkpoint_path})")
+
+    started = time.perf_counter()
+    imported_count = 0
+    skipped_count = 0
+    errors = []
+
+    with app.app_context():
+        # Fork the workers before opening the database connection
+        pool = Pool(workers) if workers > 1 else None
+        conn = db.engine.raw_connection()
+        cursor = conn.cursor()
+        lookups = Lookups(cursor)
+        try:
+            chunks = read_chunks(json_file_path, done, batch_size)
+            prepared = pool.imap(prepare_chunk, chunks) if pool else map(prepare_chunk, chunks)
+            for results in prepared:
+                batch = []
+                for status, record in results:
+                    if status == 'ok':
+                        try:
+                            author_id, state_id = resolve(cursor, lookups, record, default_user)
+                        except ValueError as e:
+                            status, record = 'error', str(e)
+                    if status == 'error':
+                        errors.append(record)
+                        skipped_count += 1
+                        continue
+                    if (author_id, record['title'].casefold()) in lookups.existing:
+                        print(f"Recipe '{record['title']}' by '{record['username'] or default_user}' already exists. Skipping...")
+                        skipped_count += 1
                         continue
-                    
-                    step = Step(
-                        recipe_id=recipe.id,
-                        step_number=step_data['step_number'],
-                        step_text=step_data['step_text']
-                    )
-                    db.session.add(step)
-                    db.session.flush()
-                    
-                    # Add ingredients for this step
-                    if 'ingredients' in step_data:
-                        for ingredient_data in step_data['ingredients']:
-                            if 'name' not in ingredient_data or 'amount' not in ingredient_data:
-                                errors.append(f"Ingredient in recipe '{recipe_data['name']}' step {step_data['step_number']} missing required fields. Skipping ingredient...")
-                                continue
-                            
-                            # Use ingredient username or fall back to recipe username
-                            ingredient_username = ingredient_data.get('username', username)
-                            ingredient_user = User.query.filter_by(username=ingredient_username).first()
-                            if not ingredient_user:
-                                ingredient_user = user  # Fall back to recipe owner
-                            
-                            ingredient = Ingredient(
-                                step_id=step.id,
-                                user_id=ingredient_user.id,
-                                name=ingredient_data['name'],
-                                amount=ingredient_data['amount']
-                            )
-                            db.session.add(ingredient)
-                
-                db.session.commit()
-                imported_count += 1
-                print(f"✓ Imported recipe: '{recipe_data['name']}' by '{username}'")
-                
-            except Exception as e:
-                db.session.rollback()
-                errors.append(f"Error importing recipe '{recipe_data.get('name', 'Unknown')}': {str(e)}")
-                skipped_count += 1
-                print(f"✗ Error importing recipe '{recipe_data.get('name', 'Unknown')}': {str(e)}")
-        
-        # Print summary
-        print("\n" + "="*50)
-        print("Import Summary:")
-        print(f"  Successfully imported: {imported_count}")
-        print(f"  Skipped/Failed: {skipped_count}")
-        if errors:
-            print(f"\nErrors/Warnings ({len(errors)}):")
-            for error in errors[:10]:  # Show first 10 errors
-                print(f"  - {error}")
-            if len(errors) > 10:
-                print(f"  ... and {len(errors) - 10} more errors")
-        
-        return imported_count > 0
+                    lookups.existing.add((author_id, record['title'].casefold()))
+                    batch.append((record, author_id, state_id, lookups.slug(record['title'])))
 
-if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python import_recipes.py <recipes.json>")
-        sys.exit(1)
-    
-    json_file = sys.argv[1]
-    success = import_recipes(json_file)
+                if batch:
+                    write_batch(cursor, batch)
+                conn.commit()
+                done += len(results)
+                imported_count += len(batch)
+                save_checkpoint(checkpoint_path, json_file_path, done)
+                rate = done / max(time.perf_counter() - started, 1e-9)
+                print(f"  {done} records read, {imported_count} imported ({rate:.0f} records/s)")
+        except Exception as e:
+            conn.rollback()
+            print(f"✗ Import stopped: {e}")
+            print(f"  Rerun the same command to resume after record {done}.")
+            return False
+        finally:
+            if pool:
+                pool.terminate()
+            conn.close()
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    # Print summary
+    print("\n" + "="*50)
+    print("Import Summary:")
+    print(f"  Successfully imported: {imported_count}")
+    print(f"  Skipped/Failed: {skipped_count}")
+    print(f"  Time: {time.perf_counter() - started:.1f}s")
+    if errors:
+        print(f"\nErrors/Warnings ({len(errors)}):")
+        for error in errors[:10]:  # Show first 10 errors
+            print(f"  - {error}")
+        if len(errors) > 10:
+            print(f"  ... and {len(errors) - 10} more errors")
+
+    # Records that already exist are not failures, so re-running a finished import succeeds
+    return imported_count > 0 or not errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import recipes from a JSON array or NDJSON file.')
+    parser.add_argument('file', help='JSON or NDJSON file with recipes')
+    parser.add_argument('--batch-size', type=int, default=500, help='Records per transaction (default 500)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for decoding and validating records (default 1)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default <file>.checkpoint)')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and start over')
+    parser.add_argument('--default-user', help='Author for records without a username')
+    args = parser.parse_args()
+
+    success = import_recipes(args.file, batch_size=args.batch_size, workers=args.workers,
+                             checkpoint_path=args.checkpoint, restart=args.restart,
+                             default_user=args.default_user)
     sys.exit(0 if success else 1)
 
+
+if __name__ == '__main__':
+    main()
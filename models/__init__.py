@@ -9,6 +9,7 @@ from .comment_vote import CommentVote
 from .country import Country
 from .country_state import CountryState
 from .favorite import Favorite
+from .change_log import ChangeLog
 
 __all__ = [
     'User',
@@ -21,6 +22,7 @@ __all__ = [
     'Country',
     'CountryState',
     'Favorite',
+    'ChangeLog',
 ]
 
 
@@ -0,0 +1,27 @@
+"""Change log model."""
+from datetime import datetime
+from db import db
+
+
+class ChangeLog(db.Model):
+    """One created, updated or deleted row, written by database triggers (see utils/change_feed.py).
+
+    Entries are ordered by (txid, id), the position a feed cursor encodes.
+    """
+    __tablename__ = 'change_log'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # 'recipe', 'comment', 'recipe_vote', 'comment_vote'
+    entity_id = db.Column(db.Integer, nullable=False)
+    parent_id = db.Column(db.Integer)  # recipe of a comment or recipe vote, comment of a comment vote
+    operation = db.Column(db.String(10), nullable=False)  # 'create', 'update' or 'delete'
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    txid = db.Column(db.BigInteger, nullable=False, server_default='0')  # transaction that made the change
+
+    __table_args__ = (
+        db.CheckConstraint("operation IN ('create', 'update', 'delete')", name='check_change_operation'),
+        db.Index('idx_change_log_txid_id', 'txid', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ChangeLog {self.id} {self.operation} {self.entity_type} {self.entity_id}>'
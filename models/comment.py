@@ -1,6 +1,7 @@
 """Comment model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 
 
 class Comment(db.Model):
@@ -20,6 +21,11 @@ class Comment(db.Model):
     replies = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]), lazy='dynamic', cascade='all, delete-orphan')
     comment_votes = db.relationship('CommentVote', backref='comment', lazy='dynamic', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Comment threads filter by recipe and sort oldest first
+        db.Index('idx_comments_recipe_created_at', 'recipe_id', 'created_at'),
+    )
+
     def get_vote_counts(self):
         """Get upvote and downvote counts."""
         upvotes = self.comment_votes.filter_by(vote_type='upvote').count()
@@ -30,6 +36,7 @@ class Comment(db.Model):
             'score': upvotes - downvotes
         }
 
+    @timed('serialize')
     def to_dict(self, include_replies=True, include_votes=False, user_id=None):
         """Serialize comment to dictionary."""
         data = {
@@ -40,8 +47,8 @@ class Comment(db.Model):
             'parent_id': self.parent_id,
             'content': self.content,
             'is_edited': self.is_edited,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
         if include_replies:
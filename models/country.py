@@ -1,6 +1,7 @@
 """Country model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 
 
 class Country(db.Model):
@@ -18,6 +19,7 @@ class Country(db.Model):
     # Relationships
     states = db.relationship('CountryState', backref='country', lazy='dynamic', cascade='all, delete-orphan')
 
+    @timed('serialize')
     def to_dict(self):
         """Serialize country to dictionary."""
         return {
@@ -25,9 +27,9 @@ class Country(db.Model):
             'name': self.name,
             'code': self.code,
             'continent': self.continent,
-            'lat': float(self.lat) if self.lat else None,
-            'lng': float(self.lng) if self.lng else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'lat': self.lat or None,
+            'lng': self.lng or None,
+            'created_at': self.created_at,
         }
 
     def __repr__(self):
@@ -1,6 +1,7 @@
 """Country State model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 
 
 class CountryState(db.Model):
@@ -19,6 +20,7 @@ class CountryState(db.Model):
         db.UniqueConstraint('country_id', 'name', name='uq_country_state'),
     )
 
+    @timed('serialize')
     def to_dict(self):
         """Serialize state to dictionary."""
         return {
@@ -26,7 +28,7 @@ class CountryState(db.Model):
             'country_id': self.country_id,
             'name': self.name,
             'country': self.country.to_dict() if self.country else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
 
     def __repr__(self):
@@ -1,6 +1,7 @@
 """Favorite model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 
 
 class Favorite(db.Model):
@@ -18,6 +19,7 @@ class Favorite(db.Model):
         db.CheckConstraint("favorite_type IN ('user', 'recipe', 'state', 'country')", name='check_favorite_type'),
     )
 
+    @timed('serialize')
     def to_dict(self):
         """Serialize favorite to dictionary."""
         favorite_data = None
@@ -44,7 +46,7 @@ class Favorite(db.Model):
             'favorite_type': self.favorite_type,
             'favorite_id': self.favorite_id,
             'favorite_data': favorite_data,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
 
     def __repr__(self):
@@ -1,6 +1,7 @@
 """Recipe model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 import re
 
 
@@ -24,6 +25,11 @@ class Recipe(db.Model):
     comments = db.relationship('Comment', backref='recipe', lazy='dynamic', cascade='all, delete-orphan')
     recipe_votes = db.relationship('RecipeVote', backref='recipe', lazy='dynamic', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # State listings filter by state and sort newest first
+        db.Index('idx_recipes_state_created_at', 'state_id', 'created_at'),
+    )
+
     @staticmethod
     def generate_slug(title):
         """Generate URL-friendly slug from title."""
@@ -47,6 +53,7 @@ class Recipe(db.Model):
             'score': upvotes - downvotes
         }
 
+    @timed('serialize')
     def to_dict(self, include_steps=True, include_comments=False, include_votes=False, user_id=None):
         """Serialize recipe to dictionary."""
         data = {
@@ -60,14 +67,16 @@ class Recipe(db.Model):
             'state_id': self.state_id,
             'state': self.state.to_dict() if self.state else None,
             'image_url': self.image_url,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
         if include_steps:
+            from .recipe_step import RecipeStep
             data['steps'] = [step.to_dict() for step in self.steps.order_by(RecipeStep.step_number).all()]
 
         if include_comments:
+            from .comment import Comment
             data['comments'] = [comment.to_dict() for comment in self.comments.filter_by(parent_id=None).order_by(Comment.created_at).all()]
 
         if include_votes:
@@ -1,6 +1,7 @@
 """Recipe Ingredient model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 
 
 class RecipeIngredient(db.Model):
@@ -20,17 +21,18 @@ class RecipeIngredient(db.Model):
         db.Index('idx_step_order', 'step_id', 'order'),
     )
 
+    @timed('serialize')
     def to_dict(self):
         """Serialize ingredient to dictionary."""
         return {
             'id': self.id,
             'step_id': self.step_id,
             'name': self.name,
-            'quantity': float(self.quantity) if self.quantity else None,
+            'quantity': self.quantity or None,
             'unit': self.unit,
             'notes': self.notes,
             'order': self.order,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
 
     def __repr__(self):
@@ -1,6 +1,7 @@
 """Recipe Step model."""
 from datetime import datetime
 from db import db
+from utils.server_timing import timed
 
 
 class RecipeStep(db.Model):
@@ -22,8 +23,10 @@ class RecipeStep(db.Model):
         db.Index('idx_recipe_step_number', 'recipe_id', 'step_number'),
     )
 
+    @timed('serialize')
     def to_dict(self):
         """Serialize step to dictionary."""
+        from .recipe_ingredient import RecipeIngredient
         return {
             'id': self.id,
             'recipe_id': self.recipe_id,
@@ -32,7 +35,7 @@ class RecipeStep(db.Model):
             'image_url': self.image_url,
             'duration_minutes': self.duration_minutes,
             'ingredients': [ing.to_dict() for ing in self.ingredients.order_by(RecipeIngredient.order).all()],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
 
     def __repr__(self):
@@ -2,6 +2,7 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from db import db
+from utils.server_timing import timed
 
 
 class User(db.Model):
@@ -32,6 +33,7 @@ class User(db.Model):
         """Check if password matches hash."""
         return check_password_hash(self.password_hash, password)
 
+    @timed('serialize')
     def to_dict(self):
         """Serialize user to dictionary (includes private data)."""
         return {
@@ -40,10 +42,11 @@ class User(db.Model):
             'email': self.email,
             'bio': self.bio,
             'country': self.country,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
+    @timed('serialize')
     def to_public_dict(self):
         """Serialize user to dictionary (public profile only)."""
         return {
@@ -51,7 +54,7 @@ class User(db.Model):
             'username': self.username,
             'bio': self.bio,
             'country': self.country,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at,
         }
 
     def __repr__(self):
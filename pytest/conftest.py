@@ -0,0 +1,148 @@
+"""Shared pytest fixtures.
+
+Tests that need a database are skipped unless SNACKLORE_TEST_DATABASE_URL
+points at a disposable PostgreSQL database.
+"""
+import os
+import random
+import re
+from datetime import datetime, timedelta
+import pytest
+
+TEST_DATABASE_URL = os.environ.get('SNACKLORE_TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
+from utils.query_monitor import count_queries
+
+DATASET_USER = 'perf_user'
+DATASET_PASSWORD = 'perf-password'
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Flask app bound to the test database."""
+    if not TEST_DATABASE_URL:
+        pytest.skip('SNACKLORE_TEST_DATABASE_URL is not set')
+    from app import app as flask_app
+    from db import db
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    """Test client for the app."""
+    return app.test_client()
+
+
+@pytest.fixture
+def cache_lookups(client):
+    """Read a cache's lookup counters from /metrics: ``cache_lookups('fragment') == {'hit': 3, 'miss': 1}``"""
+    def read(cache):
+        text = client.get('/metrics').get_data(as_text=True)
+        counts = {}
+        for result in ('hit', 'miss'):
+            match = re.search(rf'^snacklore_cache_requests_total{{cache="{cache}",result="{result}"}} (\d+)$',
+                              text, re.M)
+            counts[result] = int(match.group(1)) if match else 0
+        return counts
+    return read
+
+
+@pytest.fixture
+def query_counter():
+    """Count SQL statements: ``with query_counter() as queries: ...; assert queries.count <= 5``"""
+    return count_queries
+
+
+@pytest.fixture(scope='session')
+def dataset(app):
+    """Recreate the test database with a fixed dataset; returns ids for building URLs.
+
+    The data is generated from a fixed seed, so query counts and plans are
+    reproducible between runs.
+    """
+    from werkzeug.security import generate_password_hash
+    from db import db
+    from models import (User, Country, CountryState, Recipe, RecipeStep, RecipeIngredient,
+                        Comment, RecipeVote, CommentVote, Favorite)
+
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    password_hash = generate_password_hash(DATASET_PASSWORD)
+
+    def insert(model, rows):
+        db.session.execute(model.__table__.insert(), rows)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        insert(User, [{'id': i, 'username': DATASET_USER if i == 1 else f'user{i}', 'email': f'user{i}@example.test',
+                       'password_hash': password_hash, 'created_at': start, 'updated_at': start}
+                      for i in range(1, 51)])
+        insert(Country, [{'id': i, 'name': f'Country {i}', 'continent': 'Europe', 'lat': 10 + i, 'lng': 20 + i}
+                         for i in range(1, 11)])
+        insert(CountryState, [{'id': i, 'country_id': (i - 1) // 5 + 1, 'name': f'State {i}'} for i in range(1, 51)])
+
+        recipes, steps, ingredients = [], [], []
+        for i in range(1, 501):
+            created = start + timedelta(hours=i)
+            recipes.append({'id': i, 'title': f'Recipe {i} {rng.choice(["stew", "soup", "bread", "cake"])}',
+                            'slug': f'recipe-{i}', 'description': 'A test recipe.', 'author_id': rng.randint(1, 50),
+                            'state_id': rng.randint(1, 50), 'created_at': created, 'updated_at': created})
+            for n in range(1, 4):
+                step_id = len(steps) + 1
+                steps.append({'id': step_id, 'recipe_id': i, 'step_number': n, 'instruction': f'Step {n}.'})
+                for order, name in enumerate(['flour', 'salt']):
+                    ingredients.append({'id': len(ingredients) + 1, 'step_id': step_id, 'name': name,
+                                        'quantity': 1, 'unit': 'cup', 'order': order})
+        insert(Recipe, recipes)
+        insert(RecipeStep, steps)
+        insert(RecipeIngredient, ingredients)
+
+        # Recipe 1 has a long thread with replies; the rest get a few comments
+        comments = []
+        for i in range(1, 1001):
+            recipe_id = 1 if i <= 60 else rng.randint(1, 500)
+            parent_id = i - 30 if i > 30 and i <= 60 else None
+            created = start + timedelta(days=30, minutes=i)
+            comments.append({'id': i, 'recipe_id': recipe_id, 'user_id': rng.randint(1, 50), 'parent_id': parent_id,
+                             'content': f'Comment {i}', 'is_edited': False, 'created_at': created, 'updated_at': created})
+        insert(Comment, comments)
+
+        recipe_votes = {(rng.randint(1, 50), rng.randint(1, 500)) for _ in range(3000)}
+        insert(RecipeVote, [{'user_id': u, 'recipe_id': r, 'vote_type': rng.choice(['upvote', 'upvote', 'downvote']),
+                             'created_at': start, 'updated_at': start} for u, r in sorted(recipe_votes)])
+        comment_votes = {(rng.randint(1, 50), rng.randint(1, 60)) for _ in range(300)}
+        insert(CommentVote, [{'user_id': u, 'comment_id': c, 'vote_type': 'upvote', 'created_at': start,
+                              'updated_at': start} for u, c in sorted(comment_votes)])
+        favorite_types = [('recipe', 500), ('user', 50), ('state', 50), ('country', 10)]
+        favorites = {(kind, rng.randint(1, count)) for kind, count in (rng.choice(favorite_types) for _ in range(40))}
+        insert(Favorite, [{'user_id': 1, 'favorite_type': kind, 'favorite_id': target, 'created_at': start}
+                          for kind, target in sorted(favorites)])
+        db.session.commit()
+
+        if db.engine.dialect.name == 'postgresql':
+            # Rows were inserted with explicit ids; keep sequences ahead of them
+            for table in db.metadata.sorted_tables:
+                db.session.execute(db.text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"))
+            db.session.commit()
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(db.text('ANALYZE'))
+
+    return {'recipe_id': 1, 'country_id': 1, 'state_id': 1, 'username': DATASET_USER, 'search': 'stew'}
+
+
+@pytest.fixture
+def login(client, dataset):
+    """Log the test client in as the dataset user."""
+    def do_login():
+        response = client.post('/api/login', json={'username': DATASET_USER, 'password': DATASET_PASSWORD})
+        assert response.status_code == 200
+    return do_login
@@ -0,0 +1,30 @@
+"""Admin memory endpoints: snapshot names are validated before a snapshot is stored."""
+import tracemalloc
+import pytest
+
+
+@pytest.fixture
+def admin(app, client, dataset, login, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_USERNAMES', [dataset['username']])
+    login()
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    yield client
+    if started:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('body', [[], 'baseline', {'name': ''}, {'name': '  '}, {'name': 3}, {'name': None}])
+def test_invalid_snapshot_body_is_a_400(admin, body):
+    response = admin.post('/api/admin/memory/snapshots', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'ValidationError'
+
+
+def test_snapshot_is_stored_and_diffed(admin):
+    response = admin.post('/api/admin/memory/snapshots', json={'name': 'before'})
+    assert response.status_code == 201
+    assert response.get_json()['name'] == 'before'
+    assert admin.post('/api/admin/memory/snapshots').get_json()['name'] == 'baseline'
+    assert admin.get('/api/admin/memory/diff?base=before').status_code == 200
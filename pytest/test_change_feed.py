@@ -0,0 +1,105 @@
+"""GET /api/changes must see every write, whichever path made it.
+
+Entries are written by database triggers, so bulk statements and the
+importer's batched INSERTs show up like ORM changes. On PostgreSQL the feed
+also holds back transactions committed after one that is still running.
+"""
+import json
+import pytest
+
+
+@pytest.fixture
+def feed(app, client, dataset):
+    """Return a function reading the feed from a cursor to its end: (changes, cursor, has_more)."""
+    def read(since):
+        changes = []
+        while True:
+            body = client.get(f'/api/changes?since={since}&limit=50').get_json()
+            changes += body['changes']
+            assert body['cursor'] != since or not body['changes']
+            since = body['cursor']
+            if not body['has_more'] or not body['changes']:
+                return changes, since, body['has_more']
+    return read
+
+
+@pytest.fixture
+def postgres(app):
+    from db import db
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            pytest.skip('requires PostgreSQL')
+
+
+def _latest(client):
+    return client.get('/api/changes?since=latest').get_json()['cursor']
+
+
+def test_malformed_cursor_is_rejected(client, dataset):
+    assert client.get('/api/changes?since=abc').status_code == 400
+    assert client.get('/api/changes?since=1-x').status_code == 400
+
+
+def test_bulk_update_and_step_changes_are_logged(app, client, dataset, feed):
+    from db import db
+    from models import Comment, RecipeStep
+    since = _latest(client)
+    with app.app_context():
+        Comment.query.filter(Comment.id.in_([5, 6])).update({'content': 'Edited in bulk'})
+        RecipeStep.query.filter_by(recipe_id=2, step_number=3).delete()
+        db.session.commit()
+
+    changes, _, has_more = feed(since)
+    assert not has_more
+    by_entity = {(change['entity'], change['id']): change for change in changes}
+    assert by_entity[('comment', 5)]['data']['content'] == 'Edited in bulk'
+    assert by_entity[('comment', 6)]['op'] == 'update'
+    assert by_entity[('recipe', 2)]['op'] == 'update'
+
+
+def test_imported_recipes_appear_in_feed(app, client, dataset, feed, postgres, tmp_path):
+    import import_recipes
+    from db import db
+    from models import Recipe
+    records = [{'title': f'Imported feed recipe {i}', 'country': 'Country 1', 'state': 'State 1',
+                'steps': [{'step_number': 1, 'instruction': 'Cook.', 'ingredients': [{'name': 'salt'}]}]}
+               for i in range(3)]
+    path = tmp_path / 'recipes.ndjson'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+
+    since = _latest(client)
+    assert import_recipes.import_recipes(str(path), default_user=dataset['username'])
+    with app.app_context():
+        ids = {id for id, in db.session.query(Recipe.id).filter(Recipe.title.like('Imported feed recipe %'))}
+    try:
+        changes, since, _ = feed(since)
+        created = {change['id']: change for change in changes if change['entity'] == 'recipe'}
+        assert set(created) == ids
+        assert all(change['op'] == 'create' and change['data']['title'].startswith('Imported feed recipe')
+                   for change in created.values())
+    finally:
+        with app.app_context():
+            db.session.execute(Recipe.__table__.delete().where(Recipe.id.in_(ids)))
+            db.session.commit()
+
+    changes, _, _ = feed(since)
+    assert {change['id'] for change in changes if change['op'] == 'delete'} == ids
+
+
+def test_running_transaction_holds_back_later_commits(app, client, dataset, feed, postgres):
+    from db import db
+    since = _latest(client)
+    with app.app_context():
+        with db.engine.connect() as slow:
+            slow.begin()
+            slow.exec_driver_sql("UPDATE comments SET content = 'Slow edit' WHERE id = 7")
+            with db.engine.begin() as fast:
+                fast.exec_driver_sql("UPDATE comments SET content = 'Fast edit' WHERE id = 8")
+
+            changes, cursor, has_more = feed(since)
+            assert changes == [] and has_more
+            slow.commit()
+
+    changes, _, has_more = feed(cursor)
+    assert [change['id'] for change in changes] == [7, 8]
+    assert not has_more
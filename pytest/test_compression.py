@@ -0,0 +1,121 @@
+"""Response compression: encoding negotiation, Vary, and the responses left alone.
+
+Compressed-body cache lookups must show up in /metrics as the
+``compressed_body`` cache.
+"""
+import gzip
+import pytest
+from flask import Flask, Response, send_file, stream_with_context
+from utils.compression import brotli, init_compression
+
+BODY = ('{"items":[' + ','.join(f'{{"id":{i},"title":"Recipe {i}"}}' for i in range(200)) + ']}').encode()
+
+
+@pytest.fixture
+def compress_client(tmp_path):
+    app = Flask(__name__)
+    init_compression(app)
+    asset = tmp_path / 'app.js'
+    asset.write_bytes(b'x' * 4096)
+
+    @app.route('/json')
+    def json_body():
+        return Response(BODY, mimetype='application/json')
+
+    @app.route('/small')
+    def small():
+        return Response(b'{"ok":true}', mimetype='application/json')
+
+    @app.route('/encoded')
+    def encoded():
+        return Response(gzip.compress(BODY), mimetype='application/json', headers={'Content-Encoding': 'gzip'})
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' + b'\x00' * 4096, mimetype='image/png')
+
+    @app.route('/stream')
+    def stream():
+        return Response(stream_with_context(BODY[i:i + 500] for i in range(0, len(BODY), 500)),
+                        mimetype='application/x-ndjson')
+
+    @app.route('/file')
+    def file():
+        return send_file(asset)
+
+    return app.test_client()
+
+
+def _get(client, url, accept_encoding=None):
+    return client.get(url, headers={'Accept-Encoding': accept_encoding} if accept_encoding else {})
+
+
+def test_gzip(compress_client):
+    response = _get(compress_client, '/json', 'gzip, deflate')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.data) == BODY
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+def test_brotli_preferred(compress_client):
+    response = _get(compress_client, '/json', 'gzip, deflate, br')
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == BODY
+
+    response = _get(compress_client, '/json', 'gzip, br;q=0')
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_brotli_disabled(compress_client):
+    compress_client.application.config['COMPRESS_BROTLI'] = False
+    assert _get(compress_client, '/json', 'br, gzip').headers['Content-Encoding'] == 'gzip'
+
+
+@pytest.mark.parametrize('accept_encoding', [None, 'identity', 'gzip;q=0'])
+def test_uncompressed_when_not_accepted(compress_client, accept_encoding):
+    response = _get(compress_client, '/json', accept_encoding)
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+    assert response.data == BODY
+
+
+def test_small_body_is_not_compressed(compress_client):
+    response = _get(compress_client, '/small', 'gzip')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+    assert response.data == b'{"ok":true}'
+
+
+def test_already_encoded_body_is_untouched(compress_client):
+    response = _get(compress_client, '/encoded', 'br, gzip')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == BODY
+
+
+@pytest.mark.parametrize('url', ['/image', '/file'])
+def test_other_responses_are_untouched(compress_client, url):
+    response = _get(compress_client, url, 'gzip')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' not in response.vary
+
+
+def test_streamed_response_is_compressed(compress_client):
+    response = _get(compress_client, '/stream', 'gzip')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == BODY
+
+
+def test_compressed_body_cache_metrics(client, dataset, cache_lookups):
+    # A page size no other test requests, so the first response is not cached yet
+    url = '/api/recipes?per_page=37'
+    before = cache_lookups('compressed_body')
+    first = _get(client, url, 'gzip')
+    assert first.headers['Content-Encoding'] == 'gzip'
+    after_miss = cache_lookups('compressed_body')
+    assert after_miss == {'hit': before['hit'], 'miss': before['miss'] + 1}
+
+    second = _get(client, url, 'gzip')
+    assert second.data == first.data
+    assert cache_lookups('compressed_body') == {'hit': before['hit'] + 1, 'miss': before['miss'] + 1}
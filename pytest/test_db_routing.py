@@ -0,0 +1,173 @@
+"""RoutingSession: which engine each request's statements run on.
+
+The replica bind is a second URL to the test database, so routing can be
+checked without replication: reads of safe requests go to the replica in
+autocommit mode, writes and the requests after them to the primary, and the
+read-only session is released before the response is sent.
+"""
+import pytest
+from flask import Flask, Response, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from conftest import TEST_DATABASE_URL
+from utils import db_routing
+from utils.db_routing import REPLICA_BIND, STICKY_SESSION_KEY, RoutingSession, init_db_routing, primary_only, transactional
+
+routing_db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class RoutingProbe(routing_db.Model):
+    __tablename__ = 'routing_probe'
+    id = routing_db.Column(routing_db.Integer, primary_key=True)
+
+
+def _count():
+    return routing_db.session.execute(text('SELECT COUNT(*) FROM routing_probe')).scalar()
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    """Return (client, used, checked_out).
+
+    used() pops the engines routing_probe statements ran on since the last
+    call; checked_out lists the connections still checked out as each
+    response left the hooks.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip('SNACKLORE_TEST_DATABASE_URL is not set')
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL,
+                      SQLALCHEMY_BINDS={REPLICA_BIND: TEST_DATABASE_URL}, REPLICA_LAG_CHECK_INTERVAL=0)
+    routing_db.init_app(app)
+    checked_out = []
+
+    @app.after_request
+    def record_pool(response):
+        # Registered before init_db_routing, so it runs after its hooks
+        checked_out.append(sum(engine.pool.checkedout() for engine in routing_db.engines.values()))
+        return response
+
+    init_db_routing(app)
+
+    @app.route('/probe', methods=['GET', 'POST'])
+    def probe():
+        if request.method == 'POST':
+            routing_db.session.add(RoutingProbe())
+            routing_db.session.commit()
+        return jsonify(count=_count())
+
+    @app.route('/primary')
+    @primary_only
+    def primary():
+        return jsonify(count=_count())
+
+    @app.route('/snapshot')
+    @transactional
+    def snapshot():
+        return jsonify(count=_count())
+
+    @app.route('/stream')
+    def stream():
+        count = _count()
+        return Response((str(count) for _ in range(2)), mimetype='text/plain')
+
+    statements = []
+    with app.app_context():
+        routing_db.create_all()
+        engines = {'primary': routing_db.engines[None], 'replica': routing_db.engines[REPLICA_BIND]}
+        engines.update({f'{name}_autocommit': db_routing._autocommit_engine(engine)
+                        for name, engine in list(engines.items())})
+        names = {engine: name for name, engine in engines.items()}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'routing_probe' in statement:
+            statements.append(names[conn.engine])
+
+    for engine in (engines['primary'], engines['replica']):
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    monkeypatch.setattr(db_routing, 'REPLICA_LAG_SQL', text('SELECT 0'))
+    monkeypatch.setattr(db_routing, '_replica_health', {'checked_at': 0.0, 'healthy': True, 'lag': 0.0})
+
+    def used():
+        engines_used = list(dict.fromkeys(statements))
+        statements.clear()
+        return engines_used
+
+    yield app.test_client(), used, checked_out
+
+    for engine in (engines['primary'], engines['replica']):
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    with app.app_context():
+        routing_db.drop_all()
+        for engine in routing_db.engines.values():
+            engine.dispose()
+
+
+def test_reads_go_to_the_replica(routing):
+    client, used, _ = routing
+    assert client.get('/probe').status_code == 200
+    assert used() == ['replica_autocommit']
+
+
+def test_writes_stick_to_the_primary(routing):
+    client, used, _ = routing
+    assert client.post('/probe').status_code == 200
+    assert used() == ['primary']
+
+    # Read-your-writes: the next reads stay on the primary until the sticky period ends
+    assert client.get('/probe').get_json() == {'count': 1}
+    assert used() == ['primary_autocommit']
+    with client.session_transaction() as session:
+        session[STICKY_SESSION_KEY] = 0
+    client.get('/probe')
+    assert used() == ['replica_autocommit']
+
+
+def test_lagging_replica_falls_back_to_the_primary(routing, monkeypatch):
+    client, used, _ = routing
+    monkeypatch.setattr(db_routing, 'REPLICA_LAG_SQL', text('SELECT 5'))
+    client.get('/probe')
+    assert used() == ['primary_autocommit']
+    assert not db_routing._replica_health['healthy'] and db_routing._replica_health['lag'] == 5.0
+
+    monkeypatch.setattr(db_routing, 'REPLICA_LAG_SQL', text('SELECT 1'))
+    client.get('/probe')
+    assert used() == ['replica_autocommit']
+
+
+def test_unreachable_replica_falls_back_to_the_primary(routing, monkeypatch):
+    client, used, _ = routing
+    monkeypatch.setattr(db_routing, 'REPLICA_LAG_SQL', text('SELECT * FROM no_such_table'))
+    client.get('/probe')
+    assert used() == ['primary_autocommit']
+
+
+def test_primary_only_view(routing):
+    client, used, _ = routing
+    client.get('/primary')
+    assert used() == ['primary_autocommit']
+
+
+def test_transactional_view(routing):
+    client, used, _ = routing
+    client.get('/snapshot')
+    assert used() == ['replica']
+
+
+def test_autocommit_disabled(routing):
+    client, used, _ = routing
+    client.application.config['DB_READONLY_AUTOCOMMIT'] = False
+    client.get('/probe')
+    assert used() == ['replica']
+
+
+def test_read_only_session_is_released_before_the_response(routing):
+    client, _, checked_out = routing
+    client.get('/probe')
+    assert checked_out == [0]
+
+    # A streamed response keeps its session until it has been iterated
+    client.post('/probe')
+    response = client.get('/stream')
+    assert checked_out[1:] == [1, 1]
+    assert response.get_data(as_text=True) == '11'
@@ -0,0 +1,72 @@
+"""The NDJSON export: one line per recipe, a fixed number of queries per batch.
+
+The same stream is served by GET /api/export/recipes.ndjson and written by
+``flask export-recipes``; compressing the response must leave it intact.
+"""
+import gzip
+import json
+import pytest
+
+
+@pytest.fixture
+def recipe_ids(app, dataset):
+    from db import db
+    from models import Recipe
+    with app.app_context():
+        return [id for id, in db.session.query(Recipe.id).order_by(Recipe.id)]
+
+
+def _parse(text):
+    assert text.endswith('\n')
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_export_has_one_line_per_recipe(client, recipe_ids):
+    response = client.get('/api/export/recipes.ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    recipes = _parse(response.get_data(as_text=True))
+    assert [recipe['id'] for recipe in recipes] == recipe_ids
+
+
+def test_exported_recipe_matches_to_dict(app, client, dataset):
+    from models import Recipe
+    first = json.loads(client.get('/api/export/recipes.ndjson').get_data(as_text=True).split('\n', 1)[0])
+    with app.app_context():
+        recipe = Recipe.query.order_by(Recipe.id).first()
+        expected = json.loads(app.json.dumps(recipe.to_dict(include_steps=True, include_votes=True)))
+    assert first == expected
+    assert first['steps'] and first['steps'][0]['ingredients']
+
+
+def test_queries_grow_with_batches_not_recipes(app, recipe_ids, query_counter):
+    from utils.export import iter_recipes
+    counts = {}
+    for batch_size in (50, 100, 250):
+        with app.app_context(), query_counter() as queries:
+            assert sum(1 for _ in iter_recipes(batch_size)) == len(recipe_ids)
+        # yield_per: the recipe rows are read with one statement, whatever the batch size
+        assert sum(n for shape, n in queries.shapes().items() if 'ORDER BY recipes.id' in shape) == 1
+        batches = -(-len(recipe_ids) // batch_size)
+        counts[batches] = queries.count
+
+    (many, most), (fewer, middle), (fewest, least) = sorted(counts.items(), reverse=True)
+    per_batch = (most - middle) / (many - fewer)
+    assert per_batch == (middle - least) / (fewer - fewest), counts
+    assert per_batch <= 6, counts
+
+
+def test_compressed_export_is_intact(client, recipe_ids):
+    plain = client.get('/api/export/recipes.ndjson').get_data()
+    response = client.get('/api/export/recipes.ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_export_command(app, recipe_ids, tmp_path):
+    output = tmp_path / 'recipes.ndjson'
+    result = app.test_cli_runner().invoke(args=['export-recipes', '--output', str(output), '--batch-size', '120'])
+    assert result.exit_code == 0, result.output
+    assert f'Exported {len(recipe_ids)} recipes' in result.output
+    assert [recipe['id'] for recipe in _parse(output.read_text(encoding='utf-8'))] == recipe_ids
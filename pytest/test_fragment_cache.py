@@ -0,0 +1,104 @@
+"""``{% cache %}`` serves stored output until its key changes or a tag is invalidated.
+
+Posting a comment must drop the recipe's cached thread through the
+``comments:<recipe_id>`` tag, and every lookup is counted in /metrics.
+"""
+import pytest
+
+TEMPLATE = "{% cache ['counter', name], ['counter:' ~ name] %}{{ render() }}{% endcache %}"
+
+
+@pytest.fixture
+def render(app):
+    """Render TEMPLATE for name; returns (output, number of times the block body ran)."""
+    from flask import render_template_string
+    calls = []
+
+    def body():
+        calls.append(1)
+        return len(calls)
+
+    def do_render(name):
+        with app.test_request_context('/'):
+            return render_template_string(TEMPLATE, name=name, render=body), len(calls)
+
+    yield do_render
+    with app.app_context():
+        app.extensions['cache'].invalidate_tags('counter:a', 'counter:b')
+
+
+def test_cached_output_is_returned(render):
+    assert render('a') == ('1', 1)
+    assert render('a') == ('1', 1)
+    assert render('b') == ('2', 2)
+
+
+def test_tag_invalidation_renders_again(app, render):
+    assert render('a') == ('1', 1)
+    app.extensions['cache'].invalidate_tags('counter:a')
+    assert render('a') == ('2', 2)
+    assert render('b') == ('3', 3)
+
+
+def test_disabled_fragment_cache_renders_every_time(app, render, monkeypatch):
+    monkeypatch.setitem(app.config, 'FRAGMENT_CACHE', False)
+    assert render('a') == ('1', 1)
+    assert render('a') == ('2', 2)
+
+
+def test_lookups_are_counted(client, dataset, cache_lookups):
+    # A page no other test renders, so its thread is not cached yet
+    url = '/recipe/3'
+    before = cache_lookups('fragment')
+    first = client.get(url)
+    assert first.status_code == 200
+    assert cache_lookups('fragment') == {'hit': before['hit'], 'miss': before['miss'] + 1}
+
+    second = client.get(url)
+    assert second.data == first.data
+    assert cache_lookups('fragment') == {'hit': before['hit'] + 1, 'miss': before['miss'] + 1}
+
+
+def _thread_key(app, recipe_id):
+    """The cache key comment_component.html uses; it is the same for every viewer."""
+    from db import db
+    from models import Comment
+    with app.app_context():
+        count, updated = db.session.query(db.func.count(Comment.id), db.func.max(Comment.updated_at)) \
+            .filter(Comment.recipe_id == recipe_id).one()
+    return ('fragment', 'comment_thread', recipe_id, count, updated)
+
+
+def test_thread_is_shared_between_viewers(app, client, dataset, login):
+    recipe_id = 5
+    assert app.test_client().get(f'/recipe/{recipe_id}').status_code == 200
+    key = _thread_key(app, recipe_id)
+    cache = app.extensions['cache']
+    cache.set(key, '<p>Thread rendered for someone else</p>')
+    try:
+        login()
+        assert b'Thread rendered for someone else' in client.get(f'/recipe/{recipe_id}').data
+    finally:
+        cache.delete(key)
+
+
+def test_posting_a_comment_invalidates_the_thread(app, client, dataset, login):
+    recipe_id = 4
+    anonymous = app.test_client()
+    assert anonymous.get(f'/recipe/{recipe_id}').status_code == 200
+    key = _thread_key(app, recipe_id)
+    cache = app.extensions['cache']
+    assert cache.get(key) is not None
+
+    login()
+    response = client.post(f'/api/recipes/{recipe_id}/comments', json={'content': 'Fresh from the test oven'})
+    assert response.status_code == 201
+    try:
+        assert cache.get(key) is None
+        assert b'Fresh from the test oven' in anonymous.get(f'/recipe/{recipe_id}').data
+    finally:
+        from db import db
+        from models import Comment
+        with app.app_context():
+            db.session.delete(db.session.get(Comment, response.get_json()['id']))
+            db.session.commit()
@@ -0,0 +1,123 @@
+"""import_recipes.py: records are validated one by one, and a checkpoint resumes the import.
+
+A record with a value that does not fit its column is reported and skipped;
+it must not abort the batch it was read with.
+"""
+import json
+from decimal import Decimal
+import pytest
+
+
+@pytest.fixture
+def importer(app):
+    # Imported after the app fixture has pointed DATABASE_URL at the test database
+    import import_recipes
+    return import_recipes
+
+
+@pytest.fixture
+def postgres(app):
+    from db import db
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            pytest.skip('requires PostgreSQL')
+
+
+def _record(title, **step):
+    return {'title': title, 'country': 'Country 1', 'state': 'State 1',
+            'steps': [{'step_number': 1, 'instruction': 'Cook.', 'ingredients': [{'name': 'salt'}], **step}]}
+
+
+def _write(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+@pytest.fixture
+def imported(app):
+    """Titles created by a test; their recipes are deleted afterwards."""
+    titles = []
+    yield titles
+    from db import db
+    from models import Recipe
+    with app.app_context():
+        db.session.execute(Recipe.__table__.delete().where(Recipe.title.in_(titles)))
+        db.session.commit()
+
+
+def _titles(app, prefix):
+    from db import db
+    from models import Recipe
+    with app.app_context():
+        return {title for title, in db.session.query(Recipe.title).filter(Recipe.title.like(prefix + '%'))}
+
+
+def test_prepare_coerces_values(importer):
+    record = importer.prepare(json.dumps({
+        'title': '  Borscht  ', 'username': ' perf_user ',
+        'steps': [{'step_number': '2', 'instruction': 'Simmer.', 'duration_minutes': 30.0},
+                  {'step_number': 1, 'step_text': 'Chop.', 'ingredients': [
+                      {'name': 'beet', 'quantity': '2.254', 'unit': 'kg'}, {'name': 'dill', 'amount': '3 sprigs'}]}],
+    }))
+    assert record['title'] == 'Borscht' and record['username'] == 'perf_user'
+    assert [step[:4] for step in record['steps']] == [(1, 'Chop.', None, None), (2, 'Simmer.', None, 30)]
+    assert record['steps'][0][4] == [('beet', Decimal('2.25'), 'kg', None, 0),
+                                     ('dill', Decimal('3.00'), 'sprigs', None, 1)]
+
+
+@pytest.mark.parametrize('step, message', [
+    ({'duration_minutes': 'ten'}, 'duration_minutes'),
+    ({'duration_minutes': 1.5}, 'duration_minutes'),
+    ({'step_number': True}, 'step_number'),
+    ({'image_url': 'https://example.com/' + 'x' * 500}, 'image_url'),
+    ({'ingredients': [{'name': 'salt', 'unit': 'u' * 51}]}, 'unit'),
+    ({'ingredients': [{'name': 'salt', 'quantity': '1e12'}]}, 'quantity'),
+    ({'ingredients': [{'name': 'salt', 'quantity': [1]}]}, 'quantity'),
+    ({'ingredients': ['salt']}, 'ingredient'),
+    ({'ingredients': {'name': 'salt'}}, 'ingredients'),
+])
+def test_prepare_rejects_values_that_do_not_fit(importer, step, message):
+    with pytest.raises(ValueError, match=message):
+        importer.prepare(_record('Bad recipe', **step))
+
+
+def test_prepare_rejects_long_names(importer):
+    with pytest.raises(ValueError, match='username'):
+        importer.prepare({**_record('Bad recipe'), 'username': 'u' * 81})
+    with pytest.raises(ValueError, match='country'):
+        importer.prepare({**_record('Bad recipe'), 'country': 'c' * 101})
+
+
+def test_bad_records_are_skipped(app, dataset, importer, postgres, imported, tmp_path, capsys):
+    records = [_record('Validated import 1'),
+               _record('Validated import 2', duration_minutes='ten'),
+               _record('Validated import 3', ingredients=[{'name': 'salt', 'unit': 'u' * 60}]),
+               _record('Validated import 4', image_url='https://example.com/' + 'x' * 500),
+               _record('Validated import 5', duration_minutes='15')]
+    imported += [record['title'] for record in records]
+    path = _write(tmp_path / 'recipes.ndjson', records)
+
+    assert importer.import_recipes(path, batch_size=10, default_user=dataset['username'])
+    assert _titles(app, 'Validated import') == {'Validated import 1', 'Validated import 5'}
+    output = capsys.readouterr().out
+    assert 'Skipped/Failed: 3' in output
+    assert "recipe 'Validated import 2'" in output
+
+
+def test_import_resumes_from_checkpoint(app, dataset, importer, postgres, imported, tmp_path):
+    records = [_record(f'Resumed import {i}') for i in range(5)]
+    imported += [record['title'] for record in records]
+    path = _write(tmp_path / 'recipes.ndjson', records)
+    checkpoint = str(tmp_path / 'recipes.checkpoint')
+
+    # As if a previous run had committed the first three records and stopped
+    importer.save_checkpoint(checkpoint, path, 3)
+    assert importer.import_recipes(path, batch_size=2, checkpoint_path=checkpoint,
+                                   default_user=dataset['username'])
+    assert _titles(app, 'Resumed import') == {'Resumed import 3', 'Resumed import 4'}
+    assert not (tmp_path / 'recipes.checkpoint').exists()
+
+    # A checkpoint written for another file is refused
+    importer.save_checkpoint(checkpoint, path, 1)
+    with pytest.raises(SystemExit):
+        importer.import_recipes(_write(tmp_path / 'other.ndjson', records[:1]), checkpoint_path=checkpoint)
@@ -0,0 +1,83 @@
+"""FastJSONProvider must produce the same valid JSON with every encoder.
+
+Fragments are spliced into the output unchanged, and datetimes and Decimals
+are written the same way whether orjson or the standard library encodes.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from flask import Flask, jsonify
+from utils.json_provider import Fragment, init_json, orjson
+
+CREATED = datetime(2024, 5, 17, 12, 30, 15, 250000)
+CARD = {'id': 7, 'title': 'Pierogi – "ruskie"', 'created_at': CREATED.isoformat(), 'tags': ['a\u0000b', None]}
+
+ENCODERS = ['json']
+if orjson is not None:
+    ENCODERS += ['orjson-spliced']
+    if hasattr(orjson, 'Fragment'):
+        ENCODERS += ['orjson-native']
+
+
+@pytest.fixture(params=ENCODERS)
+def json_app(request, monkeypatch):
+    if request.param == 'orjson-spliced' and hasattr(orjson, 'Fragment'):
+        # Exercise the placeholder path of orjson releases without orjson.Fragment
+        monkeypatch.delattr(orjson, 'Fragment')
+    app = Flask(__name__)
+    app.config['JSON_ENCODER'] = 'json' if request.param == 'json' else 'orjson'
+    init_json(app)
+    return app
+
+
+def _document():
+    card = Fragment(json.dumps(CARD, sort_keys=True))
+    return {
+        'cards': [card, Fragment(b'{"id":8}'), card],
+        'featured': card,
+        'created_at': CREATED,
+        'day': date(2024, 5, 17),
+        'quantity': Decimal('2.50'),
+        'scores': {'b': Decimal('-1'), 'a': 3},
+    }
+
+
+def _expected():
+    return {
+        'cards': [CARD, {'id': 8}, CARD],
+        'featured': CARD,
+        'created_at': '2024-05-17T12:30:15.250000',
+        'day': '2024-05-17',
+        'quantity': 2.5,
+        'scores': {'a': 3, 'b': -1.0},
+    }
+
+
+@pytest.mark.parametrize('indent', [False, True], ids=['compact', 'indented'])
+def test_fragments_are_spliced_into_valid_json(json_app, indent):
+    encoded = json_app.json.dumpb(_document(), indent=indent)
+    assert json.loads(encoded) == _expected()
+    assert b'\\u0000fragment' not in encoded
+
+
+def test_fragment_bytes_are_kept_verbatim(json_app):
+    data = b'{"z":1,  "a":[1.10,"\\u00e9"]}'
+    assert json_app.json.dumpb({'x': Fragment(data)}) == b'{"x":' + data + b'}'
+
+
+def test_encoders_agree():
+    outputs = set()
+    for encoder in ['json', 'orjson'] if orjson is not None else ['json']:
+        app = Flask(__name__)
+        app.config['JSON_ENCODER'] = encoder
+        init_json(app)
+        outputs.add(app.json.dumpb(_document()))
+    assert len(outputs) == 1
+
+
+def test_jsonify_response(json_app):
+    with json_app.test_request_context('/'):
+        response = jsonify(_document())
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == _expected()
@@ -0,0 +1,99 @@
+"""MessagePack negotiation: Accept picks the response encoding, Content-Type the body's.
+
+The payload must be the same in both encodings; pages outside /api/ always
+stay JSON.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from flask import Flask, jsonify, request
+from utils import msgpack_format
+from utils.json_provider import Fragment, init_json
+from utils.msgpack_format import MSGPACK_MIMETYPE, init_msgpack
+
+msgpack = pytest.importorskip('msgpack')
+
+PAYLOAD = {'created_at': datetime(2024, 5, 17, 12, 30), 'quantity': Decimal('1.25'),
+           'card': Fragment(b'{"id":7,"title":"Soup"}'), 'tags': ['a', None]}
+DECODED = {'created_at': '2024-05-17T12:30:00', 'quantity': 1.25, 'card': {'id': 7, 'title': 'Soup'},
+           'tags': ['a', None]}
+
+
+@pytest.fixture
+def msgpack_client():
+    app = Flask(__name__)
+    init_json(app)
+    init_msgpack(app)
+
+    @app.route('/api/item', methods=['GET', 'POST'])
+    def item():
+        if request.method == 'POST':
+            return jsonify({'received': request.get_json()})
+        return jsonify(PAYLOAD)
+
+    @app.route('/page')
+    def page():
+        return jsonify(PAYLOAD)
+
+    return app.test_client()
+
+
+@pytest.mark.parametrize('accept', [MSGPACK_MIMETYPE, 'application/x-msgpack',
+                                    'application/json;q=0.5, application/msgpack'])
+def test_msgpack_response_when_preferred(msgpack_client, accept):
+    response = msgpack_client.get('/api/item', headers={'Accept': accept})
+    assert response.mimetype == MSGPACK_MIMETYPE
+    assert msgpack.unpackb(response.data) == DECODED
+    assert 'Accept' in response.vary
+
+
+@pytest.mark.parametrize('accept', [None, 'application/json', '*/*',
+                                    'application/msgpack;q=0.5, application/json'])
+def test_json_response_otherwise(msgpack_client, accept):
+    response = msgpack_client.get('/api/item', headers={'Accept': accept} if accept else {})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == DECODED
+    assert 'Accept' in response.vary
+
+
+def test_only_api_responses_are_negotiated(msgpack_client):
+    response = msgpack_client.get('/page', headers={'Accept': MSGPACK_MIMETYPE})
+    assert response.mimetype == 'application/json'
+    assert 'Accept' not in response.vary
+
+
+def test_msgpack_request_body(msgpack_client):
+    body = msgpack.packb({'title': 'Soup', 'steps': [1, 2]})
+    response = msgpack_client.post('/api/item', data=body, content_type=MSGPACK_MIMETYPE)
+    assert response.status_code == 200
+    assert response.get_json() == {'received': {'title': 'Soup', 'steps': [1, 2]}}
+
+
+def test_malformed_msgpack_body_is_a_400(msgpack_client):
+    response = msgpack_client.post('/api/item', data=b'\xc1', content_type=MSGPACK_MIMETYPE)
+    assert response.status_code == 400
+
+
+def test_msgpack_disabled(msgpack_client):
+    msgpack_client.application.config['MSGPACK'] = False
+    response = msgpack_client.get('/api/item', headers={'Accept': MSGPACK_MIMETYPE})
+    assert response.mimetype == 'application/json'
+    response = msgpack_client.post('/api/item', data=msgpack.packb({}), content_type=MSGPACK_MIMETYPE)
+    assert response.status_code == 415
+
+
+def test_api_payload_matches_json(client, dataset):
+    url = f"/api/recipes/{dataset['recipe_id']}"
+    as_json = client.get(url).get_json()
+    response = client.get(url, headers={'Accept': MSGPACK_MIMETYPE})
+    assert response.mimetype == MSGPACK_MIMETYPE
+    assert msgpack_format.unpackb(response.data) == as_json
+
+
+def test_login_with_msgpack_body(client, dataset):
+    from conftest import DATASET_PASSWORD
+    response = client.post('/api/login', content_type=MSGPACK_MIMETYPE, headers={'Accept': MSGPACK_MIMETYPE},
+                           data=msgpack.packb({'username': dataset['username'], 'password': DATASET_PASSWORD}))
+    assert response.status_code == 200
+    assert msgpack_format.unpackb(response.data)['username'] == dataset['username']
@@ -0,0 +1,102 @@
+"""Performance contract: SQL statement and latency budgets per endpoint.
+
+Budgets apply to the fixed dataset of the ``dataset`` fixture. A change that
+makes an endpoint run more statements than its budget, or a page's statement
+count grow with its size (an N+1), fails the suite. Raise a budget only
+together with the change that needs it.
+
+Latency budgets are medians in milliseconds and deliberately loose; scale
+them for slow machines with SNACKLORE_PERF_LATENCY_FACTOR (default 1.0).
+"""
+import os
+import statistics
+import time
+from collections import namedtuple
+import pytest
+
+Contract = namedtuple('Contract', 'name url logged_in max_queries latency_ms')
+
+CONTRACTS = [
+    Contract('recipes', '/api/recipes', False, 6, 60),
+    Contract('recipes-logged-in', '/api/recipes', True, 9, 60),
+    Contract('recipe-detail', '/api/recipes/{recipe_id}', False, 11, 80),
+    Contract('recipe-detail-logged-in', '/api/recipes/{recipe_id}', True, 14, 80),
+    Contract('countries', '/api/countries', False, 11, 60),
+    Contract('search', '/api/search?q={search}', False, 6, 60),
+    Contract('home', '/api/home', False, 13, 80),
+    Contract('comments', '/api/recipes/{recipe_id}/comments', False, 7, 60),
+    Contract('comments-logged-in', '/api/recipes/{recipe_id}/comments', True, 10, 60),
+    Contract('favorites', '/api/users/{username}/favorites', False, 10, 60),
+]
+
+# List endpoints whose statement count must not depend on the page size
+PAGED = [
+    '/api/recipes?per_page={per_page}',
+    '/api/search?q={search}&per_page={per_page}',
+    '/api/states/{state_id}/recipes?per_page={per_page}',
+    '/api/recipes/{recipe_id}/comments?per_page={per_page}',
+    # One type only: a page with more types runs one more query per type
+    '/api/users/{username}/favorites?type=recipe&per_page={per_page}',
+]
+
+LATENCY_FACTOR = float(os.environ.get('SNACKLORE_PERF_LATENCY_FACTOR', '1.0'))
+LATENCY_RUNS = 15
+
+
+def _describe(queries):
+    """Statement shapes, most frequent first, for assertion messages."""
+    return '\n'.join(f'{n:>4}x {shape[:160]}' for shape, n in queries.shapes().most_common())
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize('contract', CONTRACTS, ids=lambda c: c.name)
+def test_query_budget(contract, client, dataset, login, query_counter):
+    if contract.logged_in:
+        login()
+    url = contract.url.format(**dataset)
+
+    with query_counter() as queries:
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert queries.count <= contract.max_queries, (
+        f'{url} ran {queries.count} SQL statements (budget {contract.max_queries}):\n{_describe(queries)}')
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize('url', PAGED)
+def test_queries_independent_of_page_size(url, client, dataset, login, query_counter):
+    login()
+    counts = []
+    for per_page in (2, 20):
+        with query_counter() as queries:
+            response = client.get(url.format(per_page=per_page, **dataset))
+        assert response.status_code == 200
+        counts.append((queries.count, queries))
+
+    (small, _), (large, large_queries) = counts
+    assert large == small, (
+        f'{url}: {small} statements for 2 items but {large} for 20 (N+1):\n{_describe(large_queries)}')
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.parametrize('contract', CONTRACTS, ids=lambda c: c.name)
+def test_latency_budget(contract, client, dataset, login):
+    if contract.logged_in:
+        login()
+    url = contract.url.format(**dataset)
+
+    # Warm up connections, caches and lazily compiled statements
+    for _ in range(3):
+        assert client.get(url).status_code == 200
+
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        start = time.perf_counter()
+        client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    median = statistics.median(timings)
+    budget = contract.latency_ms * LATENCY_FACTOR
+    assert median <= budget, f'{url} median {median:.1f} ms exceeds budget {budget:.0f} ms'
@@ -0,0 +1,83 @@
+"""?fields= and ?embed= narrow list responses; unknown names are a 400.
+
+A projected item must equal the full item restricted to the selected keys,
+so a projection never changes the values it keeps.
+"""
+import pytest
+
+# Every endpoint that accepts a projection, with the key holding its items
+RECIPE_LISTS = [
+    ('/api/recipes', 'items'),
+    ('/api/recipes/popular', None),
+    ('/api/recipes/recent', None),
+    ('/api/search?q={search}', 'results'),
+    ('/api/states/{state_id}/recipes', 'items'),
+    ('/api/countries/{country_id}/recipes', 'items'),
+    ('/api/users/{username}/recipes', 'items'),
+]
+COMMENT_LIST = '/api/recipes/{recipe_id}/comments'
+ENDPOINTS = [url for url, _ in RECIPE_LISTS] + [COMMENT_LIST]
+
+
+def _get(client, dataset, url, params):
+    url = url.format(**dataset)
+    response = client.get(url + ('&' if '?' in url else '?') + params)
+    return response.status_code, response.get_json()
+
+
+def _items(body, key):
+    return body if key is None else body[key]
+
+
+def _restrict(item, keys):
+    return {key: value for key, value in item.items() if key in keys}
+
+
+@pytest.mark.parametrize('url,key', RECIPE_LISTS)
+def test_recipe_fields_select_keys(client, dataset, url, key):
+    _, full = _get(client, dataset, url, 'per_page=5&limit=5')
+    status, body = _get(client, dataset, url, 'per_page=5&limit=5&fields=title,score,author')
+    assert status == 200
+    items = _items(body, key)
+    assert items
+    assert items == [_restrict(item, {'id', 'title', 'score', 'author'}) for item in _items(full, key)]
+
+
+def test_empty_embed_drops_nested_objects(client, dataset):
+    status, body = _get(client, dataset, '/api/recipes', 'per_page=5&fields=title,author,state&embed=')
+    assert status == 200
+    assert all(set(item) == {'id', 'title'} for item in body['items'])
+
+
+def test_nested_embed(client, dataset):
+    _, full = _get(client, dataset, '/api/recipes', 'per_page=5')
+    status, body = _get(client, dataset, '/api/recipes', 'per_page=5&fields=state&embed=state.country')
+    assert status == 200
+    assert body['items'] == [{'id': item['id'], 'state': item['state']} for item in full['items']]
+    assert all('country' in item['state'] for item in body['items'])
+
+    _, body = _get(client, dataset, '/api/recipes', 'per_page=5&fields=state&embed=state')
+    assert all('country' not in item['state'] for item in body['items'])
+
+
+def test_comment_fields_apply_to_replies(client, dataset):
+    _, full = _get(client, dataset, COMMENT_LIST, 'per_page=5')
+    status, body = _get(client, dataset, COMMENT_LIST, 'per_page=5&fields=content,replies')
+    assert status == 200
+    expected = [{'id': item['id'], 'content': item['content'],
+                 'replies': [_restrict(reply, {'id', 'content'}) for reply in item['replies']]}
+                for item in full['items']]
+    assert body['items'] == expected
+    assert any(item['replies'] for item in body['items'])
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+@pytest.mark.parametrize('params,message', [
+    ('fields=id,bogus', 'Unknown fields: bogus'),
+    ('embed=author.country', 'Unknown embeds: author.country'),
+])
+def test_unknown_names_are_rejected(client, dataset, url, params, message):
+    status, body = _get(client, dataset, url, params)
+    assert status == 400
+    assert body['error'] == 'ValidationError'
+    assert body['details'][0].startswith(message)
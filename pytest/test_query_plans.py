@@ -0,0 +1,213 @@
+"""EXPLAIN plan checks for the hot query shapes (PostgreSQL only).
+
+Each case builds a query the way its route does and explains it on the
+``dataset`` fixture with sequential scans disabled, so the planner picks an
+index whenever one can serve the query however small the tables are. With
+seq scans off the planner would rather walk a whole unrelated index (the
+primary key) than fall back to a Seq Scan, so the absence of a Seq Scan
+proves nothing by itself. Each case therefore names, per table, the column
+the index it is read through must start with, and that index must either
+be searched on that column (it appears in the index condition) or, for
+cases that expect index order, be walked in order. Cases that expect index
+order run with sorts disabled, so a remaining Sort means no index provides
+the order. Any failure means an index in the models or in boot/init_db.sql
+no longer covers the query.
+
+Search (``ILIKE '%term%'``) cannot use a b-tree index at all, so only the
+state filter of a search within a state is checked.
+
+Every case runs against the indexes declared by the models (``db.create_all``)
+and against those of boot/init_db.sql, which production uses. Set
+SNACKLORE_PLAN_DIR to also write each plan there for review.
+"""
+import json
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+import pytest
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+INIT_SQL = Path(__file__).resolve().parent.parent / 'boot' / 'init_db.sql'
+PLAN_DIR = os.environ.get('SNACKLORE_PLAN_DIR')
+
+SCAN_NODES = {'Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+SORT_NODES = {'Sort', 'Incremental Sort'}
+
+# index_columns: table -> leading column of the index every scan of that
+# table must use; allow_sort permits Sort nodes (otherwise sorts are disabled)
+PlanCase = namedtuple('PlanCase', 'name build index_columns allow_sort')
+
+
+def _search_filter(ids):
+    from models import Recipe
+    term = f"%{ids['search']}%"
+    return Recipe.query.filter(Recipe.title.ilike(term) | Recipe.description.ilike(term) | Recipe.instructions.ilike(term))
+
+
+def _search_in_state(ids):
+    from models import Recipe
+    return _search_filter(ids).filter_by(state_id=ids['state_id']).order_by(Recipe.created_at.desc()).limit(20)
+
+
+def _country_recipes(ids):
+    from models import Recipe, CountryState
+    return Recipe.query.join(CountryState).filter(
+        CountryState.country_id == ids['country_id']
+    ).order_by(Recipe.created_at.desc()).limit(20)
+
+
+def _state_recipes(ids):
+    from models import Recipe
+    return Recipe.query.filter_by(state_id=ids['state_id']).order_by(Recipe.created_at.desc()).limit(20)
+
+
+def _country_states(ids):
+    from models import CountryState
+    return CountryState.query.filter_by(country_id=ids['country_id']).order_by(CountryState.name.asc())
+
+
+def _recipe_vote_counts(ids):
+    from db import db
+    from models import RecipeVote
+    return db.session.query(RecipeVote.recipe_id, RecipeVote.vote_type, func.count()).filter(
+        RecipeVote.recipe_id.in_(list(range(1, 21)))
+    ).group_by(RecipeVote.recipe_id, RecipeVote.vote_type)
+
+
+def _recipe_user_votes(ids):
+    from db import db
+    from models import RecipeVote
+    return db.session.query(RecipeVote.recipe_id, RecipeVote.vote_type).filter(
+        RecipeVote.user_id == 1, RecipeVote.recipe_id.in_(list(range(1, 21))))
+
+
+def _comment_vote_counts(ids):
+    from db import db
+    from models import CommentVote
+    return db.session.query(CommentVote.comment_id, CommentVote.vote_type, func.count()).filter(
+        CommentVote.comment_id.in_(list(range(1, 21)))
+    ).group_by(CommentVote.comment_id, CommentVote.vote_type)
+
+
+def _comment_thread(ids):
+    from models import Comment
+    return Comment.query.filter_by(recipe_id=ids['recipe_id'], parent_id=None).order_by(
+        Comment.created_at.asc()).limit(20)
+
+
+def _comment_replies(ids):
+    from models import Comment
+    return Comment.query.filter(Comment.parent_id.in_(list(range(1, 31)))).order_by(Comment.created_at)
+
+
+CASES = [
+    PlanCase('search-in-state', _search_in_state, {'recipes': 'state_id'}, False),
+    # Newest recipes first: walk recipes in created_at order, look up each state by id
+    PlanCase('country-recipes', _country_recipes, {'recipes': 'created_at', 'country_states': 'id'}, False),
+    PlanCase('state-recipes', _state_recipes, {'recipes': 'state_id'}, False),
+    PlanCase('country-states', _country_states, {'country_states': 'country_id'}, True),
+    PlanCase('recipe-vote-counts', _recipe_vote_counts, {'recipe_votes': 'recipe_id'}, True),
+    PlanCase('recipe-user-votes', _recipe_user_votes, {'recipe_votes': 'user_id'}, False),
+    PlanCase('comment-vote-counts', _comment_vote_counts, {'comment_votes': 'comment_id'}, True),
+    PlanCase('comment-thread', _comment_thread, {'comments': 'recipe_id'}, False),
+    PlanCase('comment-replies', _comment_replies, {'comments': 'parent_id'}, True),
+]
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _nodes(child)
+
+
+def _render(plan, depth=0):
+    """Compact text form of a JSON plan: node type, relation and index per line."""
+    line = '  ' * depth + plan['Node Type']
+    if 'Relation Name' in plan:
+        line += f" on {plan['Relation Name']}"
+    if 'Index Name' in plan:
+        line += f" using {plan['Index Name']}"
+    for key in ('Index Cond', 'Recheck Cond', 'Sort Key', 'Filter'):
+        if key in plan:
+            line += f' [{key}: {plan[key]}]'
+    return '\n'.join([line] + [_render(child, depth + 1) for child in plan.get('Plans', [])])
+
+
+@pytest.fixture(params=['models', 'init_db.sql'])
+def plan_connection(request, app, dataset):
+    """Connection in a transaction with seq scans disabled, rolled back afterwards."""
+    from db import db
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            pytest.skip('query plans are only checked on PostgreSQL')
+        with db.engine.connect() as conn:
+            transaction = conn.begin()
+            if request.param == 'init_db.sql':
+                # Swap the model-declared indexes for the production schema's (DDL rolls back)
+                for table in db.metadata.sorted_tables:
+                    for index in table.indexes:
+                        conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{index.name}"')
+                conn.exec_driver_sql(INIT_SQL.read_text())
+            conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            yield request.param, conn
+            transaction.rollback()
+
+
+def _index_reads(node):
+    """(index name, index condition or None) for each index a scan node reads its table through."""
+    if node['Node Type'] == 'Bitmap Heap Scan':
+        return [(child['Index Name'], child.get('Index Cond')) for child in _nodes(node)
+                if child['Node Type'] == 'Bitmap Index Scan']
+    return [(node['Index Name'], node.get('Index Cond'))]
+
+
+def _leading_column(conn, index_name):
+    return conn.exec_driver_sql(
+        "SELECT a.attname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0] "
+        "WHERE c.relname = %(name)s", {'name': index_name}).scalar()
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize('case', CASES, ids=lambda c: c.name)
+def test_query_plan(case, plan_connection, app, dataset):
+    schema, conn = plan_connection
+    if not case.allow_sort:
+        conn.exec_driver_sql('SET LOCAL enable_sort = off')
+    with app.app_context():
+        query = case.build(dataset)
+        sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]['Plan']
+    rendered = _render(root)
+
+    if PLAN_DIR:
+        os.makedirs(PLAN_DIR, exist_ok=True)
+        with open(os.path.join(PLAN_DIR, f'{schema}-{case.name}.txt'), 'w') as f:
+            f.write(f'{sql}\n\n{rendered}\n')
+
+    scans = {}
+    for node in _nodes(root):
+        if node['Node Type'] in SCAN_NODES and 'Relation Name' in node:
+            scans.setdefault(node['Relation Name'], []).append(node)
+    seq_scans = sorted(table for table, nodes in scans.items() if any(n['Node Type'] == 'Seq Scan' for n in nodes))
+    assert not seq_scans, f'{case.name} ({schema}): sequential scan on {", ".join(seq_scans)}\n{rendered}'
+    for table, column in case.index_columns.items():
+        assert table in scans, f'{case.name} ({schema}): {table} is not scanned\n{rendered}'
+        for node in scans[table]:
+            for index_name, condition in _index_reads(node):
+                leading = _leading_column(conn, index_name)
+                assert leading == column, (
+                    f'{case.name} ({schema}): {table} is read through {index_name} ({leading}), '
+                    f'not an index on {column}\n{rendered}')
+                # Without a condition the index is walked whole, which only helps when it provides the order
+                searched = condition and re.search(rf'\b{column}\b', condition)
+                assert searched or not case.allow_sort, (
+                    f'{case.name} ({schema}): {index_name} is scanned in full, not searched on {column}\n{rendered}')
+    if not case.allow_sort:
+        sorts = [node for node in _nodes(root) if node['Node Type'] in SORT_NODES]
+        assert not sorts, f'{case.name} ({schema}): sort instead of index order\n{rendered}'
@@ -0,0 +1,19 @@
+"""Cursor-event timers must not leak start times when a statement fails."""
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+
+def _fail(conn, times=3):
+    for _ in range(times):
+        with pytest.raises(DBAPIError):
+            conn.exec_driver_sql('SELECT * FROM no_such_table')
+        conn.rollback()
+
+
+def test_failed_statements_leave_no_timers(app):
+    from db import db
+    with app.app_context(), db.engine.connect() as conn:
+        _fail(conn)
+        conn.exec_driver_sql('SELECT 1')
+        assert conn.info['_metrics_query_start'] == []
+        assert conn.info['_slow_query_start'] == []
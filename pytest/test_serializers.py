@@ -0,0 +1,117 @@
+"""The FieldPlan serializers must produce exactly what the models' to_dict methods do.
+
+Each test serializes the same rows both ways on the ``dataset`` fixture and
+compares the dicts, so any drift between a plan and its model shows up here
+rather than in API responses.
+"""
+import pytest
+
+RECIPE_IDS = list(range(1, 41))
+VIEWER_ID = 1
+
+
+@pytest.fixture
+def ctx(app, dataset):
+    with app.app_context():
+        yield
+
+
+def _recipe_rows(ids=RECIPE_IDS):
+    from models import Recipe
+    from utils.serializers import RECIPE_PLAN
+    return RECIPE_PLAN.select(Recipe.query.filter(Recipe.id.in_(ids)).order_by(Recipe.id)).all()
+
+
+def _top_level_comment_rows(recipe_id):
+    from models import Comment
+    from utils.serializers import COMMENT_PLAN
+    return COMMENT_PLAN.select(Comment.query.filter_by(recipe_id=recipe_id, parent_id=None)
+                               .order_by(Comment.created_at)).all()
+
+
+@pytest.mark.parametrize('user_id', [None, VIEWER_ID], ids=['anonymous', 'logged-in'])
+def test_recipes_match_to_dict(ctx, user_id):
+    from models import Recipe
+    from utils.serializers import Serializer
+    expected = [recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id)
+                for recipe in Recipe.query.filter(Recipe.id.in_(RECIPE_IDS)).order_by(Recipe.id)]
+    assert Serializer(user_id).recipes(_recipe_rows()) == expected
+
+
+def test_recipes_without_votes_match_to_dict(ctx):
+    from models import Recipe
+    from utils.serializers import Serializer
+    expected = [recipe.to_dict(include_steps=False)
+                for recipe in Recipe.query.filter(Recipe.id.in_(RECIPE_IDS)).order_by(Recipe.id)]
+    assert Serializer().recipes(_recipe_rows(), include_votes=False) == expected
+
+
+def test_steps_match_to_dict(ctx):
+    from models import Recipe, RecipeStep
+    from utils.serializers import Serializer
+    expected = {recipe.id: [step.to_dict() for step in recipe.steps.order_by(RecipeStep.step_number)]
+                for recipe in Recipe.query.filter(Recipe.id.in_(RECIPE_IDS))}
+    assert Serializer().steps(RECIPE_IDS) == expected
+
+
+@pytest.mark.parametrize('user_id', [None, VIEWER_ID], ids=['anonymous', 'logged-in'])
+def test_comments_with_replies_match_to_dict(ctx, dataset, user_id):
+    from models import Comment
+    from utils.serializers import Serializer
+    recipe_id = dataset['recipe_id']
+    expected = [comment.to_dict(include_votes=True, user_id=user_id) for comment in
+                Comment.query.filter_by(recipe_id=recipe_id, parent_id=None).order_by(Comment.created_at)]
+    assert any(comment['replies'] for comment in expected), 'dataset should include replies'
+    assert Serializer(user_id).comments(_top_level_comment_rows(recipe_id)) == expected
+
+
+def test_comments_without_replies_match_to_dict(ctx, dataset):
+    from models import Comment
+    from utils.serializers import Serializer
+    recipe_id = dataset['recipe_id']
+    expected = [comment.to_dict(include_replies=False) for comment in
+                Comment.query.filter_by(recipe_id=recipe_id, parent_id=None).order_by(Comment.created_at)]
+    rows = _top_level_comment_rows(recipe_id)
+    assert Serializer().comments(rows, include_replies=False, include_votes=False) == expected
+
+
+def test_recipe_scores_match_vote_counts(ctx):
+    from models import Recipe
+    from utils.serializers import Serializer
+    expected = {recipe.id: recipe.get_vote_counts()['score']
+                for recipe in Recipe.query.filter(Recipe.id.in_(RECIPE_IDS))}
+    assert any(expected.values()), 'dataset should include votes'
+    assert Serializer().recipe_scores(RECIPE_IDS) == expected
+
+
+def test_states_and_countries_match_to_dict(ctx):
+    from models import Country, CountryState
+    from utils.serializers import COUNTRY_PLAN, STATE_PLAN, Serializer
+    states = CountryState.query.order_by(CountryState.id).all()
+    countries = Country.query.order_by(Country.id).all()
+    serializer = Serializer()
+    assert serializer.states(STATE_PLAN.select(CountryState.query.order_by(CountryState.id)).all()) == \
+        [state.to_dict() for state in states]
+    assert serializer.countries(COUNTRY_PLAN.select(Country.query.order_by(Country.id)).all()) == \
+        [country.to_dict() for country in countries]
+
+
+@pytest.mark.parametrize('user_id', [None, VIEWER_ID], ids=['anonymous', 'logged-in'])
+def test_recipe_detail_matches_to_dict(ctx, dataset, user_id):
+    from models import Recipe
+    from utils.serializers import Serializer
+    recipe_id = dataset['recipe_id']
+    expected = Recipe.query.get(recipe_id).to_dict(include_steps=True, include_comments=True, include_votes=True,
+                                                   user_id=user_id)
+    assert expected['steps'] and expected['comments'], 'dataset should include steps and comments'
+    assert Serializer(user_id).recipe(_recipe_rows([recipe_id])[0]) == expected
+
+
+def test_favorites_match_to_dict(ctx):
+    from models import Favorite
+    from utils.serializers import FAVORITE_PLAN, Serializer
+    favorites = Favorite.query.order_by(Favorite.id).all()
+    assert {favorite.favorite_type for favorite in favorites} >= {'recipe', 'user'}, \
+        'dataset should include favorites of several types'
+    rows = FAVORITE_PLAN.select(Favorite.query.order_by(Favorite.id)).all()
+    assert Serializer().favorites(rows) == [favorite.to_dict() for favorite in favorites]
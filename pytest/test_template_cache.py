@@ -0,0 +1,71 @@
+"""The template bytecode cache: compiled once, reused by new workers, recompiled after an edit."""
+import pytest
+from flask import Flask, render_template
+from utils.template_cache import compile_templates, init_template_cache
+
+
+@pytest.fixture
+def templates(tmp_path):
+    folder = tmp_path / 'templates'
+    folder.mkdir()
+    (folder / 'page.html').write_text('<h1>{{ title }}</h1>')
+    (folder / 'other.html').write_text('{% for i in range(3) %}{{ i }}{% endfor %}')
+    return folder
+
+
+def _worker(templates, cache_dir, monkeypatch):
+    """A fresh app, as in a newly started worker; returns (app, names of the templates it compiled)."""
+    app = Flask(__name__, template_folder=str(templates))
+    app.config['TEMPLATE_CACHE_DIR'] = str(cache_dir)
+    init_template_cache(app)
+    compiled = []
+    compile = app.jinja_env.compile
+
+    def counting_compile(source, name=None, filename=None, *args, **kwargs):
+        compiled.append(name)
+        return compile(source, name, filename, *args, **kwargs)
+
+    monkeypatch.setattr(app.jinja_env, 'compile', counting_compile)
+    return app, compiled
+
+
+def _render(app, name, **context):
+    with app.test_request_context():
+        return render_template(name, **context)
+
+
+def test_compiled_templates_are_written_and_reused(templates, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    app, compiled = _worker(templates, cache_dir, monkeypatch)
+    assert sorted(compile_templates(app)) == ['other.html', 'page.html']
+    assert sorted(compiled) == ['other.html', 'page.html']
+    entries = sorted(path.name for path in cache_dir.iterdir())
+    assert len(entries) == 2
+
+    app, compiled = _worker(templates, cache_dir, monkeypatch)
+    assert _render(app, 'page.html', title='Soup') == '<h1>Soup</h1>'
+    assert _render(app, 'other.html') == '012'
+    assert compiled == []
+    assert sorted(path.name for path in cache_dir.iterdir()) == entries
+
+
+def test_edited_template_is_recompiled(templates, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    compile_templates(_worker(templates, cache_dir, monkeypatch)[0])
+    (templates / 'page.html').write_text('<h2>{{ title }}</h2>')
+
+    app, compiled = _worker(templates, cache_dir, monkeypatch)
+    assert _render(app, 'page.html', title='Soup') == '<h2>Soup</h2>'
+    assert _render(app, 'other.html') == '012'
+    assert compiled == ['page.html']
+
+    # The rewritten entry is used by the next worker
+    app, compiled = _worker(templates, cache_dir, monkeypatch)
+    assert _render(app, 'page.html', title='Stew') == '<h2>Stew</h2>'
+    assert compiled == []
+
+
+def test_no_cache_without_directory(templates):
+    app = Flask(__name__, template_folder=str(templates))
+    init_template_cache(app)
+    assert app.jinja_env.bytecode_cache is None
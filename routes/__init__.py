@@ -13,6 +13,10 @@ from .search import search_bp
 from .countries import countries_bp
 from .states import states_bp
 from .home import home_bp
+from .metrics import metrics_bp
+from .admin import admin_bp
+from .export import export_bp
+from .changes import changes_bp
 
 
 def register_blueprints(app):
@@ -28,5 +32,9 @@ def register_blueprints(app):
     app.register_blueprint(countries_bp, url_prefix='/api')
     app.register_blueprint(states_bp, url_prefix='/api')
     app.register_blueprint(home_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
 
 
@@ -0,0 +1,98 @@
+"""Admin routes."""
+import os
+import time
+import tracemalloc
+from flask import Blueprint, request, jsonify
+from utils.auth import admin_required
+from utils.memory import rss_bytes, take_snapshot, get_snapshot, format_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+# tracemalloc snapshots live in the worker that took them; responses include
+# the pid so diffs can be matched to the worker holding the baseline.
+
+
+def _memory_status():
+    status = {'pid': os.getpid(), 'rss_bytes': rss_bytes(), 'tracing': tracemalloc.is_tracing()}
+    if status['tracing']:
+        current, peak = tracemalloc.get_traced_memory()
+        status['traced_bytes'] = current
+        status['traced_peak_bytes'] = peak
+    return status
+
+
+def _stats_params():
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    key_type = request.args.get('group_by', 'lineno')
+    if key_type not in ('lineno', 'filename', 'traceback'):
+        key_type = 'lineno'
+    return limit, key_type
+
+
+@admin_bp.route('/admin/memory', methods=['GET'])
+@admin_required
+def get_memory():
+    """Get memory usage of this worker and its largest allocation sites."""
+    status = _memory_status()
+    if status['tracing']:
+        limit, key_type = _stats_params()
+        snapshot = take_snapshot('latest')
+        status['top'] = format_stats(snapshot.statistics(key_type), limit)
+    return jsonify(status), 200
+
+
+@admin_bp.route('/admin/memory/snapshots', methods=['POST'])
+@admin_required
+def create_memory_snapshot():
+    """Store a tracemalloc snapshot of this worker to diff against later."""
+    if not tracemalloc.is_tracing():
+        return jsonify({'error': 'Conflict', 'message': 'Memory profiling is disabled (set MEMORY_PROFILING=1)'}), 409
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    name = data.get('name', 'baseline') if isinstance(data, dict) else None
+    if not isinstance(name, str) or not name.strip():
+        return jsonify({'error': 'ValidationError', 'message': 'Validation failed',
+                        'details': ['Body must be a JSON object whose name is a non-empty string']}), 400
+    snapshot = take_snapshot(name)
+
+    status = _memory_status()
+    status['name'] = name
+    status['snapshot_bytes'] = sum(stat.size for stat in snapshot.statistics('filename'))
+    return jsonify(status), 201
+
+
+@admin_bp.route('/admin/memory/diff', methods=['GET'])
+@admin_required
+def diff_memory_snapshots():
+    """Diff a stored snapshot against another one (default: a fresh snapshot)."""
+    if not tracemalloc.is_tracing():
+        return jsonify({'error': 'Conflict', 'message': 'Memory profiling is disabled (set MEMORY_PROFILING=1)'}), 409
+
+    base_name = request.args.get('base', 'baseline')
+    base = get_snapshot(base_name)
+    if base is None:
+        return jsonify({'error': 'NotFound', 'message': f'No snapshot named {base_name} in worker {os.getpid()}'}), 404
+
+    target_name = request.args.get('target')
+    if target_name:
+        target = get_snapshot(target_name)
+        if target is None:
+            return jsonify({'error': 'NotFound', 'message': f'No snapshot named {target_name} in worker {os.getpid()}'}), 404
+    else:
+        target_name = 'current'
+        target = (time.time(), take_snapshot('latest'))
+
+    limit, key_type = _stats_params()
+    stats = target[1].compare_to(base[1], key_type)
+
+    status = _memory_status()
+    status.update({
+        'base': base_name,
+        'target': target_name,
+        'seconds_between': round(target[0] - base[0], 3),
+        'size_diff_bytes': sum(stat.size_diff for stat in stats),
+        'top': format_stats(stats, limit),
+    })
+    return jsonify(status), 200
@@ -0,0 +1,26 @@
+"""Change feed routes."""
+from flask import Blueprint, request, jsonify, current_app
+from utils.change_feed import format_cursor, get_changes, latest_cursor, parse_cursor
+
+changes_bp = Blueprint('changes', __name__)
+
+
+@changes_bp.route('/changes', methods=['GET'])
+def get_change_feed():
+    """Get recipes, comments and votes created, updated or deleted after a cursor.
+
+    ``since=latest`` returns only the current cursor, for clients that
+    bootstrap from /api/export/recipes.ndjson and then follow the feed.
+    """
+    config = current_app.config
+    since = request.args.get('since', '0')
+    if since == 'latest':
+        return jsonify({'changes': [], 'cursor': latest_cursor(), 'has_more': False}), 200
+    position = parse_cursor(since)
+    if position is None:
+        return jsonify({'error': 'ValidationError', 'message': 'since must be a cursor from a previous response'}), 400
+    limit = request.args.get('limit', config['CHANGES_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, config['CHANGES_MAX_PAGE_SIZE']))
+
+    changes, cursor, has_more = get_changes(position, limit)
+    return jsonify({'changes': changes, 'cursor': format_cursor(cursor), 'has_more': has_more}), 200
@@ -5,6 +5,7 @@ from models.comment import Comment
 from models.recipe import Recipe
 from utils.auth import login_required, get_current_user
 from utils.validators import validate_comment_data
+from utils.serializers import Serializer, projection_or_400
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
 
 comments_bp = Blueprint('comments', __name__)
@@ -18,14 +19,17 @@ def get_comments(recipe_id):
     
     page, per_page = get_pagination_params()
     user_id = get_current_user().id if get_current_user() else None
+    projection, error = projection_or_400('comment')
+    if error:
+        return error
     
     # Get top-level comments (no parent)
     query = Comment.query.filter_by(recipe_id=recipe_id, parent_id=None)
     query = query.order_by(Comment.created_at.asc())
     
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(projection.plan.select(query), page, per_page)
     
-    comments = [comment.to_dict(include_replies=True, include_votes=True, user_id=user_id) for comment in items]
+    comments = Serializer(user_id).comments(items, projection=projection)
     
     return jsonify(format_pagination_response(comments, total, page, per_page, pages)), 200
 
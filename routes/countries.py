@@ -4,6 +4,7 @@ from db import db
 from models.country import Country
 from models.country_state import CountryState
 from models.recipe import Recipe
+from utils.serializers import STATE_PLAN, Serializer, projection_or_400
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
 from utils.auth import get_current_user
 
@@ -50,9 +51,9 @@ def get_country_states(country_id):
     """Get states for a country."""
     Country.query.get_or_404(country_id)
     
-    states = CountryState.query.filter_by(country_id=country_id).order_by(CountryState.name.asc()).all()
+    states = STATE_PLAN.select(CountryState.query.filter_by(country_id=country_id).order_by(CountryState.name.asc())).all()
     
-    return jsonify([state.to_dict() for state in states]), 200
+    return jsonify(Serializer().states(states)), 200
 
 
 @countries_bp.route('/countries/<int:country_id>/recipes', methods=['GET'])
@@ -63,14 +64,17 @@ def get_country_recipes(country_id):
     page, per_page = get_pagination_params()
     current_user = get_current_user()
     user_id = current_user.id if current_user else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
     # Get recipes via states
     query = Recipe.query.join(CountryState).filter(CountryState.country_id == country_id)
     query = query.order_by(Recipe.created_at.desc())
     
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(projection.plan.select(query), page, per_page)
     
-    recipes = [recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in items]
+    recipes = Serializer(user_id).recipes(items, projection=projection)
     
     return jsonify(format_pagination_response(recipes, total, page, per_page, pages)), 200
 
@@ -0,0 +1,15 @@
+"""Bulk export routes."""
+from flask import Blueprint, Response, current_app, stream_with_context
+from utils.db_routing import transactional
+from utils.export import iter_ndjson
+
+export_bp = Blueprint('export', __name__)
+
+
+@export_bp.route('/export/recipes.ndjson', methods=['GET'])
+@transactional
+def export_recipes():
+    """Stream every recipe with steps, ingredients, votes and location as NDJSON."""
+    lines = iter_ndjson(current_app.config['EXPORT_BATCH_SIZE'])
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=recipes.ndjson'})
@@ -8,6 +8,7 @@ from models.country_state import CountryState
 from models.country import Country
 from utils.auth import login_required, get_current_user
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
+from utils.serializers import FAVORITE_PLAN, Serializer
 
 favorites_bp = Blueprint('favorites', __name__)
 
@@ -103,9 +104,9 @@ def get_user_favorites(username):
     
     query = query.order_by(Favorite.created_at.desc())
     
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(FAVORITE_PLAN.select(query), page, per_page)
     
-    favorites = [favorite.to_dict() for favorite in items]
+    favorites = Serializer().favorites(items)
     
     return jsonify(format_pagination_response(favorites, total, page, per_page, pages)), 200
 
@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify
 from models.recipe import Recipe
 from models.country import Country
 from utils.auth import get_current_user
+from utils.serializers import RECIPE_PLAN, COUNTRY_PLAN, Serializer
 
 home_bp = Blueprint('home', __name__)
 
@@ -14,22 +15,24 @@ def get_homepage():
     user_id = current_user.id if current_user else None
     
     # Get featured recipes (simplified: recent recipes)
-    featured_recipes = Recipe.query.order_by(Recipe.created_at.desc()).limit(6).all()
+    featured_recipes = RECIPE_PLAN.select(Recipe.query.order_by(Recipe.created_at.desc()).limit(6)).all()
     
     # Get popular recipes (simplified: recent recipes)
-    popular_recipes = Recipe.query.order_by(Recipe.created_at.desc()).limit(10).all()
+    popular_recipes = RECIPE_PLAN.select(Recipe.query.order_by(Recipe.created_at.desc()).limit(10)).all()
     
     # Get recent recipes
-    recent_recipes = Recipe.query.order_by(Recipe.created_at.desc()).limit(10).all()
+    recent_recipes = RECIPE_PLAN.select(Recipe.query.order_by(Recipe.created_at.desc()).limit(10)).all()
     
     # Get countries (limit to top 20 by recipe count for now)
-    countries = Country.query.order_by(Country.name.asc()).limit(20).all()
+    countries = COUNTRY_PLAN.select(Country.query.order_by(Country.name.asc()).limit(20)).all()
     
+    # One serializer, so authors, states and countries shared by the lists are serialized once
+    serializer = Serializer(user_id)
     return jsonify({
-        'featured_recipes': [r.to_dict(include_steps=False, include_votes=True, user_id=user_id) for r in featured_recipes],
-        'popular_recipes': [r.to_dict(include_steps=False, include_votes=True, user_id=user_id) for r in popular_recipes],
-        'recent_recipes': [r.to_dict(include_steps=False, include_votes=True, user_id=user_id) for r in recent_recipes],
-        'countries': [c.to_dict() for c in countries]
+        'featured_recipes': serializer.recipes(featured_recipes),
+        'popular_recipes': serializer.recipes(popular_recipes),
+        'recent_recipes': serializer.recipes(recent_recipes),
+        'countries': serializer.countries(countries)
     }), 200
 
 
@@ -0,0 +1,14 @@
+"""Metrics routes."""
+from flask import Blueprint, Response, current_app, request, jsonify
+from utils.metrics import render
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose metrics in the Prometheus text format."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized', 'message': 'Invalid metrics token'}), 401
+    return Response(render(current_app), mimetype='text/plain; version=0.0.4')
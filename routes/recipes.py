@@ -7,6 +7,7 @@ from models.recipe_ingredient import RecipeIngredient
 from models.country_state import CountryState
 from utils.auth import login_required, get_current_user
 from utils.validators import validate_recipe_data
+from utils.serializers import RECIPE_PLAN, Serializer, projection_or_400
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
 from utils.errors import NotFoundError, PermissionError
 
@@ -21,6 +22,9 @@ def get_recipes():
     state_id = request.args.get('state', type=int)
     country_id = request.args.get('country', type=int)
     user_id = get_current_user().id if get_current_user() else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
     # Build query
     query = Recipe.query
@@ -44,10 +48,10 @@ def get_recipes():
         query = query.order_by(Recipe.created_at.desc())
     
     # Paginate
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(projection.plan.select(query), page, per_page)
     
     # Serialize
-    recipes = [recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in items]
+    recipes = Serializer(user_id).recipes(items, projection=projection)
     
     return jsonify(format_pagination_response(recipes, total, page, per_page, pages)), 200
 
@@ -56,8 +60,8 @@ def get_recipes():
 def get_recipe(recipe_id):
     """Get recipe by ID."""
     user_id = get_current_user().id if get_current_user() else None
-    recipe = Recipe.query.get_or_404(recipe_id)
-    return jsonify(recipe.to_dict(include_steps=True, include_comments=True, include_votes=True, user_id=user_id)), 200
+    row = RECIPE_PLAN.select(Recipe.query.filter_by(id=recipe_id)).first_or_404()
+    return jsonify(Serializer(user_id).recipe(row)), 200
 
 
 @recipes_bp.route('/recipes', methods=['POST'])
@@ -244,6 +248,9 @@ def get_popular_recipes():
     limit = request.args.get('limit', 10, type=int)
     country = request.args.get('country')
     user_id = get_current_user().id if get_current_user() else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
     query = Recipe.query
     
@@ -252,9 +259,9 @@ def get_popular_recipes():
     
     # Simplified: order by created_at for now
     # TODO: Implement proper popularity scoring
-    recipes = query.order_by(Recipe.created_at.desc()).limit(limit).all()
+    recipes = projection.plan.select(query.order_by(Recipe.created_at.desc()).limit(limit)).all()
     
-    return jsonify([recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in recipes]), 200
+    return jsonify(Serializer(user_id).recipes(recipes, projection=projection)), 200
 
 
 @recipes_bp.route('/recipes/recent', methods=['GET'])
@@ -262,9 +269,12 @@ def get_recent_recipes():
     """Get recent recipes."""
     limit = request.args.get('limit', 10, type=int)
     user_id = get_current_user().id if get_current_user() else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
-    recipes = Recipe.query.order_by(Recipe.created_at.desc()).limit(limit).all()
+    recipes = projection.plan.select(Recipe.query.order_by(Recipe.created_at.desc()).limit(limit)).all()
     
-    return jsonify([recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in recipes]), 200
+    return jsonify(Serializer(user_id).recipes(recipes, projection=projection)), 200
 
 
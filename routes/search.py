@@ -4,6 +4,7 @@ from db import db
 from models.recipe import Recipe
 from models.country_state import CountryState
 from models.country import Country
+from utils.serializers import Serializer, projection_or_400
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
 from utils.auth import get_current_user
 
@@ -19,6 +20,9 @@ def search_recipes():
     page, per_page = get_pagination_params()
     current_user = get_current_user()
     user_id = current_user.id if current_user else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
     # Build query
     query = Recipe.query
@@ -41,10 +45,10 @@ def search_recipes():
     query = query.order_by(Recipe.created_at.desc())
     
     # Paginate
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(projection.plan.select(query), page, per_page)
     
     # Serialize
-    recipes = [recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in items]
+    recipes = Serializer(user_id).recipes(items, projection=projection)
     
     return jsonify({
         'results': recipes,
@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 from db import db
 from models.country_state import CountryState
 from models.recipe import Recipe
+from utils.serializers import STATE_PLAN, Serializer, projection_or_400
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
 from utils.auth import get_current_user
 
@@ -21,9 +22,9 @@ def get_states():
     
     query = query.order_by(CountryState.name.asc())
     
-    states = query.all()
+    states = STATE_PLAN.select(query).all()
     
-    return jsonify([state.to_dict() for state in states]), 200
+    return jsonify(Serializer().states(states)), 200
 
 
 @states_bp.route('/states/<int:state_id>', methods=['GET'])
@@ -48,13 +49,16 @@ def get_state_recipes(state_id):
     page, per_page = get_pagination_params()
     current_user = get_current_user()
     user_id = current_user.id if current_user else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
     query = Recipe.query.filter_by(state_id=state_id)
     query = query.order_by(Recipe.created_at.desc())
     
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(projection.plan.select(query), page, per_page)
     
-    recipes = [recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in items]
+    recipes = Serializer(user_id).recipes(items, projection=projection)
     
     return jsonify(format_pagination_response(recipes, total, page, per_page, pages)), 200
 
@@ -5,6 +5,7 @@ from models.user import User
 from models.recipe import Recipe
 from utils.auth import login_required, get_current_user
 from utils.validators import validate_user_data
+from utils.serializers import Serializer, projection_or_400
 from utils.pagination import get_pagination_params, paginate_query, format_pagination_response
 
 users_bp = Blueprint('users', __name__)
@@ -74,13 +75,16 @@ def get_user_recipes(username):
     page, per_page = get_pagination_params()
     current_user = get_current_user()
     user_id = current_user.id if current_user else None
+    projection, error = projection_or_400('recipe')
+    if error:
+        return error
     
     query = Recipe.query.filter_by(author_id=user.id)
     query = query.order_by(Recipe.created_at.desc())
     
-    items, total, pages = paginate_query(query, page, per_page)
+    items, total, pages = paginate_query(projection.plan.select(query), page, per_page)
     
-    recipes = [recipe.to_dict(include_steps=False, include_votes=True, user_id=user_id) for recipe in items]
+    recipes = Serializer(user_id).recipes(items, projection=projection)
     
     return jsonify(format_pagination_response(recipes, total, page, per_page, pages)), 200
 
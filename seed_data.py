@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """
-Script to seed countries and states from static/countries.json into the database.
-This script should be run after the database tables have been created.
+Script to sync countries and states from static/countries.json into the database.
+This script should be run after the database tables have been created; it is
+safe to run on every boot and only applies the differences.
 """
 
+import argparse
 import json
 import os
 import sys
+import time
+import unicodedata
 from pathlib import Path
 import psycopg2
 from psycopg2.extras import execute_values
@@ -52,114 +56,213 @@ def load_countries_data():
         sys.exit(1)
 
 
-def seed_countries(conn, countries_data):
-    """Insert countries into the database."""
-    cursor = conn.cursor()
+def normalize_name(name):
+    """Comparison key for names: case, accents and whitespace are ignored."""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+def _differs(current, wanted):
+    """Compare a DECIMAL column with a JSON number."""
+    if current is None or wanted is None:
+        return current is not wanted
+    return abs(float(current) - float(wanted)) > 1e-8
+
+
+def match_names(existing, wanted):
+    """Match wanted names to existing (id, name) rows.
+
+    Exact names match first, then names equal after normalize_name(), which
+    become renames that keep the row id. Returns (matches, inserts, leftovers)
+    where matches is a list of (id, current name, wanted name), inserts the
+    wanted names without a row and leftovers the ids of unmatched rows.
+    Wanted names are deduplicated by their normalized form.
+    """
+    unique = {}
+    for name in wanted:
+        unique.setdefault(normalize_name(name), name)
+    by_name = {name: id for id, name in existing}
+    matches = []
+    pending = []
+    for name in unique.values():
+        if name in by_name:
+            matches.append((by_name.pop(name), name, name))
+        else:
+            pending.append(name)
+    by_key = {}
+    for name, id in by_name.items():
+        by_key.setdefault(normalize_name(name), []).append((id, name))
+    inserts = []
+    for name in pending:
+        candidates = by_key.get(normalize_name(name))
+        if candidates:
+            id, current = candidates.pop(0)
+            del by_name[current]
+            matches.append((id, current, name))
+        else:
+            inserts.append(name)
+    return matches, inserts, list(by_name.values())
+
+
+def plan_country_sync(cursor, countries_data):
+    """Diff countries.json against the countries table."""
+    wanted = {}
+    for country in countries_data:
+        country_name = country.get('country', '').strip()
+        if country_name:
+            wanted.setdefault(country_name, country)
     
-    # Check if countries already exist
-    cursor.execute("SELECT COUNT(*) FROM countries")
-    existing_count = cursor.fetchone()[0]
+    cursor.execute("SELECT id, name, continent, lat, lng FROM countries")
+    rows = {row[0]: row for row in cursor.fetchall()}
+    matches, inserts, removals = match_names([(id, row[1]) for id, row in rows.items()], wanted)
     
-    if existing_count > 0:
-        print(f"Countries table already has {existing_count} entries. Skipping country seeding.")
-        return
+    updates = []
+    for id, current_name, name in matches:
+        country = wanted[name]
+        continent = country.get('continent', '').strip() or None
+        lat, lng = country.get('lat'), country.get('lng')
+        _, _, current_continent, current_lat, current_lng = rows[id]
+        if (current_name != name or current_continent != continent
+                or _differs(current_lat, lat) or _differs(current_lng, lng)):
+            updates.append((id, name, continent, lat, lng))
     
-    # Prepare country data for insertion
-    countries_to_insert = []
-    for country in countries_data:
-        country_name = country.get('country', '').strip()
-        if not country_name:
-            continue
-        
-        countries_to_insert.append((
-            country_name,
+    new_rows = []
+    for name in inserts:
+        country = wanted[name]
+        new_rows.append((
+            name,
             None,  # code - not in JSON, can be added later
             country.get('continent', '').strip() or None,
             country.get('lat'),
             country.get('lng')
         ))
-    
-    # Insert countries
-    insert_query = """
-        INSERT INTO countries (name, code, continent, lat, lng)
-        VALUES %s
-        ON CONFLICT (name) DO NOTHING
-    """
-    
-    try:
-        execute_values(cursor, insert_query, countries_to_insert)
-        conn.commit()
-        print(f"✓ Inserted {len(countries_to_insert)} countries")
-    except Exception as e:
-        conn.rollback()
-        print(f"Error inserting countries: {e}")
-        raise
+    return new_rows, updates, removals
 
 
-def seed_states(conn, countries_data):
-    """Insert states into the database."""
-    cursor = conn.cursor()
-    
-    # Check if states already exist
-    cursor.execute("SELECT COUNT(*) FROM country_states")
-    existing_count = cursor.fetchone()[0]
-    
-    if existing_count > 0:
-        print(f"Country_states table already has {existing_count} entries. Skipping state seeding.")
-        return
-    
-    # Get country ID mapping
-    cursor.execute("SELECT id, name FROM countries")
-    country_map = {name: id for id, name in cursor.fetchall()}
-    
-    # Prepare state data for insertion
-    states_to_insert = []
-    states_count = 0
+def plan_state_sync(cursor, countries_data, country_ids):
+    """Diff the states of every country in countries.json against country_states."""
+    cursor.execute("SELECT id, country_id, name FROM country_states")
+    existing = {}
+    for id, country_id, name in cursor.fetchall():
+        existing.setdefault(country_id, []).append((id, name))
     
+    new_rows, renames, removals = [], [], []
+    seen = set()
     for country in countries_data:
         country_name = country.get('country', '').strip()
-        if not country_name:
-            continue
-        
-        country_id = country_map.get(country_name)
-        if not country_id:
-            print(f"Warning: Country '{country_name}' not found in database, skipping states")
-            continue
-        
-        states = country.get('states', [])
-        if not states:
+        country_id = country_ids.get(country_name)
+        if not country_id or country_id in seen:
             continue
-        
-        for state_name in states:
-            state_name = state_name.strip()
-            if state_name:
-                states_to_insert.append((country_id, state_name))
-                states_count += 1
+        seen.add(country_id)
+        names = [name.strip() for name in country.get('states', []) if name.strip()]
+        matches, inserts, leftovers = match_names(existing.pop(country_id, []), names)
+        new_rows.extend((country_id, name) for name in inserts)
+        renames.extend((id, name) for id, current, name in matches if current != name)
+        removals.extend(leftovers)
+    # States of countries that are no longer in the JSON
+    for rows in existing.values():
+        removals.extend(id for id, _ in rows)
+    return new_rows, renames, removals
+
+
+def sync_countries(conn, countries_data, dry_run=False):
+    """Bring countries and states in line with countries.json in one transaction.
+
+    Inserts new countries and states, renames rows whose names only differ in
+    case, accents or whitespace (keeping their ids, so recipes stay attached),
+    updates changed continents and coordinates, and removes rows that are no
+    longer in the JSON unless recipes or favorites still refer to them.
+    """
+    cursor = conn.cursor()
+    started = time.perf_counter()
     
-    # Insert states in batches
-    if states_to_insert:
-        insert_query = """
-            INSERT INTO country_states (country_id, name)
-            VALUES %s
-            ON CONFLICT (country_id, name) DO NOTHING
-        """
+    try:
+        country_inserts, country_updates, country_removals = plan_country_sync(cursor, countries_data)
+        if not dry_run:
+            if country_inserts:
+                execute_values(cursor, """
+                    INSERT INTO countries (name, code, continent, lat, lng)
+                    VALUES %s
+                """, country_inserts)
+            if country_updates:
+                execute_values(cursor, """
+                    UPDATE countries AS c
+                    SET name = v.name, continent = v.continent, lat = v.lat, lng = v.lng
+                    FROM (VALUES %s) AS v(id, name, continent, lat, lng)
+                    WHERE c.id = v.id
+                """, country_updates, template="(%s, %s, %s, %s::numeric, %s::numeric)")
+        
+        cursor.execute("SELECT name, id FROM countries")
+        country_ids = dict(cursor.fetchall())
+        if dry_run:
+            # Nothing was written: map renamed countries to their ids and give new ones placeholders
+            country_ids.update((row[1], row[0]) for row in country_updates)
+            country_ids.update((row[0], -index - 1) for index, row in enumerate(country_inserts))
+        state_inserts, state_renames, state_removals = plan_state_sync(cursor, countries_data, country_ids)
         
-        try:
-            execute_values(cursor, insert_query, states_to_insert)
+        removed_states = removed_countries = []
+        if not dry_run:
+            if state_inserts:
+                execute_values(cursor, """
+                    INSERT INTO country_states (country_id, name)
+                    VALUES %s
+                """, state_inserts)
+            if state_renames:
+                execute_values(cursor, """
+                    UPDATE country_states AS s
+                    SET name = v.name
+                    FROM (VALUES %s) AS v(id, name)
+                    WHERE s.id = v.id
+                """, state_renames)
+            if state_removals:
+                cursor.execute("""
+                    DELETE FROM country_states s
+                    WHERE s.id = ANY(%s)
+                      AND NOT EXISTS (SELECT 1 FROM recipes r WHERE r.state_id = s.id)
+                      AND NOT EXISTS (SELECT 1 FROM favorites f
+                                      WHERE f.favorite_type = 'state' AND f.favorite_id = s.id)
+                    RETURNING s.id
+                """, (state_removals,))
+                removed_states = cursor.fetchall()
+            if country_removals:
+                cursor.execute("""
+                    DELETE FROM countries c
+                    WHERE c.id = ANY(%s)
+                      AND NOT EXISTS (SELECT 1 FROM country_states s WHERE s.country_id = c.id)
+                      AND NOT EXISTS (SELECT 1 FROM favorites f
+                                      WHERE f.favorite_type = 'country' AND f.favorite_id = c.id)
+                    RETURNING c.id
+                """, (country_removals,))
+                removed_countries = cursor.fetchall()
             conn.commit()
-            print(f"✓ Inserted {states_count} states")
-        except Exception as e:
+        else:
             conn.rollback()
-            print(f"Error inserting states: {e}")
-            raise
-    else:
-        print("No states to insert")
+    except Exception as e:
+        conn.rollback()
+        print(f"Error syncing countries and states: {e}")
+        raise
+    
+    elapsed = time.perf_counter() - started
+    verb = "Would apply" if dry_run else "✓ Applied"
+    print(f"{verb}: countries +{len(country_inserts)} ~{len(country_updates)} -{len(country_removals)}, "
+          f"states +{len(state_inserts)} ~{len(state_renames)} -{len(state_removals)} ({elapsed * 1000:.0f} ms)")
+    if not dry_run:
+        kept_states = len(state_removals) - len(removed_states)
+        kept_countries = len(country_removals) - len(removed_countries)
+        if kept_states or kept_countries:
+            print(f"  Kept {kept_countries} countries and {kept_states} states that are no longer in "
+                  f"{COUNTRIES_FILE.name} because recipes or favorites refer to them")
 
 
 def main():
-    """Main function to seed the database."""
+    """Main function to sync countries and states with the database."""
+    parser = argparse.ArgumentParser(description='Sync countries and states from static/countries.json.')
+    parser.add_argument('--dry-run', action='store_true', help='Print the changes without applying them')
+    args = parser.parse_args()
+    
     print("=" * 60)
-    print("Seeding Countries and States")
+    print("Syncing Countries and States")
     print("=" * 60)
     print()
     
@@ -173,22 +276,15 @@ def main():
     print()
     
     try:
-        # Seed countries
-        print("Seeding countries...")
-        seed_countries(conn, countries_data)
-        print()
-        
-        # Seed states
-        print("Seeding states...")
-        seed_states(conn, countries_data)
+        sync_countries(conn, countries_data, dry_run=args.dry_run)
         print()
         
         print("=" * 60)
-        print("✓ Seeding completed successfully!")
+        print("✓ Sync completed successfully!")
         print("=" * 60)
         
     except Exception as e:
-        print(f"\n✗ Error during seeding: {e}")
+        print(f"\n✗ Error during sync: {e}")
         sys.exit(1)
     finally:
         conn.close()
@@ -196,5 +292,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
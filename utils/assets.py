@@ -0,0 +1,63 @@
+"""Fingerprinted static assets built by build_static.py.
+
+static_url() (a template global) resolves a static/ path to its hashed copy
+under /assets/ when the manifest lists it, and falls back to the plain
+/static/ URL otherwise, so templates work before the build has run. Hashed
+names change whenever the content does, so /assets/ responses are cached
+for a year with ``immutable``. A precompressed .br or .gz sibling is sent
+instead of the file when the client accepts it; files are sent through
+send_file, which hands them to the server's file wrapper (sendfile) or, with
+USE_X_SENDFILE, to the front proxy.
+"""
+import json
+import mimetypes
+import os
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+MANIFEST_NAME = 'manifest.json'
+ASSET_MAX_AGE = 365 * 24 * 3600
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def load_manifest(directory):
+    """Return the {source path: hashed path} manifest in directory, or {} when it has not been built."""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_assets(app):
+    """Register the /assets/ route and the static_url() template global."""
+    app.config.setdefault('ASSETS_DIR', os.path.join(app.root_path, 'assets'))
+    directory = app.config['ASSETS_DIR']
+    manifest = load_manifest(directory)
+    app.extensions['assets_manifest'] = manifest
+
+    def static_url(filename):
+        hashed = manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=hashed)
+
+    app.add_template_global(static_url)
+
+    @app.route('/assets/<path:filename>', endpoint='assets')
+    def serve_asset(filename):
+        path = safe_join(directory, filename)
+        if path is None or filename == MANIFEST_NAME or not os.path.isfile(path):
+            abort(404)
+        for encoding, suffix in ENCODING_SUFFIXES:
+            if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+                response = send_file(path + suffix, mimetype=mimetypes.guess_type(filename)[0],
+                                     max_age=ASSET_MAX_AGE)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_file(path, max_age=ASSET_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
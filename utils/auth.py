@@ -1,6 +1,6 @@
 """Authentication utilities."""
 from functools import wraps
-from flask import session, jsonify, request, redirect, url_for
+from flask import session, jsonify, request, redirect, url_for, current_app
 from models.user import User
 
 
@@ -16,6 +16,23 @@ def login_required(f):
     return decorated_function
 
 
+def admin_required(f):
+    """Decorator to require an admin user (listed in ADMIN_USERNAMES)."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Unauthorized', 'message': 'Authentication required'}), 401
+        if not is_admin(get_current_user()):
+            return jsonify({'error': 'Forbidden', 'message': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def is_admin(user):
+    """Check whether user is an admin."""
+    return user is not None and user.username in current_app.config.get('ADMIN_USERNAMES', ())
+
+
 def get_current_user():
     """Get current authenticated user from session."""
     if 'user_id' not in session:
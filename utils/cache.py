@@ -0,0 +1,180 @@
+"""In-process application cache and the ``{% cache %}`` template tag.
+
+The cache is a per-worker LRU with a TTL per entry and tags for explicit
+invalidation. Template fragments are cached with::
+
+    {% cache ['recipe_card', recipe.id, recipe.updated_at, score], ['recipe:%d' % recipe.id] %}
+        ...
+    {% endcache %}
+
+The key (any hashable value; lists are turned into tuples) should contain
+whatever versions the fragment's output depends on, such as updated_at and
+vote counters, so a change produces a new key and stale entries simply age
+out. Tags cover what is not in the key: when a session commits, the tags of
+the recipes, comments, users, states and countries it changed are
+invalidated in this worker (see TAGGED). Other workers notice such changes
+only when the key changes or the entry expires (CACHE_DEFAULT_TTL).
+Fragment lookups are counted as the ``fragment`` cache in /metrics.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from models.comment import Comment
+from models.country import Country
+from models.country_state import CountryState
+from models.recipe import Recipe
+from models.user import User
+from utils.db_routing import RoutingSession
+from utils.metrics import record_cache
+
+# Model -> function returning the cache tags a change to that row invalidates
+TAGGED = {
+    Recipe: lambda obj: (f'recipe:{obj.id}',),
+    Comment: lambda obj: (f'comments:{obj.recipe_id}',),
+    User: lambda obj: (f'user:{obj.id}',),
+    CountryState: lambda obj: ('locations',),
+    Country: lambda obj: ('locations',),
+}
+
+_PENDING_KEY = '_cache_tags'
+_registered = []
+
+
+class Cache:
+    """Thread-safe LRU cache with per-entry expiry and tag invalidation."""
+
+    def __init__(self, max_entries=4096, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl=None, tags=()):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, tags, value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tags(self, *tags):
+        """Drop every entry carrying any of tags."""
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_cache():
+    """Return the current app's cache."""
+    return current_app.extensions['cache']
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key[, tags[, ttl]] %}...{% endcache %}`` stores the rendered body in the app cache."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        for _ in range(2):
+            args.append(parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, tags, ttl, caller):
+        if not current_app.config['FRAGMENT_CACHE']:
+            return caller()
+        cache = get_cache()
+        key = ('fragment',) + (tuple(key) if isinstance(key, (list, tuple)) else (key,))
+        html = cache.get(key)
+        record_cache('fragment', html is not None)
+        if html is None:
+            html = caller()
+            cache.set(key, html, ttl, tags or ())
+        return html
+
+
+def _record(target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(TAGGED[type(target)](target))
+
+
+def _after_change(mapper, connection, target):
+    _record(target)
+
+
+def _invalidate(session):
+    tags = session.info.pop(_PENDING_KEY, None)
+    if tags and _registered:
+        for cache in _registered:
+            cache.invalidate_tags(*tags)
+
+
+def _discard(session, previous_transaction=None):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_cache(app):
+    """Create the app cache, register the {% cache %} tag and commit-time invalidation."""
+    app.config.setdefault('CACHE_MAX_ENTRIES', 4096)
+    app.config.setdefault('CACHE_DEFAULT_TTL', 300)
+    app.config.setdefault('FRAGMENT_CACHE', True)
+
+    cache = Cache(app.config['CACHE_MAX_ENTRIES'], app.config['CACHE_DEFAULT_TTL'])
+    app.extensions['cache'] = cache
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+    if not _registered:
+        for model in TAGGED:
+            event.listen(model, 'after_insert', _after_change)
+            event.listen(model, 'after_update', _after_change)
+            event.listen(model, 'after_delete', _after_change)
+        event.listen(RoutingSession, 'after_commit', _invalidate)
+        event.listen(RoutingSession, 'after_rollback', _discard)
+    _registered.append(cache)
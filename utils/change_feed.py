@@ -0,0 +1,233 @@
+"""Change log capture and the incremental change feed behind GET /api/changes.
+
+Changes are captured in the database, so the bulk paths (COPY seeding, the
+importer's batched INSERTs, Query.update()/delete(), raw SQL and ON DELETE
+CASCADE) are logged exactly like ORM writes. On PostgreSQL, statement-level
+AFTER INSERT/UPDATE/DELETE triggers (see boot/init_db.sql) write one
+change_log row per changed recipe, comment or vote, in the same transaction
+and stamped with its transaction id (txid). A change to a recipe's steps is
+logged as an update of the recipe, unless the recipe row itself was written
+in the same transaction and so is logged already. db.create_all() installs
+the same triggers (row-level on SQLite), see install_triggers().
+
+Entries are read in (txid, id) order and only for transactions older than
+the oldest one still running (the xmin of the current snapshot). Everything
+below that horizon has committed or rolled back for good, so a cursor never
+moves past an entry that becomes visible later, however long its
+transaction ran. SQLite runs one writer at a time, so there ids are
+already in commit order and txid is always 0.
+"""
+import logging
+from pathlib import Path
+from sqlalchemy import event, inspect
+from db import db
+from models.change_log import ChangeLog
+from models.comment import Comment
+from models.comment_vote import CommentVote
+from models.recipe import Recipe
+from models.recipe_vote import RecipeVote
+from utils.serializers import RECIPE_PLAN, COMMENT_PLAN, Serializer
+
+# table -> (entity_type, parent id column or None)
+TRACKED_TABLES = {
+    'recipes': ('recipe', None),
+    'comments': ('comment', 'recipe_id'),
+    'recipe_votes': ('recipe_vote', 'recipe_id'),
+    'comment_votes': ('comment_vote', 'comment_id'),
+}
+# Tables whose rows are part of a recipe: a change is an update of the recipe
+RECIPE_PARTS = {'recipe_steps': 'recipe_id'}
+
+OPERATIONS = {'INSERT': 'create', 'UPDATE': 'update', 'DELETE': 'delete'}
+START = (0, 0)
+
+# db.create_all() on PostgreSQL runs section 12 of the schema file, the one copy of the trigger SQL
+INIT_SQL = Path(__file__).resolve().parent.parent / 'boot' / 'init_db.sql'
+TRIGGER_SECTION = ('-- 12. CHANGE_LOG TRIGGERS', '-- END OF TABLE CREATION')
+
+logger = logging.getLogger('snacklore.change_feed')
+
+_registered = []
+
+
+def _postgres_triggers():
+    """Section 12 of boot/init_db.sql: the trigger functions and statement-level triggers."""
+    sql = INIT_SQL.read_text(encoding='utf-8')
+    start = sql.index(TRIGGER_SECTION[0])
+    return [sql[start:sql.index(TRIGGER_SECTION[1], start)]]
+
+
+def _sqlite_triggers():
+    """Row-level trigger DDL for SQLite; one writer runs at a time, so every txid is 0."""
+    statements = []
+    insert = ('INSERT INTO change_log (entity_type, entity_id, parent_id, operation, changed_at, txid) '
+              "SELECT '{entity_type}', {entity_id}, {parent}, '{operation}', STRFTIME('%Y-%m-%d %H:%M:%f', 'now'), 0")
+    for event_name, operation in OPERATIONS.items():
+        row = 'OLD' if event_name == 'DELETE' else 'NEW'
+        for table, (entity_type, parent) in TRACKED_TABLES.items():
+            body = insert.format(entity_type=entity_type, entity_id=f'{row}.id', operation=operation,
+                                 parent=f'{row}.{parent}' if parent else 'NULL')
+            statements.append(f'CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event_name.lower()} '
+                              f'AFTER {event_name} ON {table} BEGIN {body}; END')
+        for table, column in RECIPE_PARTS.items():
+            body = insert.format(entity_type='recipe', entity_id=f'{row}.{column}', parent='NULL', operation='update')
+            statements.append(f'CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event_name.lower()} '
+                              f'AFTER {event_name} ON {table} BEGIN {body} '
+                              f'WHERE EXISTS (SELECT 1 FROM recipes WHERE id = {row}.{column}); END')
+    return statements
+
+
+def install_triggers(connection):
+    """Create the change log triggers on connection's database; safe to run again."""
+    if 'txid' not in {column['name'] for column in inspect(connection).get_columns('change_log')}:
+        # change_log created before entries carried their transaction id
+        connection.exec_driver_sql('ALTER TABLE change_log ADD COLUMN txid BIGINT NOT NULL DEFAULT 0')
+        connection.exec_driver_sql('CREATE INDEX IF NOT EXISTS idx_change_log_txid_id ON change_log (txid, id)')
+    if connection.dialect.name == 'postgresql':
+        statements = _postgres_triggers()
+    elif connection.dialect.name == 'sqlite':
+        statements = _sqlite_triggers()
+    else:
+        logger.warning('Change log triggers are not defined for %s; GET /api/changes will stay empty',
+                       connection.dialect.name)
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def _after_create(metadata, connection, **kw):
+    install_triggers(connection)
+
+
+def init_change_feed(app):
+    """Register trigger installation on db.create_all() and the feed settings."""
+    app.config.setdefault('CHANGES_PAGE_SIZE', 100)
+    app.config.setdefault('CHANGES_MAX_PAGE_SIZE', 1000)
+
+    if _registered:
+        return
+    event.listen(db.metadata, 'after_create', _after_create)
+    _registered.append(True)
+
+
+def format_cursor(position):
+    """Render a (txid, id) position as a cursor string."""
+    txid, id = position
+    return f'{txid}-{id}'
+
+
+def parse_cursor(cursor):
+    """Return the (txid, id) position of a cursor string, or None when it is malformed.
+
+    A bare id is a cursor from before entries carried their transaction id;
+    those entries have txid 0, and '0' is the start of the feed.
+    """
+    txid, _, id = cursor.rpartition('-')
+    txid = txid or '0'
+    if not (txid.isdigit() and id.isdigit()):
+        return None
+    return int(txid), int(id)
+
+
+def visible_horizon():
+    """Return the oldest transaction id that may still be running, or None when ids are in commit order."""
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    return db.session.execute(db.text('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')).scalar()
+
+
+def latest_cursor():
+    """Return the cursor after every change that has finished.
+
+    Transactions still running are after it, so a client that takes this
+    cursor and then exports the recipes misses nothing.
+    """
+    horizon = visible_horizon()
+    if horizon is not None:
+        return format_cursor((horizon, 0))
+    last = db.session.query(ChangeLog.txid, ChangeLog.id).order_by(ChangeLog.txid.desc(), ChangeLog.id.desc()).first()
+    return format_cursor(tuple(last) if last else START)
+
+
+def _load(model, plan, serialize, ids):
+    if not ids:
+        return {}
+    rows = plan.select(model.query.filter(model.id.in_(ids))).all()
+    return {item['id']: item for item in serialize(rows)}
+
+
+def _load_votes(model, parent_column, ids):
+    if not ids:
+        return {}
+    rows = db.session.query(model.id, parent_column, model.vote_type).filter(model.id.in_(ids)).all()
+    return {id: {'id': id, parent_column.key: parent_id, 'vote_type': vote_type} for id, parent_id, vote_type in rows}
+
+
+def _merge(previous, operation):
+    """Combine two operations on one entity within a page."""
+    if previous is None or operation == 'delete':
+        return operation
+    if previous in ('create', 'delete'):
+        # Created and then updated is still new to the client; a step cascade after a delete changes nothing
+        return previous
+    return operation
+
+
+def get_changes(since, limit):
+    """Return (changes, cursor, has_more) for change log entries after the (txid, id) position since.
+
+    Within a page only the newest entry per entity is returned, with the
+    entity's current data; a row that no longer exists is left out because
+    its tombstone follows later in the feed. has_more is also true when
+    newer entries exist but are held back until older transactions finish.
+    """
+    txid, id = since
+    after = db.or_(ChangeLog.txid > txid, db.and_(ChangeLog.txid == txid, ChangeLog.id > id))
+    query = ChangeLog.query.filter(after)
+    horizon = visible_horizon()
+    if horizon is not None:
+        query = query.filter(ChangeLog.txid < horizon)
+    entries = query.order_by(ChangeLog.txid, ChangeLog.id).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if not has_more and horizon is not None:
+        has_more = db.session.query(ChangeLog.query.filter(after, ChangeLog.txid >= horizon).exists()).scalar()
+    if not entries:
+        return [], since, has_more
+
+    latest = {}
+    for entry in entries:
+        key = (entry.entity_type, entry.entity_id)
+        previous = latest.pop(key, (None, None))[1]
+        # Re-insert so the page stays ordered by each entity's newest entry
+        latest[key] = (entry, _merge(previous, entry.operation))
+
+    wanted = {}
+    for (entity_type, entity_id), (entry, operation) in latest.items():
+        if operation != 'delete':
+            wanted.setdefault(entity_type, set()).add(entity_id)
+    serializer = Serializer()
+    data = {
+        'recipe': _load(Recipe, RECIPE_PLAN, serializer.recipes, wanted.get('recipe')),
+        'comment': _load(Comment, COMMENT_PLAN, lambda rows: serializer.comments(rows, include_replies=False),
+                         wanted.get('comment')),
+        'recipe_vote': _load_votes(RecipeVote, RecipeVote.recipe_id, wanted.get('recipe_vote')),
+        'comment_vote': _load_votes(CommentVote, CommentVote.comment_id, wanted.get('comment_vote')),
+    }
+
+    changes = []
+    for (entity_type, entity_id), (entry, operation) in latest.items():
+        item = {
+            'cursor': format_cursor((entry.txid, entry.id)),
+            'entity': entity_type,
+            'id': entity_id,
+            'parent_id': entry.parent_id,
+            'op': operation,
+            'changed_at': entry.changed_at,
+        }
+        if operation != 'delete':
+            item['data'] = data[entity_type].get(entity_id)
+            if item['data'] is None:
+                continue
+        changes.append(item)
+    return changes, (entries[-1].txid, entries[-1].id), has_more
@@ -0,0 +1,140 @@
+"""Response compression for HTML, JSON and other text responses.
+
+Responses of a compressible mimetype whose body is at least COMPRESS_MIN_SIZE
+bytes are encoded with brotli (when the brotli package is installed and the
+client accepts it) or gzip. Streamed responses are compressed chunk by chunk
+as they are sent. Responses that already have a Content-Encoding, and files
+served through send_file, are passed through untouched.
+
+Compressed bodies are kept in a small per-process LRU cache keyed by a digest
+of the uncompressed body, so a hot response that has not changed (the states
+list, a popular recipe page) is compressed once rather than on every hit.
+Lookups are counted as the ``compressed_body`` cache in /metrics.
+"""
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+from utils.metrics import record_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'application/msgpack', 'image/svg+xml',
+)
+
+
+class CompressedBodyCache:
+    """Thread-safe LRU cache of compressed bodies keyed by (encoding, level, body digest)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(encoding, level, body):
+        return encoding, level, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def compress(body, encoding, level):
+    """Compress body in one go with gzip or brotli."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _compress_stream(chunks, encoding, level):
+    """Compress an iterable of byte chunks, yielding output as the compressor produces it."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        process, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            data = process(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def choose_encoding(app):
+    """Return 'br', 'gzip' or None for the current request's Accept-Encoding."""
+    offered = ['br', 'gzip'] if brotli is not None and app.config['COMPRESS_BROTLI'] else ['gzip']
+    best = request.accept_encodings.best_match(offered)
+    return best if best and request.accept_encodings[best] > 0 else None
+
+
+def init_compression(app):
+    """Compress eligible responses in an after_request hook."""
+    app.config.setdefault('COMPRESS', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI', True)
+    app.config.setdefault('COMPRESS_BROTLI_QUALITY', 5)
+    app.config.setdefault('COMPRESS_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+    app.config.setdefault('COMPRESS_CACHE_SIZE', 128)
+    app.config.setdefault('COMPRESS_CACHE_MAX_BODY', 2 * 1024 * 1024)
+    if not app.config['COMPRESS']:
+        return
+
+    cache = CompressedBodyCache(app.config['COMPRESS_CACHE_SIZE'])
+    app.extensions['compression_cache'] = cache
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in app.config['COMPRESS_MIMETYPES']
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(app)
+        if encoding is None:
+            return response
+        level = app.config['COMPRESS_BROTLI_QUALITY'] if encoding == 'br' else app.config['COMPRESS_LEVEL']
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            cacheable = len(body) <= app.config['COMPRESS_CACHE_MAX_BODY']
+            data = None
+            if cacheable:
+                key = cache.key(encoding, level, body)
+                data = cache.get(key)
+                record_cache('compressed_body', data is not None)
+            if data is None:
+                data = compress(body, encoding, level)
+                if cacheable:
+                    cache.put(key, data)
+            response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        return response
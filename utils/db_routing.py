@@ -0,0 +1,135 @@
+"""Database session routing: read replica selection and read-only autocommit mode."""
+import time
+from flask import g, request, session, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+STICKY_SESSION_KEY = '_primary_until'
+
+# Autocommit variants of each engine, sharing the engine's connection pool
+_autocommit_engines = {}
+
+# Per-process replica health, refreshed at most every REPLICA_LAG_CHECK_INTERVAL seconds
+_replica_health = {'checked_at': 0.0, 'healthy': True, 'lag': 0.0}
+
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class RoutingSession(Session):
+    """Session that routes reads of safe requests to the replica and/or autocommit mode."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            use_replica, autocommit = _request_route(self._db)
+            if use_replica or autocommit:
+                if use_replica:
+                    engine = self._db.engines[REPLICA_BIND]
+                else:
+                    engine = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+                return _autocommit_engine(engine) if autocommit else engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_write(db_session, flush_context):
+    """Remember that this request wrote to the primary."""
+    if has_request_context():
+        g._db_wrote = True
+
+
+def primary_only(f):
+    """Decorator to keep a read-only view on the primary database."""
+    f._use_primary = True
+    return f
+
+
+def transactional(f):
+    """Decorator to run a read-only view inside a regular transaction.
+
+    Needed when a view relies on a single snapshot or a server-side cursor,
+    which autocommit mode does not provide.
+    """
+    f._transactional = True
+    return f
+
+
+def _request_route(db):
+    """Return (use_replica, autocommit) for the current request, computed once."""
+    route = g.get('_db_route')
+    if route is None:
+        view = current_app.view_functions.get(request.endpoint)
+        read_only = request.method in SAFE_METHODS
+        autocommit = (read_only and current_app.config['DB_READONLY_AUTOCOMMIT']
+                      and not getattr(view, '_transactional', False))
+        route = g._db_route = (read_only and _replica_allowed(db, view), autocommit)
+    return route
+
+
+def _autocommit_engine(engine):
+    """Return an AUTOCOMMIT variant of engine (no BEGIN/ROLLBACK round trips)."""
+    autocommit = _autocommit_engines.get(engine)
+    if autocommit is None:
+        autocommit = _autocommit_engines[engine] = engine.execution_options(isolation_level='AUTOCOMMIT')
+    return autocommit
+
+
+def _replica_allowed(db, view):
+    """Decide whether the current read-only request may use the replica."""
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    if getattr(view, '_use_primary', False):
+        return False
+    # Read-your-writes: stay on the primary for a while after writing
+    if session.get(STICKY_SESSION_KEY, 0) > time.time():
+        return False
+    return _replica_healthy(db.engines[REPLICA_BIND])
+
+
+def _replica_healthy(engine):
+    """Return False when the replica is unreachable or lags too far behind."""
+    config = current_app.config
+    now = time.time()
+    if now - _replica_health['checked_at'] < config['REPLICA_LAG_CHECK_INTERVAL']:
+        return _replica_health['healthy']
+
+    _replica_health['checked_at'] = now
+    try:
+        with engine.connect() as conn:
+            lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+        _replica_health['lag'] = lag
+        _replica_health['healthy'] = lag <= config['REPLICA_MAX_LAG_SECONDS']
+    except Exception as e:
+        current_app.logger.warning('Read replica unavailable, using primary: %s', e)
+        _replica_health['healthy'] = False
+    return _replica_health['healthy']
+
+
+def init_db_routing(app):
+    """Register request hooks for replica routing and read-only sessions."""
+    app.config.setdefault('DB_READONLY_AUTOCOMMIT', True)
+    app.config.setdefault('REPLICA_STICKY_SECONDS', 10)
+    app.config.setdefault('REPLICA_MAX_LAG_SECONDS', 2.0)
+    app.config.setdefault('REPLICA_LAG_CHECK_INTERVAL', 5.0)
+
+    @app.after_request
+    def stick_to_primary_after_write(response):
+        if g.get('_db_wrote') and REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+            session[STICKY_SESSION_KEY] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
+
+    @app.after_request
+    def release_read_only_session(response):
+        # Return the connection to the pool as soon as the payload is built;
+        # streamed responses still need the session while they are iterated.
+        route = g.get('_db_route')
+        if route and route[1] and not response.is_streamed:
+            app.extensions['sqlalchemy'].session.close()
+        return response
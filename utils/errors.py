@@ -16,6 +16,11 @@ class PermissionError(Exception):
     pass
 
 
+class QueryBudgetExceeded(Exception):
+    """Raised when a request executes more SQL statements than its budget allows."""
+    pass
+
+
 def format_error_response(error, message, details=None):
     """Format error response."""
     response = {
@@ -0,0 +1,62 @@
+"""Streaming export of the full recipe catalog as NDJSON."""
+import sys
+from itertools import islice
+import click
+from flask import current_app
+from models.recipe import Recipe
+from utils.serializers import RECIPE_PLAN, Serializer
+
+EXPORT_BATCH_SIZE = 500
+
+
+def iter_recipes(batch_size=EXPORT_BATCH_SIZE):
+    """Yield every recipe in id order with author, location, votes, steps and ingredients.
+
+    Recipe rows come from a server-side cursor (yield_per), so only one batch
+    is held in memory. Each batch costs a fixed number of queries: nested
+    authors and states, vote counts, steps and ingredients. On PostgreSQL the
+    caller must be inside a transaction (see utils.db_routing.transactional).
+    """
+    rows = iter(RECIPE_PLAN.select(Recipe.query.order_by(Recipe.id)).yield_per(batch_size))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        # A fresh serializer per batch keeps its nested-object cache bounded
+        serializer = Serializer()
+        recipes = serializer.recipes(batch)
+        steps = serializer.steps([recipe['id'] for recipe in recipes])
+        for recipe in recipes:
+            recipe['steps'] = steps.get(recipe['id'], [])
+            yield recipe
+
+
+def iter_ndjson(batch_size=EXPORT_BATCH_SIZE):
+    """Yield iter_recipes() as NDJSON lines, encoded with the app's JSON provider."""
+    dumps = current_app.json.dumps
+    for recipe in iter_recipes(batch_size):
+        yield dumps(recipe) + '\n'
+
+
+def init_export(app):
+    """Register the ``flask export-recipes`` command."""
+    app.config.setdefault('EXPORT_BATCH_SIZE', EXPORT_BATCH_SIZE)
+
+    @app.cli.command('export-recipes')
+    @click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), default=None,
+                  help='File to write (defaults to stdout).')
+    @click.option('--batch-size', default=None, type=int, help='Recipes per batch (defaults to EXPORT_BATCH_SIZE).')
+    def export_recipes_command(output, batch_size):
+        """Write every recipe as NDJSON, one object per line."""
+        batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+        out = open(output, 'w', encoding='utf-8') if output else sys.stdout
+        count = 0
+        try:
+            for line in iter_ndjson(batch_size):
+                out.write(line)
+                count += 1
+        finally:
+            if output:
+                out.close()
+        if output:
+            click.echo(f'Exported {count} recipes to {output}')
@@ -0,0 +1,151 @@
+"""JSON provider used by jsonify, request.get_json and the NDJSON export.
+
+Encodes with orjson when it is installed and falls back to the standard
+library otherwise (or when JSON_ENCODER is ``json``). Both encoders write
+datetimes as ISO 8601 and Decimals as floats, so models and serializers can
+return column values as they come from the database. Keys are sorted and the
+output is compact, as with Flask's default provider.
+
+A Fragment holds JSON that is already encoded (a cached recipe card, for
+example); it is spliced into the output as is, without being decoded and
+encoded again.
+
+API clients that prefer MessagePack get the same payload in that encoding
+(see utils.msgpack_format).
+"""
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from utils import msgpack_format
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODERS = ('auto', 'orjson', 'json')
+
+
+class Fragment:
+    """Pre-encoded JSON to embed in a document unchanged."""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data.encode() if isinstance(data, str) else bytes(data)
+
+    def __repr__(self):
+        return f'Fragment({self.data[:40]!r})'
+
+
+def _default(value):
+    """Convert the types both encoders handle the same way; used by the stdlib path."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return DefaultJSONProvider.default(value)
+
+
+def _orjson_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return DefaultJSONProvider.default(value)
+
+
+class _Splicer:
+    """Replaces fragments with placeholder strings and puts them back after encoding.
+
+    Used when the encoder cannot embed raw JSON itself (the standard library,
+    and orjson before orjson.Fragment was added).
+    """
+
+    # A NUL byte cannot appear unescaped in encoded JSON, so placeholders cannot collide with data
+    prefix = f'\x00fragment:{os.urandom(4).hex()}:'
+
+    def __init__(self, default):
+        self.fallback = default
+        self.fragments = []
+
+    def default(self, value):
+        if isinstance(value, Fragment):
+            self.fragments.append(value.data)
+            return f'{self.prefix}{len(self.fragments) - 1}\x00'
+        return self.fallback(value)
+
+    def splice(self, encoded):
+        for index, data in enumerate(self.fragments):
+            placeholder = json.dumps(f'{self.prefix}{index}\x00').encode()
+            encoded = encoded.replace(placeholder, data, 1)
+        return encoded
+
+
+def _native_fragment_default(value):
+    if isinstance(value, Fragment):
+        return orjson.Fragment(value.data)
+    return _orjson_default(value)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, with a standard library fallback."""
+
+    sort_keys = True
+    compact = None
+    mimetype = 'application/json'
+
+    def __init__(self, app):
+        super().__init__(app)
+        encoder = app.config.get('JSON_ENCODER', 'auto')
+        if encoder not in ENCODERS:
+            raise ValueError(f"JSON_ENCODER must be one of {', '.join(ENCODERS)}, not {encoder!r}")
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_ENCODER is orjson but orjson is not installed')
+        self.use_orjson = orjson is not None and encoder != 'json'
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumpb(self, obj, indent=False):
+        """Serialize obj to UTF-8 JSON bytes."""
+        if self.use_orjson:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if hasattr(orjson, 'Fragment'):
+                return orjson.dumps(obj, default=_native_fragment_default, option=option)
+            splicer = _Splicer(_orjson_default)
+            return splicer.splice(orjson.dumps(obj, default=splicer.default, option=option))
+        splicer = _Splicer(_default)
+        encoded = json.dumps(obj, default=splicer.default, sort_keys=self.sort_keys, ensure_ascii=False,
+                             indent=2 if indent else None, separators=None if indent else (',', ':')).encode()
+        return splicer.splice(encoded) if splicer.fragments else encoded
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string (``indent`` is the only option honoured)."""
+        return self.dumpb(obj, indent=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def packb(self, obj):
+        """Serialize obj to MessagePack bytes."""
+        return msgpack_format.packb(obj)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if msgpack_format.wants_msgpack():
+            return self._app.response_class(self.packb(obj), mimetype=msgpack_format.MSGPACK_MIMETYPE)
+        return self._app.response_class(self.dumpb(obj, indent=self._indent()) + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install FastJSONProvider as the app's JSON provider."""
+    app.config.setdefault('JSON_ENCODER', 'auto')
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,125 @@
+"""Memory instrumentation: per-request allocation peaks, worker RSS and tracemalloc snapshots.
+
+The number of ORM objects loaded into the session (identity map) per request
+and worker RSS are always recorded. Allocation tracking
+needs tracemalloc, which slows Python down noticeably, so it only runs when
+MEMORY_PROFILING is set. tracemalloc is process-wide: with a threaded server
+a request's peak also includes allocations of concurrent requests.
+"""
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+from utils.metrics import registry
+
+ALLOC_BUCKETS = (65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456)
+IDENTITY_MAP_BUCKETS = (0, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+# Ignore allocations made by tracemalloc and the import system in snapshots
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+registry.describe('snacklore_request_peak_alloc_bytes', 'histogram',
+                  'Peak Python memory allocated during a request (MEMORY_PROFILING only).', ALLOC_BUCKETS)
+registry.describe('snacklore_orm_objects_loaded_per_request', 'histogram',
+                  'ORM objects loaded into the session identity map per request.', IDENTITY_MAP_BUCKETS)
+registry.describe('snacklore_process_resident_memory_bytes', 'gauge', 'Resident set size per worker.')
+registry.describe('snacklore_traced_memory_bytes', 'gauge', 'Memory currently traced by tracemalloc per worker.')
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+@event.listens_for(Mapper, 'load')
+def _count_loaded_object(target, context):
+    # Counted on load: the identity map holds objects weakly, so its size at
+    # the end of a request misses everything the view already let go of
+    if has_request_context() and '_memory_loaded' in g:
+        g._memory_loaded += 1
+
+
+def rss_bytes():
+    """Return the resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, in kilobytes on Linux; the best available elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def update_memory_gauges():
+    """Record RSS (and traced memory, if tracing) of this worker."""
+    pid = str(os.getpid())
+    registry.set('snacklore_process_resident_memory_bytes', rss_bytes(), (('pid', pid),))
+    if tracemalloc.is_tracing():
+        registry.set('snacklore_traced_memory_bytes', tracemalloc.get_traced_memory()[0], (('pid', pid),))
+
+
+def take_snapshot(name):
+    """Store a filtered tracemalloc snapshot of this worker under name."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    with _snapshots_lock:
+        _snapshots[name] = (time.time(), snapshot)
+    return snapshot
+
+
+def get_snapshot(name):
+    """Return (taken_at, snapshot) for a stored snapshot, or None."""
+    with _snapshots_lock:
+        return _snapshots.get(name)
+
+
+def format_stats(stats, limit):
+    """Convert tracemalloc statistics (or statistic diffs) to dicts."""
+    items = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        item = {
+            'file': frame.filename,
+            'line': frame.lineno,
+            'size_bytes': stat.size,
+            'count': stat.count,
+        }
+        if hasattr(stat, 'size_diff'):
+            item['size_diff_bytes'] = stat.size_diff
+            item['count_diff'] = stat.count_diff
+        items.append(item)
+    return items
+
+
+def init_memory_monitor(app):
+    """Register request hooks recording memory usage per route."""
+    app.config.setdefault('MEMORY_PROFILING', False)
+    app.config.setdefault('MEMORY_TRACE_FRAMES', 1)
+
+    if app.config['MEMORY_PROFILING'] and not tracemalloc.is_tracing():
+        tracemalloc.start(app.config['MEMORY_TRACE_FRAMES'])
+
+    @app.before_request
+    def start_memory_tracking():
+        g._memory_loaded = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            g._memory_start = tracemalloc.get_traced_memory()[0]
+
+    @app.after_request
+    def record_memory_usage(response):
+        route = (('blueprint', request.blueprint or 'app'), ('endpoint', request.endpoint or 'unmatched'))
+        start = g.pop('_memory_start', None)
+        if start is not None and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            registry.observe('snacklore_request_peak_alloc_bytes', max(peak - start, 0), route)
+        loaded = g.pop('_memory_loaded', None)
+        if loaded is not None:
+            registry.observe('snacklore_orm_objects_loaded_per_request', loaded, route)
+        update_memory_gauges()
+        return response
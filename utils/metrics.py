@@ -0,0 +1,248 @@
+"""Lightweight Prometheus-style metrics registry and request instrumentation.
+
+Each worker keeps its metrics in memory. When METRICS_DIR is set, workers
+periodically dump a JSON snapshot to that directory and /metrics merges the
+snapshots of all workers, so pre-forked servers report one consistent view.
+"""
+import json
+import os
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Gauges from worker snapshots older than this are considered dead workers
+GAUGE_TTL_SECONDS = 300
+
+
+class Registry:
+    """Thread-safe store of counters, gauges and histograms keyed by label tuples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.definitions = {}
+        self.values = {}
+
+    def describe(self, name, kind, help_text, buckets=None):
+        """Declare a metric; kind is 'counter', 'gauge' or 'histogram'."""
+        self.definitions[name] = {'kind': kind, 'help': help_text, 'buckets': buckets}
+
+    def inc(self, name, labels=(), value=1):
+        """Increment a counter."""
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, labels=()):
+        """Set a gauge."""
+        with self.lock:
+            self.values[(name, labels)] = value
+
+    def observe(self, name, value, labels=()):
+        """Record a histogram observation."""
+        buckets = self.definitions[name]['buckets']
+        key = (name, labels)
+        with self.lock:
+            hist = self.values.get(key)
+            if hist is None:
+                hist = self.values[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self):
+        """Return a JSON-serializable copy of all values."""
+        with self.lock:
+            return [[name, [list(pair) for pair in labels], _copy(value)]
+                    for (name, labels), value in self.values.items()]
+
+
+def _copy(value):
+    if isinstance(value, list):
+        return [list(value[0]), value[1], value[2]]
+    return value
+
+
+registry = Registry()
+registry.describe('snacklore_http_requests_total', 'counter', 'HTTP requests by route and status.')
+registry.describe('snacklore_http_request_duration_seconds', 'histogram', 'Request latency by route.', LATENCY_BUCKETS)
+registry.describe('snacklore_http_response_size_bytes', 'histogram', 'Response body size by route.', SIZE_BUCKETS)
+registry.describe('snacklore_sql_queries_per_request', 'histogram', 'SQL statements executed per request.', QUERY_COUNT_BUCKETS)
+registry.describe('snacklore_sql_duration_seconds_per_request', 'histogram', 'Time spent in SQL per request.', LATENCY_BUCKETS)
+registry.describe('snacklore_sql_queries_total', 'counter', 'SQL statements executed by route.')
+registry.describe('snacklore_cache_requests_total', 'counter', 'Cache lookups by cache name and result (hit/miss).')
+registry.describe('snacklore_db_pool_connections', 'gauge', 'Connection pool usage per worker and bind.')
+
+_flush_state = {'last': 0.0}
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup; hit ratio is hits / (hits + misses)."""
+    registry.inc('snacklore_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['_metrics_query_start'].pop()
+    if has_request_context() and '_metrics_start' in g:
+        g._metrics_sql_count += 1
+        g._metrics_sql_time += elapsed
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    if context.connection is not None and context.statement is not None:
+        starts = context.connection.info.get('_metrics_query_start')
+        if starts:
+            starts.pop()
+
+
+def update_pool_gauges(db):
+    """Record pool usage of every engine of this worker."""
+    pid = str(os.getpid())
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        for state in ('size', 'checkedout', 'overflow', 'checkedin'):
+            method = getattr(pool, state, None)
+            if callable(method):
+                labels = (('pid', pid), ('bind', bind or 'default'), ('state', state))
+                registry.set('snacklore_db_pool_connections', method(), labels)
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f'metrics-{pid}.json')
+
+
+def flush_snapshot(app, force=False):
+    """Write this worker's snapshot to METRICS_DIR, at most every METRICS_FLUSH_INTERVAL seconds."""
+    directory = app.config.get('METRICS_DIR')
+    now = time.time()
+    if not directory or (not force and now - _flush_state['last'] < app.config['METRICS_FLUSH_INTERVAL']):
+        return
+    _flush_state['last'] = now
+    update_pool_gauges(app.extensions['sqlalchemy'])
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, os.getpid())
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def collect(app):
+    """Merge this worker's values with the snapshots of all other workers."""
+    update_pool_gauges(app.extensions['sqlalchemy'])
+    snapshots = [registry.snapshot()]
+    directory = app.config.get('METRICS_DIR')
+    if directory and os.path.isdir(directory):
+        own = _snapshot_path(directory, os.getpid())
+        now = time.time()
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if path == own or not filename.endswith('.json'):
+                continue
+            try:
+                with open(path) as f:
+                    entries = json.load(f)
+                stale = now - os.path.getmtime(path) > GAUGE_TTL_SECONDS
+            except (OSError, ValueError):
+                continue
+            snapshots.append([e for e in entries
+                              if not (stale and registry.definitions.get(e[0], {}).get('kind') == 'gauge')])
+
+    merged = {}
+    for entries in snapshots:
+        for name, labels, value in entries:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            current = merged.get(key)
+            if current is None:
+                merged[key] = _copy(value)
+            elif isinstance(value, list):
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+            elif registry.definitions[name]['kind'] == 'counter':
+                merged[key] = current + value
+            else:
+                merged[key] = value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render(app):
+    """Render all metrics in the Prometheus text exposition format."""
+    merged = collect(app)
+    lines = []
+    for name, definition in registry.definitions.items():
+        series = sorted((labels, value) for (n, labels), value in merged.items() if n == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {definition["help"]}')
+        lines.append(f'# TYPE {name} {definition["kind"]}')
+        for labels, value in series:
+            if definition['kind'] == 'histogram':
+                cumulative = 0
+                for bound, count in zip(definition['buckets'], value[0]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value[2]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value[1]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value[2]}')
+            else:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Register request hooks that record per-route metrics."""
+    app.config.setdefault('METRICS_DIR', None)
+    app.config.setdefault('METRICS_FLUSH_INTERVAL', 5.0)
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql_count = 0
+        g._metrics_sql_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if '_metrics_start' not in g:
+            return response
+        elapsed = time.perf_counter() - g._metrics_start
+        route = (('blueprint', request.blueprint or 'app'), ('endpoint', request.endpoint or 'unmatched'))
+
+        registry.inc('snacklore_http_requests_total',
+                     route + (('method', request.method), ('status', str(response.status_code))))
+        registry.observe('snacklore_http_request_duration_seconds', elapsed, route)
+        if not response.is_streamed:
+            registry.observe('snacklore_http_response_size_bytes', response.calculate_content_length() or 0, route)
+        registry.observe('snacklore_sql_queries_per_request', g._metrics_sql_count, route)
+        registry.observe('snacklore_sql_duration_seconds_per_request', g._metrics_sql_time, route)
+        registry.inc('snacklore_sql_queries_total', route, g._metrics_sql_count)
+
+        flush_snapshot(app)
+        return response
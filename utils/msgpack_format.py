@@ -0,0 +1,97 @@
+"""MessagePack as an alternative encoding for the JSON API.
+
+A request under /api/ whose Accept header prefers ``application/msgpack``
+gets every ``jsonify`` payload encoded as MessagePack instead of JSON; JSON
+stays the default. Request bodies sent as ``Content-Type: application/msgpack``
+are decoded by ``request.get_json()``, so views accept either encoding.
+
+The payload is the same in both encodings: datetimes are ISO 8601 strings and
+Decimals are floats. MessagePack support is disabled when the msgpack package
+is not installed or MSGPACK is false.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask import Request, current_app, has_request_context, request
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+
+def _default(value):
+    from utils.json_provider import Fragment
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Fragment):
+        return json.loads(value.data)
+    raise TypeError(f'Object of type {type(value).__name__} is not MessagePack serializable')
+
+
+def packb(obj):
+    """Encode obj as MessagePack bytes."""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def unpackb(data):
+    """Decode MessagePack bytes; maps may only have string keys."""
+    return msgpack.unpackb(data, raw=False, strict_map_key=True)
+
+
+def wants_msgpack():
+    """True when the current API request prefers a MessagePack response."""
+    if msgpack is None or not has_request_context() or not current_app.config.get('MSGPACK', True):
+        return False
+    if not request.path.startswith('/api/'):
+        return False
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+
+class MsgpackRequest(Request):
+    """Request whose get_json() also decodes MessagePack bodies."""
+
+    _cached_msgpack = None
+
+    @property
+    def is_msgpack(self):
+        return self.mimetype in MSGPACK_MIMETYPES
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if not self.is_msgpack:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        if self._cached_msgpack is not None:
+            return self._cached_msgpack
+        if msgpack is None or not current_app.config.get('MSGPACK', True):
+            if silent:
+                return None
+            raise UnsupportedMediaType('MessagePack request bodies are not supported.')
+        try:
+            data = unpackb(self.get_data(cache=cache))
+        except (ValueError, TypeError) as e:
+            if silent:
+                return None
+            raise BadRequest(f'Failed to decode MessagePack body: {e}')
+        if cache:
+            self._cached_msgpack = data
+        return data
+
+
+def init_msgpack(app):
+    """Accept MessagePack request bodies and add Vary: Accept to API responses."""
+    app.config.setdefault('MSGPACK', True)
+    app.request_class = MsgpackRequest
+
+    @app.after_request
+    def vary_on_accept(response):
+        # The encoding of API responses depends on Accept, so caches must key on it
+        if app.config['MSGPACK'] and msgpack is not None and request.path.startswith('/api/'):
+            response.vary.add('Accept')
+        return response
@@ -0,0 +1,143 @@
+"""Request profiling: on-demand cProfile dumps and low-rate stack sampling.
+
+On demand, an admin adds ``X-Profile: store`` (or ``?_profile=store``) to a
+request; the request runs under cProfile and the pstats dump is written to
+PROFILE_DIR (``X-Profile-File`` names it). ``download`` returns the dump
+instead of the response body.
+
+With PROFILE_SAMPLE_RATE > 0, that fraction of all requests is sampled by a
+background thread reading the request thread's stack. Samples are aggregated
+per worker into ``samples-<pid>.folded`` (collapsed stacks, the input format
+of flamegraph.pl and speedscope).
+"""
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import g, request, send_file
+from utils.auth import get_current_user, is_admin
+
+PROFILE_MODES = ('store', 'download')
+
+_samples = Counter()
+_samples_lock = threading.Lock()
+_flush_state = {'last': time.time()}
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+def _requested_mode():
+    value = request.headers.get('X-Profile') or request.args.get('_profile')
+    if not value:
+        return None
+    return value if value in PROFILE_MODES else 'store'
+
+
+def _profile_path(app):
+    directory = app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    endpoint = re.sub(r'[^\w.-]', '_', request.endpoint or 'unmatched')
+    return os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{endpoint}-{os.getpid()}.prof')
+
+
+def flush_samples(app, force=False):
+    """Write this worker's aggregated samples, at most every PROFILE_FLUSH_INTERVAL seconds."""
+    now = time.time()
+    if not force and now - _flush_state['last'] < app.config['PROFILE_FLUSH_INTERVAL']:
+        return
+    _flush_state['last'] = now
+    with _samples_lock:
+        lines = [f'{stack} {count}\n' for stack, count in _samples.items()]
+    if not lines:
+        return
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+    path = os.path.join(app.config['PROFILE_DIR'], f'samples-{os.getpid()}.folded')
+    with open(f'{path}.tmp', 'w') as f:
+        f.writelines(lines)
+    os.replace(f'{path}.tmp', path)
+
+
+def init_profiler(app):
+    """Register request hooks for on-demand and sampled profiling."""
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.root_path, 'profiles'))
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_SAMPLE_INTERVAL', 0.005)
+    app.config.setdefault('PROFILE_FLUSH_INTERVAL', 60.0)
+
+    @app.before_request
+    def start_profiler():
+        mode = _requested_mode()
+        if mode and is_admin(get_current_user()):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this process
+                return
+            g._profiler = profiler
+            g._profile_mode = mode
+        elif random.random() < app.config['PROFILE_SAMPLE_RATE']:
+            sampler = g._sampler = StackSampler(threading.get_ident(), app.config['PROFILE_SAMPLE_INTERVAL'])
+            sampler.start()
+
+    @app.after_request
+    def stop_profiler(response):
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            path = _profile_path(app)
+            profiler.dump_stats(path)
+            if g._profile_mode == 'download':
+                return send_file(path, mimetype='application/octet-stream', as_attachment=True)
+            response.headers['X-Profile-File'] = os.path.basename(path)
+
+        sampler = g.pop('_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+            prefix = f'{request.endpoint or "unmatched"};'
+            with _samples_lock:
+                for stack, count in sampler.stacks.items():
+                    _samples[prefix + stack] += count
+            flush_samples(app)
+        return response
+
+    @app.teardown_request
+    def stop_sampler(exc):
+        # Covers requests whose after_request hooks did not run
+        sampler = g.pop('_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.disable()
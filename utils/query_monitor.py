@@ -0,0 +1,129 @@
+"""Per-request SQL statement counting, query budgets and N+1 detection."""
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.errors import QueryBudgetExceeded
+
+_local = threading.local()
+
+_WHITESPACE = re.compile(r'\s+')
+_PARAM = re.compile(r'%\(\w+\)s|\?|:\w+|\$\d+')
+_NUMBER = re.compile(r"\b\d+\b|'[^']*'")
+_PARAM_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+
+
+def statement_shape(statement):
+    """Normalize a statement so queries differing only in parameters compare equal."""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _NUMBER.sub('?', _PARAM.sub('?', shape))
+    return _PARAM_LIST.sub('?, ...', shape)
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while it is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def shapes(self):
+        """Return a Counter of statement shapes."""
+        return Counter(statement_shape(s) for s in self.statements)
+
+    def repeated(self, threshold=2):
+        """Return shapes executed at least threshold times (likely N+1 patterns)."""
+        return {shape: n for shape, n in self.shapes().most_common() if n >= threshold}
+
+
+def _active_counters():
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    return counters
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements run by this thread: ``with count_queries() as queries: ...``"""
+    counter = QueryCounter()
+    counters = _active_counters()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    counters = getattr(_local, 'counters', None)
+    if counters:
+        for counter in counters:
+            counter.statements.append(statement)
+
+
+def query_budget(max_queries):
+    """Decorator to override QUERY_BUDGET for a single view."""
+    def decorator(f):
+        f._query_budget = max_queries
+        return f
+    return decorator
+
+
+def _check_request(counter):
+    """Log or raise when the finished request exceeded its budget or repeated statements."""
+    config = current_app.config
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, '_query_budget', config['QUERY_BUDGET'])
+    endpoint = request.endpoint or request.path
+
+    problems = []
+    if budget is not None and counter.count > budget:
+        problems.append(f'{counter.count} SQL statements (budget {budget})')
+    for shape, n in counter.repeated(config['QUERY_REPEAT_THRESHOLD']).items():
+        problems.append(f'{n}x repeated statement (possible N+1): {shape[:200]}')
+    if not problems:
+        return
+
+    message = f'Query budget check failed for {endpoint}: ' + '; '.join(problems)
+    if config['QUERY_BUDGET_MODE'] == 'raise':
+        raise QueryBudgetExceeded(message)
+    current_app.logger.warning(message)
+
+
+def init_query_monitor(app):
+    """Register request hooks enforcing per-request query budgets."""
+    app.config.setdefault('QUERY_BUDGET', None)
+    app.config.setdefault('QUERY_REPEAT_THRESHOLD', 5)
+    app.config.setdefault('QUERY_BUDGET_MODE', 'log')
+    app.config.setdefault('QUERY_COUNT_HEADER', False)
+
+    @app.before_request
+    def start_query_monitor():
+        counter = g._query_counter = QueryCounter()
+        _active_counters().append(counter)
+
+    @app.after_request
+    def check_query_budget(response):
+        counter = g.pop('_query_counter', None)
+        if counter is None:
+            return response
+        _active_counters().remove(counter)
+        if app.config['QUERY_COUNT_HEADER']:
+            response.headers['X-Query-Count'] = str(counter.count)
+        _check_request(counter)
+        return response
+
+    @app.teardown_request
+    def stop_query_monitor(exc):
+        # Only reached with a counter still active when after_request did not run
+        counter = g.pop('_query_counter', None)
+        if counter is not None:
+            _active_counters().remove(counter)
@@ -0,0 +1,379 @@
+"""Fast-path serializers producing the same output as the models' to_dict methods.
+
+Each entity has a FieldPlan, compiled once from the model's columns: the
+columns to select and, for every output key, the row position and converter.
+List endpoints select those columns as plain row tuples instead of hydrating
+ORM objects. A Serializer (one per response) loads nested users, states and
+countries in batches, serializes each of them once and reuses the dict for
+every row that refers to it, and aggregates votes with one query per list.
+
+A Projection narrows a plan to the keys of ``?fields=`` and the nested
+objects of ``?embed=``, so only the selected columns are queried and built.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from flask import jsonify, request
+from sqlalchemy import func
+from db import db
+from models.comment import Comment
+from models.comment_vote import CommentVote
+from models.country import Country
+from models.country_state import CountryState
+from models.favorite import Favorite
+from models.recipe import Recipe
+from models.recipe_ingredient import RecipeIngredient
+from models.recipe_step import RecipeStep
+from models.recipe_vote import RecipeVote
+from models.user import User
+from utils.server_timing import timed
+
+
+def _none_if_zero(value):
+    return value or None
+
+
+def _converter(column):
+    # Datetimes and Decimals are left to the JSON provider; to_dict maps a zero amount to None
+    if isinstance(column.type, db.Numeric):
+        return _none_if_zero
+    return None
+
+
+class FieldPlan:
+    """Precompiled mapping from a row of selected columns to an output dict.
+
+    fields lists output keys in order. A plain name is a column of model; a
+    (key, kind, foreign_key) tuple embeds the nested entity of that kind
+    whose id is in the foreign_key column (selected even if not output).
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        columns = []
+        positions = {}
+        self.steps = []
+        self.nested = []
+        for field in fields:
+            if isinstance(field, tuple):
+                key, kind, foreign_key = field
+                if foreign_key not in positions:
+                    positions[foreign_key] = len(columns)
+                    columns.append(getattr(model, foreign_key))
+                self.steps.append((key, positions[foreign_key], None, kind))
+                self.nested.append((kind, positions[foreign_key]))
+            else:
+                column = getattr(model, field)
+                positions[field] = len(columns)
+                self.steps.append((field, len(columns), _converter(column), None))
+                columns.append(column)
+        self.columns = tuple(columns)
+        self.keys = tuple(step[0] for step in self.steps)
+
+    @property
+    def embeds(self):
+        """Output keys of the nested entities, with their kinds."""
+        return {field[0]: field[1] for field in self.fields if isinstance(field, tuple)}
+
+    def project(self, keys, embed=None):
+        """Return a plan limited to keys; with embed, nested keys must also be in embed."""
+        fields = []
+        for field in self.fields:
+            key = field[0] if isinstance(field, tuple) else field
+            if key in keys and (embed is None or not isinstance(field, tuple) or key in embed):
+                fields.append(field)
+        return FieldPlan(self.model, fields)
+
+    def select(self, query):
+        """Restrict query to the plan's columns so it returns row tuples."""
+        return query.with_entities(*self.columns)
+
+    def build(self, row, nested):
+        data = {}
+        for key, index, convert, kind in self.steps:
+            value = row[index]
+            if kind is not None:
+                value = nested[kind].get(value) if value is not None else None
+            elif convert is not None:
+                value = convert(value)
+            data[key] = value
+        return data
+
+
+COUNTRY_PLAN = FieldPlan(Country, ['id', 'name', 'code', 'continent', 'lat', 'lng', 'created_at'])
+STATE_PLAN = FieldPlan(CountryState, ['id', 'country_id', 'name', ('country', 'country', 'country_id'), 'created_at'])
+USER_PUBLIC_PLAN = FieldPlan(User, ['id', 'username', 'bio', 'country', 'created_at'])
+RECIPE_PLAN = FieldPlan(Recipe, [
+    'id', 'title', 'slug', 'description', 'instructions',
+    'author_id', ('author', 'user', 'author_id'),
+    'state_id', ('state', 'state', 'state_id'),
+    'image_url', 'created_at', 'updated_at',
+])
+COMMENT_PLAN = FieldPlan(Comment, [
+    'id', 'recipe_id', 'user_id', ('user', 'user', 'user_id'),
+    'parent_id', 'content', 'is_edited', 'created_at', 'updated_at',
+])
+STEP_PLAN = FieldPlan(RecipeStep, [
+    'id', 'recipe_id', 'step_number', 'instruction', 'image_url', 'duration_minutes', 'created_at',
+])
+INGREDIENT_PLAN = FieldPlan(RecipeIngredient, [
+    'id', 'step_id', 'name', 'quantity', 'unit', 'notes', 'order', 'created_at',
+])
+FAVORITE_PLAN = FieldPlan(Favorite, ['id', 'user_id', 'favorite_type', 'favorite_id', 'created_at'])
+
+NESTED_PLANS = {'country': COUNTRY_PLAN, 'state': STATE_PLAN, 'user': USER_PUBLIC_PLAN}
+
+VOTE_KEYS = ('upvotes', 'downvotes', 'score', 'user_vote')
+
+# plan: the top-level plan; nested_plans: kind -> plan for embedded entities;
+# keys: every output key selected, including computed ones (votes, replies)
+Projection = namedtuple('Projection', 'plan nested_plans keys')
+
+RECIPE_PROJECTION = Projection(RECIPE_PLAN, NESTED_PLANS, frozenset(RECIPE_PLAN.keys + VOTE_KEYS))
+COMMENT_PROJECTION = Projection(COMMENT_PLAN, NESTED_PLANS, frozenset(COMMENT_PLAN.keys + VOTE_KEYS + ('replies',)))
+PROJECTIONS = {'recipe': RECIPE_PROJECTION, 'comment': COMMENT_PROJECTION}
+
+
+@lru_cache(maxsize=256)
+def _projection(entity, fields, embed):
+    default = PROJECTIONS[entity]
+    plan = default.plan
+    errors = []
+    if fields is None:
+        keys = set(default.keys)
+    else:
+        keys = {key.strip() for key in fields.split(',') if key.strip()}
+        unknown = keys - default.keys
+        if unknown:
+            errors.append(f"Unknown fields: {', '.join(sorted(unknown))}. "
+                          f"Available: {', '.join(sorted(default.keys))}")
+        keys = (keys & default.keys) | {'id'}
+
+    if embed is None:
+        return Projection(plan.project(keys), default.nested_plans, frozenset(keys)), errors
+
+    # 'state.country' embeds the state and the country inside it
+    paths = {path.strip() for path in embed.split(',') if path.strip()}
+    top = {path.split('.', 1)[0] for path in paths}
+    valid = set(plan.embeds)
+    for key, kind in plan.embeds.items():
+        valid.update(f'{key}.{sub}' for sub in default.nested_plans[kind].embeds)
+    unknown = paths - valid
+    if unknown:
+        errors.append(f"Unknown embeds: {', '.join(sorted(unknown))}. Available: {', '.join(sorted(valid))}")
+
+    nested_plans = dict(default.nested_plans)
+    for key, kind in plan.embeds.items():
+        nested_plan = default.nested_plans[kind]
+        sub = {path.split('.', 1)[1] for path in paths if path.startswith(key + '.')}
+        nested_plans[kind] = nested_plan.project(set(nested_plan.keys), sub)
+    return Projection(plan.project(keys, top), nested_plans, frozenset(keys)), errors
+
+
+def get_projection(entity, args):
+    """Read ?fields= and ?embed= for entity ('recipe' or 'comment') into (projection, errors).
+
+    fields lists the output keys (id is always included); embed lists the
+    nested objects to include, e.g. ``embed=author,state.country``. Without
+    embed every selected nested object is included in full. Responses
+    without either parameter are unchanged.
+    """
+    return _projection(entity, args.get('fields'), args.get('embed'))
+
+
+def projection_or_400(entity):
+    """Return (projection, error_response) for the current request's ?fields= and ?embed=.
+
+    error_response is None when both are valid, else the 400 ValidationError
+    response to return as is.
+    """
+    projection, errors = get_projection(entity, request.args)
+    if errors:
+        body = {'error': 'ValidationError', 'message': 'Validation failed', 'details': errors}
+        return projection, (jsonify(body), 400)
+    return projection, None
+
+
+def _add_votes(data, counts, user_votes, user_id, keys):
+    upvotes, downvotes = counts.get(data['id'], (0, 0))
+    votes = {
+        'upvotes': upvotes,
+        'downvotes': downvotes,
+        'score': upvotes - downvotes,
+        'user_vote': user_votes.get(data['id']) if user_id else None,
+    }
+    for key in keys:
+        data[key] = votes[key]
+
+
+class Serializer:
+    """Serializes rows for one response, sharing nested objects across rows."""
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+        # nested plan -> {id: serialized dict}
+        self.nested = {}
+
+    def serialize(self, plan, rows, nested_plans=NESTED_PLANS):
+        """Serialize rows selected with plan.select()."""
+        nested = self._resolve(plan, rows, nested_plans)
+        return [plan.build(row, nested) for row in rows]
+
+    def _resolve(self, plan, rows, nested_plans=NESTED_PLANS):
+        """Load and serialize the nested entities rows refer to, once per id.
+
+        Returns the kind -> {id: dict} mapping plan.build() expects.
+        """
+        nested = {}
+        for kind, index in plan.nested:
+            ids = {row[index] for row in rows if row[index] is not None}
+            nested[kind] = self._load(nested_plans[kind], ids, nested_plans)
+        return nested
+
+    def _load(self, plan, ids, nested_plans=NESTED_PLANS):
+        """Return plan's {id: dict} for this response, loading the ids not serialized yet in one query."""
+        cache = self.nested.setdefault(plan, {})
+        missing = set(ids) - cache.keys()
+        if missing:
+            model = plan.model
+            rows = plan.select(model.query.filter(model.id.in_(missing))).all()
+            for row, data in zip(rows, self.serialize(plan, rows, nested_plans)):
+                cache[row[0]] = data
+        return cache
+
+    def _vote_counts(self, vote_model, target_column, ids, keys=VOTE_KEYS):
+        """Return ({id: (upvotes, downvotes)}, {id: current user's vote}) in up to two queries.
+
+        Each query is skipped when keys needs nothing from it.
+        """
+        counts = {}
+        user_votes = {}
+        if not ids:
+            return counts, user_votes
+        if set(keys) - {'user_vote'}:
+            rows = db.session.query(target_column, vote_model.vote_type, func.count()).filter(
+                target_column.in_(ids)
+            ).group_by(target_column, vote_model.vote_type).all()
+            for target_id, vote_type, count in rows:
+                upvotes, downvotes = counts.get(target_id, (0, 0))
+                counts[target_id] = (upvotes + count, downvotes) if vote_type == 'upvote' else (upvotes, downvotes + count)
+        if self.user_id and 'user_vote' in keys:
+            user_votes = dict(db.session.query(target_column, vote_model.vote_type).filter(
+                vote_model.user_id == self.user_id, target_column.in_(ids)
+            ).all())
+        return counts, user_votes
+
+    def recipe_scores(self, recipe_ids):
+        """Return {recipe_id: score} for recipe_ids in one grouped query (0 for recipes without votes)."""
+        counts, _ = self._vote_counts(RecipeVote, RecipeVote.recipe_id, list(recipe_ids), ('score',))
+        return {recipe_id: counts[recipe_id][0] - counts[recipe_id][1] if recipe_id in counts else 0
+                for recipe_id in recipe_ids}
+
+    @timed('serialize')
+    def recipes(self, rows, include_votes=True, projection=RECIPE_PROJECTION):
+        """Same output as Recipe.to_dict(include_steps=False, include_votes=...).
+
+        rows must be selected with projection.plan.
+        """
+        items = self.serialize(projection.plan, rows, projection.nested_plans)
+        vote_keys = [key for key in VOTE_KEYS if key in projection.keys] if include_votes else []
+        if vote_keys:
+            counts, user_votes = self._vote_counts(RecipeVote, RecipeVote.recipe_id, [item['id'] for item in items],
+                                                   vote_keys)
+            for item in items:
+                _add_votes(item, counts, user_votes, self.user_id, vote_keys)
+        return items
+
+    @timed('serialize')
+    def comments(self, rows, include_replies=True, include_votes=True, projection=COMMENT_PROJECTION):
+        """Same output as Comment.to_dict(include_replies=..., include_votes=...).
+
+        rows must be selected with projection.plan.
+        """
+        plan = projection.plan
+        items = self.serialize(plan, rows, projection.nested_plans)
+        replies = []
+        if include_replies and 'replies' in projection.keys:
+            by_parent = {item['id']: item for item in items}
+            for item in items:
+                item['replies'] = []
+            if by_parent:
+                # parent_id is selected after the plan's columns in case the plan omits it
+                reply_rows = plan.select(Comment.query.filter(Comment.parent_id.in_(by_parent.keys()))
+                                         .order_by(Comment.created_at)).add_columns(Comment.parent_id).all()
+                replies = self.serialize(plan, reply_rows, projection.nested_plans)
+                for row, reply in zip(reply_rows, replies):
+                    by_parent[row[-1]]['replies'].append(reply)
+        vote_keys = [key for key in VOTE_KEYS if key in projection.keys] if include_votes else []
+        if vote_keys:
+            everything = items + replies
+            counts, user_votes = self._vote_counts(CommentVote, CommentVote.comment_id, [c['id'] for c in everything],
+                                                   vote_keys)
+            for item in everything:
+                _add_votes(item, counts, user_votes, self.user_id, vote_keys)
+        return items
+
+    @timed('serialize')
+    def steps(self, recipe_ids):
+        """Return {recipe_id: [RecipeStep.to_dict(), ...]} in step order, in two queries."""
+        by_recipe = {}
+        if not recipe_ids:
+            return by_recipe
+        step_rows = STEP_PLAN.select(RecipeStep.query.filter(RecipeStep.recipe_id.in_(recipe_ids)).order_by(
+            RecipeStep.recipe_id, RecipeStep.step_number)).all()
+        by_id = {}
+        for step in self.serialize(STEP_PLAN, step_rows):
+            step['ingredients'] = []
+            by_id[step['id']] = step
+            by_recipe.setdefault(step['recipe_id'], []).append(step)
+        if by_id:
+            ingredient_rows = INGREDIENT_PLAN.select(RecipeIngredient.query.filter(
+                RecipeIngredient.step_id.in_(by_id.keys())).order_by(RecipeIngredient.order, RecipeIngredient.id)).all()
+            for ingredient in self.serialize(INGREDIENT_PLAN, ingredient_rows):
+                by_id[ingredient['step_id']]['ingredients'].append(ingredient)
+        return by_recipe
+
+    @timed('serialize')
+    def recipe(self, row):
+        """Same output as Recipe.to_dict(include_steps=True, include_comments=True, include_votes=True).
+
+        row must be selected with RECIPE_PLAN.
+        """
+        recipe_id = row[0]
+        data = self.serialize(RECIPE_PLAN, [row])[0]
+        counts, user_votes = self._vote_counts(RecipeVote, RecipeVote.recipe_id, [recipe_id])
+        _add_votes(data, counts, user_votes, self.user_id, VOTE_KEYS)
+        data['steps'] = self.steps([recipe_id]).get(recipe_id, [])
+        comment_rows = COMMENT_PLAN.select(Comment.query.filter_by(recipe_id=recipe_id, parent_id=None)
+                                           .order_by(Comment.created_at)).all()
+        data['comments'] = self.comments(comment_rows, include_votes=False)
+        return data
+
+    @timed('serialize')
+    def favorites(self, rows):
+        """Same output as Favorite.to_dict(); rows must be selected with FAVORITE_PLAN.
+
+        The favorited users, states, countries and recipes are loaded with one
+        query per type.
+        """
+        items = self.serialize(FAVORITE_PLAN, rows)
+        ids = {}
+        for item in items:
+            ids.setdefault(item['favorite_type'], set()).add(item['favorite_id'])
+        loaded = {kind: self._load(NESTED_PLANS[kind], ids.get(kind, ())) for kind in ('user', 'state', 'country')}
+        # Favorited recipes are serialized like Recipe.to_dict(include_steps=False): no votes
+        recipe_rows = RECIPE_PLAN.select(Recipe.query.filter(Recipe.id.in_(ids['recipe']))).all() if 'recipe' in ids else []
+        loaded['recipe'] = {row[0]: data for row, data in zip(recipe_rows, self.serialize(RECIPE_PLAN, recipe_rows))}
+        for item in items:
+            item['favorite_data'] = loaded.get(item['favorite_type'], {}).get(item['favorite_id'])
+        return items
+
+    @timed('serialize')
+    def states(self, rows):
+        """Same output as CountryState.to_dict()."""
+        return self.serialize(STATE_PLAN, rows)
+
+    @timed('serialize')
+    def countries(self, rows):
+        """Same output as Country.to_dict()."""
+        return self.serialize(COUNTRY_PLAN, rows)
@@ -0,0 +1,155 @@
+"""Server-Timing response header with a per-phase breakdown of request time.
+
+Phases are measured exclusively: time spent in a nested phase (for example a
+lazy-load query inside ``to_dict`` or a template) is only counted once, for
+the innermost phase.
+"""
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context, before_render_template, template_rendered
+from flask_sqlalchemy.query import Query
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.json_provider import FastJSONProvider
+
+PHASES = ('db', 'orm', 'serialize', 'render')
+
+
+def _enter(name):
+    if has_request_context() and '_timings' in g:
+        g._timing_stack.append([name, time.perf_counter(), 0.0])
+
+
+def _exit(name):
+    if not has_request_context() or '_timings' not in g:
+        return
+    stack = g._timing_stack
+    if not any(frame[0] == name for frame in stack):
+        return
+    # Unwind frames left open by an exception in a nested phase
+    while stack:
+        frame_name, start, child_time = stack.pop()
+        elapsed = time.perf_counter() - start
+        g._timings[frame_name] = g._timings.get(frame_name, 0.0) + elapsed - child_time
+        if stack:
+            stack[-1][2] += elapsed
+        if frame_name == name:
+            break
+
+
+@contextmanager
+def phase(name):
+    """Attribute the time spent in the block to a Server-Timing phase."""
+    _enter(name)
+    try:
+        yield
+    finally:
+        _exit(name)
+
+
+def timed(name):
+    """Decorator attributing a function's run time to a Server-Timing phase."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with phase(name):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+class TimedQuery(Query):
+    """Query class whose result-loading methods count as ORM hydration time."""
+
+    @timed('orm')
+    def all(self):
+        return super().all()
+
+    @timed('orm')
+    def first(self):
+        return super().first()
+
+    @timed('orm')
+    def one(self):
+        return super().one()
+
+    @timed('orm')
+    def one_or_none(self):
+        return super().one_or_none()
+
+    @timed('orm')
+    def scalar(self):
+        return super().scalar()
+
+    @timed('orm')
+    def count(self):
+        return super().count()
+
+
+class TimedJSONProvider(FastJSONProvider):
+    """JSON provider whose encoding time counts as serialization."""
+
+    @timed('serialize')
+    def dumpb(self, obj, indent=False):
+        return super().dumpb(obj, indent)
+
+    @timed('serialize')
+    def packb(self, obj):
+        return super().packb(obj)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _enter('db')
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _exit('db')
+    if has_request_context() and '_timings' in g:
+        g._timing_queries += 1
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    _exit('db')
+
+
+def _before_render(sender, template, context, **extra):
+    _enter('render')
+
+
+def _after_render(sender, template, context, **extra):
+    _exit('render')
+
+
+def init_server_timing(app):
+    """Register hooks that add a Server-Timing header to every response."""
+    app.config.setdefault('SERVER_TIMING', True)
+    if not app.config['SERVER_TIMING']:
+        return
+
+    app.json_provider_class = TimedJSONProvider
+    app.json = TimedJSONProvider(app)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_server_timing():
+        g._timings = {}
+        g._timing_stack = []
+        g._timing_queries = 0
+        g._timing_start = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing_header(response):
+        if '_timings' not in g:
+            return response
+        total = time.perf_counter() - g._timing_start
+        timings = g._timings
+        entries = [f'db;dur={timings.get("db", 0.0) * 1000:.2f};desc="{g._timing_queries} queries"']
+        entries += [f'{name};dur={timings.get(name, 0.0) * 1000:.2f}' for name in PHASES[1:]]
+        entries.append(f'total;dur={total * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+        return response
@@ -0,0 +1,200 @@
+"""Slow-query log with sampled EXPLAIN (ANALYZE, BUFFERS) capture.
+
+Each worker writes its own ``<log>.<pid>.log`` file, rotated by size, so
+workers never rotate a file another one is still writing; `flask
+slow-queries` reads them all.
+"""
+import glob
+import json
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+import click
+from flask import current_app, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.query_monitor import statement_shape
+
+logger = logging.getLogger('snacklore.slow_query')
+logger.propagate = False
+
+_settings = {'threshold': None, 'explain_rate': 0.0, 'log_path': None, 'max_bytes': 0, 'backups': 0, 'pid': None}
+
+# Plain SELECTs only: a data-modifying CTE (WITH ... INSERT/UPDATE/DELETE), a
+# locking read or a sequence call would be executed a second time by ANALYZE
+_EXPLAINABLE = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+_NOT_EXPLAINABLE = re.compile(r'\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b|\b(?:nextval|setval)\s*\(',
+                              re.IGNORECASE)
+
+
+def _param_shape(parameters):
+    """Describe bound parameters by type only, so no user data reaches the log."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def is_explainable(statement):
+    """True for statements that are safe to run again under EXPLAIN ANALYZE."""
+    return bool(_EXPLAINABLE.match(statement)) and not _NOT_EXPLAINABLE.search(statement)
+
+
+def _explain(conn, statement, parameters):
+    """Run EXPLAIN (ANALYZE, BUFFERS) for statement on the same connection.
+
+    Uses the raw DBAPI cursor so the EXPLAIN itself is not instrumented. It
+    always runs inside something that is rolled back: a savepoint within the
+    caller's transaction, or its own BEGIN ... ROLLBACK when the connection is
+    in autocommit (reads of GET requests), so a failure cannot abort the
+    caller's transaction and nothing the statement does is kept.
+    """
+    dbapi_conn = conn.connection.dbapi_connection
+    autocommit = getattr(dbapi_conn, 'autocommit', False)
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute('BEGIN' if autocommit else 'SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + statement, parameters)
+            return cursor.fetchone()[0]
+        finally:
+            if autocommit:
+                cursor.execute('ROLLBACK')
+            else:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+
+
+def worker_log_path(log_path, pid=None):
+    """Return this worker's log file: slow_queries.log becomes slow_queries.<pid>.log."""
+    root, ext = os.path.splitext(log_path)
+    return f'{root}.{pid or os.getpid()}{ext}'
+
+
+def _ensure_handler():
+    """Open this process's log file, reopening it after a fork."""
+    pid = os.getpid()
+    if _settings['pid'] == pid:
+        return
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    log_path = worker_log_path(_settings['log_path'], pid)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    handler = RotatingFileHandler(log_path, maxBytes=_settings['max_bytes'], backupCount=_settings['backups'],
+                                  encoding='utf-8', delay=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    _settings['pid'] = pid
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_slow_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['_slow_query_start'].pop()) * 1000
+    threshold = _settings['threshold']
+    if threshold is None or elapsed_ms < threshold:
+        return
+
+    entry = {
+        'ts': datetime.now(timezone.utc).isoformat(),
+        'duration_ms': round(elapsed_ms, 3),
+        'shape': statement_shape(statement),
+        'statement': statement,
+        'params': _param_shape(parameters[0] if executemany and parameters else parameters),
+        'executemany': executemany,
+        'pid': os.getpid(),
+    }
+    if has_request_context():
+        entry['endpoint'] = request.endpoint
+        entry['method'] = request.method
+        entry['path'] = request.path
+
+    if (not executemany and conn.dialect.name == 'postgresql' and is_explainable(statement)
+            and random.random() < _settings['explain_rate']):
+        try:
+            entry['plan'] = _explain(conn, statement, parameters)
+        except Exception as e:
+            entry['plan_error'] = str(e)
+
+    if _settings['log_path']:
+        _ensure_handler()
+    logger.warning(json.dumps(entry, default=str))
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    if context.connection is not None and context.statement is not None:
+        starts = context.connection.info.get('_slow_query_start')
+        if starts:
+            starts.pop()
+
+
+def summarize(log_path, limit=20):
+    """Aggregate slow-query log entries of every worker (including rotated files) by statement shape."""
+    root, ext = os.path.splitext(log_path)
+    stats = {}
+    for path in sorted(set(glob.glob(f'{glob.escape(root)}*{ext}') + glob.glob(f'{glob.escape(root)}*{ext}.*'))):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                item = stats.setdefault(entry['shape'], {
+                    'shape': entry['shape'], 'count': 0, 'total_ms': 0.0,
+                    'max_ms': 0.0, 'endpoints': set(), 'explained': 0,
+                })
+                item['count'] += 1
+                item['total_ms'] += entry['duration_ms']
+                item['max_ms'] = max(item['max_ms'], entry['duration_ms'])
+                if entry.get('endpoint'):
+                    item['endpoints'].add(entry['endpoint'])
+                if 'plan' in entry:
+                    item['explained'] += 1
+    return sorted(stats.values(), key=lambda item: item['total_ms'], reverse=True)[:limit]
+
+
+def init_slow_query_log(app):
+    """Configure the slow-query log and register the `flask slow-queries` command."""
+    app.config.setdefault('SLOW_QUERY_MS', None)
+    app.config.setdefault('SLOW_QUERY_LOG', os.path.join(app.root_path, 'logs', 'slow_queries.log'))
+    app.config.setdefault('SLOW_QUERY_EXPLAIN_RATE', 0.1)
+    app.config.setdefault('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+    app.config.setdefault('SLOW_QUERY_LOG_BACKUPS', 5)
+
+    _settings['threshold'] = app.config['SLOW_QUERY_MS']
+    _settings['explain_rate'] = app.config['SLOW_QUERY_EXPLAIN_RATE']
+    if _settings['threshold'] is not None:
+        # The file is opened on the first slow query, in the worker that logs it
+        _settings.update(log_path=app.config['SLOW_QUERY_LOG'], max_bytes=app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                         backups=app.config['SLOW_QUERY_LOG_BACKUPS'], pid=None)
+
+    @app.cli.command('slow-queries')
+    @click.option('--log', 'log_path', default=None, help='Slow-query log file (defaults to SLOW_QUERY_LOG).')
+    @click.option('--limit', default=20, show_default=True, help='Number of statement shapes to show.')
+    def slow_queries_command(log_path, limit):
+        """Show the slowest statement shapes by total time."""
+        log_path = log_path or current_app.config['SLOW_QUERY_LOG']
+        rows = summarize(log_path, limit)
+        if not rows:
+            click.echo(f'No slow queries logged in {log_path}')
+            return
+        click.echo(f'{"total ms":>12} {"count":>7} {"mean ms":>10} {"max ms":>10} {"plans":>6}  statement')
+        for item in rows:
+            click.echo(f'{item["total_ms"]:>12.1f} {item["count"]:>7} {item["total_ms"] / item["count"]:>10.1f} '
+                       f'{item["max_ms"]:>10.1f} {item["explained"]:>6}  {item["shape"][:120]}')
+            if item['endpoints']:
+                click.echo(f'{"":>50}endpoints: {", ".join(sorted(item["endpoints"]))}')
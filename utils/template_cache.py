@@ -0,0 +1,30 @@
+"""Persistent Jinja bytecode cache for faster cold starts.
+
+With TEMPLATE_CACHE_DIR set, compiled templates are stored there and loaded
+instead of being parsed and compiled again in every new worker.
+compile_templates.py fills the directory at image build time, so a machine
+that was stopped and restarted renders its first pages without compiling.
+Each cache entry records a checksum of its template's source; an edited
+template no longer matches and is recompiled (and the entry rewritten) the
+first time it is loaded.
+"""
+import os
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_template_cache(app):
+    """Install a FileSystemBytecodeCache in TEMPLATE_CACHE_DIR, if configured."""
+    app.config.setdefault('TEMPLATE_CACHE_DIR', None)
+    directory = app.config['TEMPLATE_CACHE_DIR']
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def compile_templates(app):
+    """Load every template once so its bytecode is written to the cache; return the names."""
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names